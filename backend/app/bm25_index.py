@@ -0,0 +1,199 @@
+"""
+BM25 Index - Okapi BM25 over a posting-list inverted index
+Shared by SearchEngine, SearchService and LexicalSearchEngine
+"""
+import json
+import math
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from app.top_k import top_k_indices
+except ImportError:  # imported as backend.app.bm25_index from the project root
+    from backend.app.top_k import top_k_indices
+
+
+class BM25Index:
+    """
+    Inverted-index BM25 with the same scoring as rank_bm25.BM25Okapi.
+
+    Postings are stored CSR-style: for term t with id i, its documents are
+    doc_ids[offsets[i]:offsets[i + 1]] with matching term frequencies in tfs.
+    IDF and the per-document length norm are precomputed, so a query only
+    touches the postings of its own terms instead of scoring every document.
+    """
+
+    def __init__(self, corpus: Iterable[Sequence[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self._build((Counter(document) for document in corpus), k1, b, epsilon)
+
+    @classmethod
+    def from_term_counts(cls, term_counts: Iterable[Dict[str, int]], k1: float = 1.5, b: float = 0.75,
+                         epsilon: float = 0.25) -> "BM25Index":
+        """Build from {term: tf} per document instead of token lists (same scores)"""
+        index = cls.__new__(cls)
+        index._build(term_counts, k1, b, epsilon)
+        return index
+
+    def term_counts(self) -> List[Dict[str, int]]:
+        """{term: tf} of every document, recovered from the postings (see from_term_counts)"""
+        terms = list(self.vocabulary)  # ordered by term id
+        term_ids = np.repeat(np.arange(len(terms)), np.diff(self.offsets))
+        order = np.argsort(self.doc_ids, kind="stable")
+        bounds = np.searchsorted(self.doc_ids[order], np.arange(self.corpus_size + 1))
+        doc_terms = term_ids[order].tolist()
+        doc_tfs = self.tfs[order].astype(np.int64).tolist()
+        return [
+            {terms[t]: tf for t, tf in zip(doc_terms[start:end], doc_tfs[start:end])}
+            for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist())
+        ]
+
+    def _build(self, term_counts: Iterable[Dict[str, int]], k1: float, b: float, epsilon: float):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        doc_lengths = []
+        for doc_id, counts in enumerate(term_counts):
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = ([], [])
+                entry[0].append(doc_id)
+                entry[1].append(tf)
+
+        self.corpus_size = len(doc_lengths)
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.int32)
+        self.avgdl = float(self.doc_lengths.sum()) / self.corpus_size if self.corpus_size else 0.0
+
+        # Term dictionary and CSR posting arrays
+        self.vocabulary: Dict[str, int] = {term: i for i, term in enumerate(postings)}
+        doc_freqs = np.fromiter((len(ids) for ids, _ in postings.values()), dtype=np.int64, count=len(postings))
+        self.offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum(doc_freqs, out=self.offsets[1:])
+        total_postings = int(self.offsets[-1])
+        self.doc_ids = np.fromiter(
+            (doc_id for ids, _ in postings.values() for doc_id in ids), dtype=np.int32, count=total_postings
+        )
+        self.tfs = np.fromiter(
+            (tf for _, tfs in postings.values() for tf in tfs), dtype=np.float64, count=total_postings
+        )
+
+        self.idf = self._compute_idf(doc_freqs)
+        self.doc_norms = self._compute_doc_norms()
+
+    def _compute_idf(self, doc_freqs: np.ndarray) -> np.ndarray:
+        """IDF per term id; negative IDFs are floored to epsilon * average IDF like BM25Okapi"""
+        idf = np.array(
+            [math.log(self.corpus_size - df + 0.5) - math.log(df + 0.5) for df in doc_freqs.tolist()],
+            dtype=np.float64
+        )
+        if len(idf):
+            average_idf = sum(idf.tolist()) / len(idf)
+            idf[idf < 0] = self.epsilon * average_idf
+        return idf
+
+    def _compute_doc_norms(self) -> np.ndarray:
+        """k1 * (1 - b + b * dl / avgdl) for every document"""
+        if not self.avgdl:
+            return np.full(self.corpus_size, self.k1 * (1 - self.b), dtype=np.float64)
+        return self.k1 * (1 - self.b + self.b * self.doc_lengths / self.avgdl)
+
+    def _term_scores(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(doc ids, score contribution) of one term's posting list"""
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        ids = self.doc_ids[start:end]
+        tf = self.tfs[start:end]
+        return ids, self.idf[term_id] * (tf * (self.k1 + 1) / (tf + self.doc_norms[ids]))
+
+    def _accumulate(self, query: Sequence[str], scores: np.ndarray) -> List[np.ndarray]:
+        """Add each query term's contribution into scores; returns the posting lists touched"""
+        touched = []
+        for term in query:
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            ids, contribution = self._term_scores(term_id)
+            scores[ids] += contribution
+            touched.append(ids)
+        return touched
+
+    def get_scores(self, query: Sequence[str]) -> np.ndarray:
+        """Dense score vector over all documents (same contract as BM25Okapi.get_scores)"""
+        scores = np.zeros(self.corpus_size, dtype=np.float64)
+        self._accumulate(query, scores)
+        return scores
+
+    def get_scores_many(self, queries: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        get_scores for several queries as one (len(queries), corpus_size) matrix.
+        Each distinct term's posting list is scored once and shared by every query using it.
+        """
+        scores = np.zeros((len(queries), self.corpus_size), dtype=np.float64)
+        term_scores = {}
+        for row, query in enumerate(queries):
+            for term in query:
+                term_id = self.vocabulary.get(term)
+                if term_id is None:
+                    continue
+                if term_id not in term_scores:
+                    term_scores[term_id] = self._term_scores(term_id)
+                ids, contribution = term_scores[term_id]
+                scores[row, ids] += contribution
+        return scores
+
+    def top_k(self, query: Sequence[str], k: int) -> List[Tuple[int, float]]:
+        """
+        Best k (doc_id, score) pairs with a positive score, highest first.
+        Only documents containing at least one query term are considered.
+        """
+        scores = np.zeros(self.corpus_size, dtype=np.float64)
+        touched = self._accumulate(query, scores)
+        if not touched or k <= 0:
+            return []
+        candidates = np.unique(np.concatenate(touched))
+        best = candidates[top_k_indices(scores[candidates], k)]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in best if scores[doc_id] > 0]
+
+    def __len__(self) -> int:
+        return self.corpus_size
+
+    # Arrays persisted as <prefix>_<name>.npy; everything else goes to <prefix>_meta.json
+    _ARRAYS = ("offsets", "doc_ids", "tfs", "doc_lengths", "idf", "doc_norms")
+
+    def save(self, directory: Path, prefix: str = "bm25"):
+        """Write the postings as raw .npy arrays plus a JSON term dictionary"""
+        directory = Path(directory)
+        for name in self._ARRAYS:
+            np.save(directory / f"{prefix}_{name}.npy", getattr(self, name))
+        meta = {
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "corpus_size": self.corpus_size,
+            "avgdl": self.avgdl,
+            "terms": list(self.vocabulary)  # ordered by term id
+        }
+        with open(directory / f"{prefix}_meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: Path, prefix: str = "bm25", mmap_mode: Optional[str] = "r") -> "BM25Index":
+        """Load an index written by save(); arrays are memory-mapped by default"""
+        directory = Path(directory)
+        with open(directory / f"{prefix}_meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls.__new__(cls)
+        index.k1 = meta["k1"]
+        index.b = meta["b"]
+        index.epsilon = meta["epsilon"]
+        index.corpus_size = meta["corpus_size"]
+        index.avgdl = meta["avgdl"]
+        index.vocabulary = {term: i for i, term in enumerate(meta["terms"])}
+        for name in cls._ARRAYS:
+            setattr(index, name, np.load(directory / f"{prefix}_{name}.npy", mmap_mode=mmap_mode))
+        return index
@@ -0,0 +1,522 @@
+"""
+Code Graph - Whole-repository component graph, built once per semantic index
+Node i is item i of the semantic index; edges (calls_endpoint, handles_event,
+handles_route, calls_function, imports) are stored as CSR adjacency arrays and
+persisted next to the index, so /graph serves the full graph or any subgraph
+without re-deriving relationships.
+
+Files written by save() (prefix "graph"):
+    graph_indptr.npy      int64 (n_nodes + 1) offsets of each node's outgoing edges
+    graph_targets.npy     int32 (n_edges) target node of each edge
+    graph_edge_types.npy  int8  (n_edges) index into EDGE_TYPES
+    graph_edge_meta.npy   int32 (n_edges) index into the metadata table (-1 = none)
+    graph_node_types.npy  int16 (n_nodes) index into the node type table
+    graph_node_files.npy  int32 (n_nodes) index into the file table
+    graph_meta.json       node count, node type table, file table, edge metadata table
+"""
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.route_table import RouteTable, route_methods
+
+EDGE_TYPES = ("calls_endpoint", "handles_event", "handles_route", "calls_function", "imports")
+CALLABLE_TYPES = ("function", "arrow_function", "class")
+FLOW_PATTERN = "button|element|form|input -> handles_event -> * -> calls_endpoint -> * -> handles_route -> *"
+CHAIN_PATTERN_MAX_LENGTH = 400  # characters of a chain pattern
+CHAIN_MAX_EXPANSIONS = 200_000  # edges a chain search follows before it gives up
+
+_JS_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+
+
+def _python_modules(file_path: str) -> List[str]:
+    """Dotted module names a Python file can be imported as ('a/b/app/x.py' -> x, app.x, b.app.x, ...)"""
+    parts = list(Path(file_path.replace("\\", "/")).with_suffix("").parts)
+    if parts and parts[-1] == "__init__":
+        parts = parts[:-1]
+    parts = [p for p in parts if p not in ("/", "")]
+    return [".".join(parts[-k:]) for k in range(1, len(parts) + 1)]
+
+
+class CodeGraph:
+    """Directed multigraph over the items of a semantic index, in CSR form"""
+
+    def __init__(self, indptr: np.ndarray, targets: np.ndarray, edge_types: np.ndarray,
+                 edge_meta: np.ndarray, node_types: np.ndarray, type_names: List[str], meta_table: List[Dict],
+                 node_files: np.ndarray, file_names: List[str]):
+        self.indptr = indptr
+        self.targets = targets
+        self.edge_types = edge_types
+        self.edge_meta = edge_meta
+        self.node_types = node_types
+        self.type_names = type_names
+        self.meta_table = meta_table
+        self.node_files = node_files
+        self.file_names = file_names
+        self._incoming = None  # reverse CSR (indptr, edge ids, sources), built on first use
+
+    @property
+    def node_count(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    # ---- construction ----
+
+    @classmethod
+    def build(cls, items: Iterable[Dict]) -> "CodeGraph":
+        """Derive every edge between items in one pass over the index plus one pass per item"""
+        items = list(items)
+        routes = RouteTable()
+        handlers: Dict[str, List[int]] = {}           # lowercase JS function name -> items
+        callables: Dict[str, List[int]] = {}          # lowercase function/class name -> items
+        symbols: Dict[Tuple[str, str], List[int]] = {}  # (file, name) -> items
+        modules: Dict[str, Set[str]] = {}             # dotted module name -> Python files
+
+        type_names: List[str] = []
+        type_ids: Dict[str, int] = {}
+        node_types = np.zeros(len(items), dtype=np.int16)
+        file_names: List[str] = []
+        file_ids: Dict[str, int] = {}
+        node_files = np.zeros(len(items), dtype=np.int32)
+
+        for item_id, item in enumerate(items):
+            item_type = item.get("type", "code")
+            if item_type not in type_ids:
+                type_ids[item_type] = len(type_names)
+                type_names.append(item_type)
+            node_types[item_id] = type_ids[item_type]
+
+            name = item.get("name") or ""
+            file_path = item.get("file_path", "")
+            if file_path not in file_ids:
+                file_ids[file_path] = len(file_names)
+                file_names.append(file_path)
+            node_files[item_id] = file_ids[file_path]
+            for route in item.get("routes", []):
+                if route.get("path"):
+                    routes.add(route["path"], item_id, route_methods(route))
+            if not name or item_type not in CALLABLE_TYPES:
+                continue
+            callables.setdefault(name.lower(), []).append(item_id)
+            symbols.setdefault((file_path, name), []).append(item_id)
+            if item.get("language") == "python":
+                for module in _python_modules(file_path):
+                    modules.setdefault(module, set()).add(file_path)
+            elif item_type != "class":
+                handlers.setdefault(name.lower(), []).append(item_id)
+
+        edges: List[Tuple[int, int, int, int]] = []  # (source, target, edge type, metadata id)
+        meta_table: List[Dict] = []
+        meta_ids: Dict[str, int] = {}
+
+        def meta_id(metadata: Dict) -> int:
+            key = json.dumps(metadata, sort_keys=True)
+            if key not in meta_ids:
+                meta_ids[key] = len(meta_table)
+                meta_table.append(metadata)
+            return meta_ids[key]
+
+        for source, item in enumerate(items):
+            seen = set()
+
+            def link(target: int, edge_type: str, metadata: Dict):
+                key = (target, edge_type)
+                if target != source and key not in seen:
+                    seen.add(key)
+                    edges.append((source, target, EDGE_TYPES.index(edge_type), meta_id(metadata)))
+
+            file_path = item.get("file_path", "")
+
+            for api_call in item.get("api_calls", []):
+                endpoint = api_call.get("endpoint", "")
+                if endpoint:
+                    for target in routes.resolve(endpoint, api_call.get("method")):
+                        link(target, "calls_endpoint",
+                             {"endpoint": endpoint, "method": api_call.get("method", "GET")})
+
+            for listener in item.get("event_listeners", []):
+                handler = listener.get("handler", "")
+                # onclick="doSearch(event)" -> doSearch; addEventListener('click', doSearch) -> doSearch
+                for identifier in _JS_IDENTIFIER.findall(handler):
+                    targets = handlers.get(identifier.lower())
+                    if targets:
+                        link(targets[0], "handles_event", {"event": listener.get("event", ""), "handler": handler})
+                        break
+
+            for route in item.get("routes", []):
+                path = route.get("path", "")
+                if path:
+                    for target in routes.resolve(path, route.get("method")):
+                        if type_names[node_types[target]] == "function":
+                            link(target, "handles_route", {"path": path, "method": route.get("method", "GET")})
+
+            for relation in item.get("relations", []):
+                if not isinstance(relation, str) or not relation:
+                    continue
+                candidates = callables.get(relation.rsplit(".", 1)[-1].lower(), [])
+                if candidates:
+                    same_file = [c for c in candidates if items[c].get("file_path", "") == file_path]
+                    link((same_file or candidates)[0], "calls_function", {"function": relation})
+
+            for imported in item.get("imports", []):
+                if " as " in imported or "." not in imported:
+                    continue
+                module, name = imported.rsplit(".", 1)
+                for module_file in sorted(modules.get(module, ())):
+                    for target in symbols.get((module_file, name), []):
+                        link(target, "imports", {"module": module, "name": name})
+
+        indptr = np.zeros(len(items) + 1, dtype=np.int64)
+        if edges:
+            np.cumsum(np.bincount([e[0] for e in edges], minlength=len(items)), out=indptr[1:])
+        return cls(
+            indptr=indptr,
+            targets=np.array([e[1] for e in edges], dtype=np.int32),
+            edge_types=np.array([e[2] for e in edges], dtype=np.int8),
+            edge_meta=np.array([e[3] for e in edges], dtype=np.int32),
+            node_types=node_types,
+            type_names=type_names,
+            meta_table=meta_table,
+            node_files=node_files,
+            file_names=file_names
+        )
+
+    # ---- persistence ----
+
+    _ARRAYS = ("indptr", "targets", "edge_types", "edge_meta", "node_types", "node_files")
+
+    def save(self, directory: Path, prefix: str = "graph"):
+        """Write the adjacency arrays as .npy files plus a JSON table of node types and edge metadata"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in self._ARRAYS:
+            np.save(directory / f"{prefix}_{name}.npy", getattr(self, name))
+        with open(directory / f"{prefix}_meta.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "node_count": self.node_count,
+                "edge_types": list(EDGE_TYPES),
+                "node_types": self.type_names,
+                "files": self.file_names,
+                "edge_meta": self.meta_table
+            }, f, ensure_ascii=False)
+
+    @staticmethod
+    def exists(directory: Path, prefix: str = "graph") -> bool:
+        return (Path(directory) / f"{prefix}_meta.json").exists()
+
+    @classmethod
+    def load(cls, directory: Path, prefix: str = "graph", mmap_mode: Optional[str] = "r") -> "CodeGraph":
+        """Load a graph written by save(); arrays are memory-mapped by default"""
+        directory = Path(directory)
+        with open(directory / f"{prefix}_meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("edge_types") != list(EDGE_TYPES) or "files" not in meta:
+            raise ValueError(f"Code graph at {directory} was written in an older format")
+        arrays = {name: np.load(directory / f"{prefix}_{name}.npy", mmap_mode=mmap_mode) for name in cls._ARRAYS}
+        graph = cls(type_names=meta["node_types"], meta_table=meta["edge_meta"], file_names=meta["files"], **arrays)
+        if graph.node_count != meta["node_count"]:
+            raise ValueError(f"Code graph at {directory} is inconsistent with its metadata")
+        return graph
+
+    # ---- queries ----
+
+    def node_type(self, node: int) -> str:
+        return self.type_names[self.node_types[node]]
+
+    def edge_type(self, edge: int) -> str:
+        return EDGE_TYPES[self.edge_types[edge]]
+
+    def edge_metadata(self, edge: int) -> Dict:
+        meta = int(self.edge_meta[edge])
+        return self.meta_table[meta] if meta >= 0 else {}
+
+    def out_edges(self, node: int) -> range:
+        """Edge ids leaving node (source is node, target is targets[edge])"""
+        return range(int(self.indptr[node]), int(self.indptr[node + 1]))
+
+    def edge_sources(self) -> np.ndarray:
+        """Source node of every edge"""
+        return np.repeat(np.arange(self.node_count, dtype=np.int32), np.diff(self.indptr))
+
+    def _reverse(self):
+        """Reverse CSR: (indptr by target, edge ids, their sources), built once"""
+        if self._incoming is None:
+            order = np.argsort(self.targets, kind="stable")
+            indptr = np.zeros(self.node_count + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.targets, minlength=self.node_count), out=indptr[1:])
+            self._incoming = (indptr, order, self.edge_sources()[order])
+        return self._incoming
+
+    def in_edges(self, node: int) -> np.ndarray:
+        """Edge ids entering node"""
+        indptr, order, _ = self._reverse()
+        return order[indptr[node]:indptr[node + 1]]
+
+    @staticmethod
+    def _edge_type_ids(edge_types: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+        if edge_types is None:
+            return None
+        unknown = [t for t in edge_types if t not in EDGE_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown edge types: {', '.join(sorted(unknown))}")
+        return np.array([EDGE_TYPES.index(t) for t in edge_types], dtype=np.int8)
+
+    def _neighbors(self, node: int, allowed: Optional[np.ndarray], directed: bool = False) -> List[Tuple[int, int]]:
+        """(neighbor, edge id) pairs of node: outgoing edges, then incoming ones unless directed"""
+        lo, hi = int(self.indptr[node]), int(self.indptr[node + 1])
+        neighbors = np.asarray(self.targets[lo:hi])
+        edges = np.arange(lo, hi)
+        if allowed is not None:
+            keep = np.isin(self.edge_types[lo:hi], allowed)
+            neighbors, edges = neighbors[keep], edges[keep]
+        pairs = list(zip(neighbors.tolist(), edges.tolist()))
+        if not directed:
+            pairs += self._incoming_pairs(node, allowed)
+        return pairs
+
+    def neighborhood(self, seeds: Iterable[int], depth: int = 1, edge_types: Optional[Iterable[str]] = None,
+                     max_nodes: Optional[int] = None, directed: bool = False) -> List[int]:
+        """
+        Nodes within depth hops of seeds in BFS order (seeds first), following edges in both
+        directions unless directed; stops early once max_nodes nodes are found.
+        """
+        allowed = self._edge_type_ids(edge_types)
+        order = []
+        seen = set()
+        frontier = []
+        for seed in seeds:
+            if 0 <= seed < self.node_count and seed not in seen:
+                seen.add(seed)
+                order.append(seed)
+                frontier.append(seed)
+        for _ in range(depth):
+            next_frontier = []
+            for node in frontier:
+                for neighbor, _edge in self._neighbors(node, allowed, directed):
+                    if neighbor not in seen:
+                        if max_nodes is not None and len(order) >= max_nodes:
+                            return order
+                        seen.add(neighbor)
+                        order.append(neighbor)
+                        next_frontier.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return order[:max_nodes] if max_nodes is not None else order
+
+    def shortest_path(self, source: int, target: int, edge_types: Optional[Iterable[str]] = None,
+                      directed: bool = False, max_depth: Optional[int] = None) -> Optional[List[Tuple[int, Optional[int]]]]:
+        """
+        Fewest-hops path source -> target as [(node, edge id used to reach it)], the source
+        with edge None; None when unreachable within max_depth. Bidirectional BFS, so only
+        the two balls around the endpoints are explored.
+        """
+        if not (0 <= source < self.node_count and 0 <= target < self.node_count):
+            return None
+        if source == target:
+            return [(source, None)]
+        allowed = self._edge_type_ids(edge_types)
+        # parents[node] = (previous node, edge); forward from source, backward from target
+        forward = {source: None}
+        backward = {target: None}
+        forward_frontier, backward_frontier = [source], [target]
+        hops = 0
+        while forward_frontier and backward_frontier:
+            if max_depth is not None and hops >= max_depth:
+                return None
+            hops += 1
+            expand_forward = len(forward_frontier) <= len(backward_frontier)
+            frontier = forward_frontier if expand_forward else backward_frontier
+            parents, others = (forward, backward) if expand_forward else (backward, forward)
+            next_frontier = []
+            meeting = None
+            for node in frontier:
+                if directed and not expand_forward:
+                    pairs = self._incoming_pairs(node, allowed)
+                else:
+                    pairs = self._neighbors(node, allowed, directed)
+                for neighbor, edge in pairs:
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (node, edge)
+                    if neighbor in others:
+                        meeting = neighbor
+                        break
+                    next_frontier.append(neighbor)
+                if meeting is not None:
+                    break
+            if meeting is not None:
+                return self._join_path(meeting, forward, backward)
+            if expand_forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+        return None
+
+    def _incoming_pairs(self, node: int, allowed: Optional[np.ndarray]) -> List[Tuple[int, int]]:
+        """(source, edge id) pairs of the edges entering node"""
+        indptr, order, sources = self._reverse()
+        lo, hi = int(indptr[node]), int(indptr[node + 1])
+        in_edges, in_sources = order[lo:hi], sources[lo:hi]
+        if allowed is not None:
+            keep = np.isin(self.edge_types[in_edges], allowed)
+            in_edges, in_sources = in_edges[keep], in_sources[keep]
+        return list(zip(in_sources.tolist(), in_edges.tolist()))
+
+    @staticmethod
+    def _join_path(meeting: int, forward: Dict, backward: Dict) -> List[Tuple[int, Optional[int]]]:
+        path = []
+        node, edge = meeting, None
+        while forward[node] is not None:
+            previous, edge = forward[node]
+            path.append((node, edge))
+            node = previous
+        path.append((node, None))
+        path.reverse()
+        node = meeting
+        while backward[node] is not None:
+            following, edge = backward[node]
+            path.append((following, edge))
+            node = following
+        return path
+
+    def match_chains(self, pattern: str, offset: int = 0, limit: int = 50,
+                     nodes: Optional[Iterable[int]] = None, max_expansions: int = CHAIN_MAX_EXPANSIONS
+                     ) -> Tuple[List[List[Tuple[int, Optional[int]]]], bool, bool]:
+        """
+        Chains of nodes matching a typed pattern, in (start node, edge) order, paginated.
+        pattern alternates node types and edge types, e.g.
+            "button -> handles_event -> function -> calls_endpoint -> route"
+        A node token may list alternatives ("button|input") or be "*"; an edge token may be "*".
+        Chains never revisit a node. The search stops after following max_expansions edges.
+        Returns ([[(node, edge into node)], ...], has_more, truncated).
+        """
+        steps = parse_chain_pattern(pattern)
+        node_steps = [self._node_type_ids(types) for types in steps[0::2]]
+        edge_steps = [None if edge == "*" else EDGE_TYPES.index(edge) for edge in steps[1::2]]
+        members = None if nodes is None else set(nodes)
+        wanted = offset + limit + 1  # one extra to know whether there is another page
+        chains: List[List[Tuple[int, Optional[int]]]] = []
+
+        if node_steps[0] is None:
+            starts = np.arange(self.node_count)
+        else:
+            starts = np.flatnonzero(np.isin(self.node_types, node_steps[0]))
+        chain: List[Tuple[int, Optional[int]]] = []
+        on_chain: Set[int] = set()
+        expansions = 0
+
+        def extend(node: int, step: int):
+            nonlocal expansions
+            lo, hi = int(self.indptr[node]), int(self.indptr[node + 1])
+            targets = np.asarray(self.targets[lo:hi])
+            keep = np.ones(hi - lo, dtype=bool)
+            if edge_steps[step] is not None:
+                keep &= np.asarray(self.edge_types[lo:hi]) == edge_steps[step]
+            if node_steps[step + 1] is not None:
+                keep &= np.isin(self.node_types[targets], node_steps[step + 1])
+            for edge, target in zip((np.flatnonzero(keep) + lo).tolist(), targets[keep].tolist()):
+                if target in on_chain or (members is not None and target not in members):
+                    continue
+                if expansions >= max_expansions:
+                    return
+                expansions += 1
+                chain.append((target, edge))
+                on_chain.add(target)
+                if step + 1 == len(edge_steps):
+                    chains.append(chain.copy())
+                else:
+                    extend(target, step + 1)
+                on_chain.discard(target)
+                chain.pop()
+                if len(chains) >= wanted or expansions >= max_expansions:
+                    return
+
+        for start in starts.tolist():
+            if members is not None and start not in members:
+                continue
+            chain.append((start, None))
+            on_chain.add(start)
+            if edge_steps:
+                extend(start, 0)
+            else:
+                chains.append(chain.copy())
+            on_chain.discard(start)
+            chain.pop()
+            if len(chains) >= wanted or expansions >= max_expansions:
+                break
+        truncated = expansions >= max_expansions and len(chains) < wanted
+        return chains[offset:offset + limit], len(chains) > offset + limit, truncated
+
+    def _node_type_ids(self, types: Optional[List[str]]) -> Optional[np.ndarray]:
+        if types is None:
+            return None
+        return np.array([self.type_names.index(t) for t in types if t in self.type_names], dtype=np.int16)
+
+    def aggregate(self, groups: np.ndarray, edge_types: Optional[Iterable[str]] = None) -> List[Tuple[int, int, int, int]]:
+        """
+        Collapse nodes into groups (groups[node] = group id, -1 = left out) and count the edges
+        between different groups: [(source group, target group, edge type id, edge count)]
+        """
+        sources = groups[self.edge_sources()]
+        targets = groups[np.asarray(self.targets)]
+        keep = (sources >= 0) & (targets >= 0) & (sources != targets)
+        allowed = self._edge_type_ids(edge_types)
+        if allowed is not None:
+            keep &= np.isin(self.edge_types, allowed)
+        if not keep.any():
+            return []
+        keys = np.stack([sources[keep], targets[keep], np.asarray(self.edge_types)[keep].astype(np.int64)], axis=1)
+        unique, counts = np.unique(keys, axis=0, return_counts=True)
+        return [(int(s), int(t), int(e), int(c)) for (s, t, e), c in zip(unique.tolist(), counts.tolist())]
+
+    def edges_between(self, nodes: Optional[Sequence[int]] = None,
+                      edge_types: Optional[Set[str]] = None) -> List[Tuple[int, int, int]]:
+        """(edge id, source, target) of edges with both ends in nodes (all nodes when None)"""
+        allowed = self._edge_type_ids(edge_types)
+        members = None if nodes is None else set(nodes)
+        sources = range(self.node_count) if nodes is None else sorted(members)
+        found = []
+        for source in sources:
+            lo, hi = int(self.indptr[source]), int(self.indptr[source + 1])
+            keep = np.ones(hi - lo, dtype=bool) if allowed is None else np.isin(self.edge_types[lo:hi], allowed)
+            for edge, target in zip((np.flatnonzero(keep) + lo).tolist(), np.asarray(self.targets[lo:hi])[keep].tolist()):
+                if members is None or target in members:
+                    found.append((edge, source, target))
+        return found
+
+    def flow_chains(self, nodes: Optional[Sequence[int]] = None, limit: int = 10) -> List[List[int]]:
+        """
+        Complete flows HTML element -> JS handler -> API route -> backend handler
+        (handles_event, calls_endpoint, handles_route), restricted to nodes when given.
+        """
+        chains, _, _ = self.match_chains(FLOW_PATTERN, limit=limit, nodes=nodes)
+        return [[node for node, _edge in chain] for chain in chains]
+
+
+def parse_chain_pattern(pattern: str) -> List:
+    """
+    'button|input -> handles_event -> * -> calls_endpoint -> route' ->
+    [['button', 'input'], 'handles_event', None, 'calls_endpoint', ['route']]
+    (node tokens become lists of types, None for '*'; arrows may be '->', '→' or '>')
+    """
+    if len(pattern or "") > CHAIN_PATTERN_MAX_LENGTH:
+        raise ValueError(f"Chain pattern longer than {CHAIN_PATTERN_MAX_LENGTH} characters")
+    tokens = [t.strip() for t in re.split(r"\s*(?:->|→|>)\s*", pattern or "") if t.strip()]
+    if len(tokens) % 2 == 0:
+        raise ValueError("Chain pattern must alternate node and edge types, starting and ending with a node")
+    steps = []
+    for position, token in enumerate(tokens):
+        if position % 2:
+            if token != "*" and token not in EDGE_TYPES:
+                raise ValueError(f"Unknown edge type in chain pattern: {token}")
+            steps.append(token)
+        else:
+            steps.append(None if token == "*" else [t.strip() for t in token.split("|") if t.strip()])
+    return steps
@@ -2,8 +2,13 @@
 Code Graph Builder - Builds actual graph structure (nodes/edges) from search results
 בונה מבנה גרף אמיתי (nodes/edges) מתוצאות חיפוש
 """
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Set, Tuple, Optional
 from collections import defaultdict
+from pathlib import Path
+import posixpath
+import numpy as np
+from app.route_table import RouteTable, route_methods
+from app.code_graph import EDGE_TYPES
 
 
 class CodeGraphBuilder:
@@ -16,6 +21,7 @@ class CodeGraphBuilder:
         self.search_service = search_service
         self.node_map = {}  # id -> node data
         self.edge_map = {}  # (source, target) -> edge data
+        self._graph_lookup_cache = None  # (code graph, node id -> nodes, name -> nodes)
     
     def build_from_search_results(self, search_results: List[Dict]) -> Dict:
         """
@@ -34,6 +40,7 @@ class CodeGraphBuilder:
         nodes = []
         edges = []
         node_ids = set()
+        edge_ids = set()
         
         # Step 1: Create nodes from search results
         for result in search_results:
@@ -45,6 +52,7 @@ class CodeGraphBuilder:
                 self.node_map[node_id] = node
         
         # Step 2: Create edges based on relationships
+        route_table = self._build_route_table(search_results)
         for result in search_results:
             source_id = self._get_node_id(result)
             
@@ -54,7 +62,7 @@ class CodeGraphBuilder:
                 endpoint = api_call.get("endpoint", "")
                 if endpoint:
                     # Find backend route that handles this endpoint
-                    target_id = self._find_route_node(endpoint, nodes)
+                    target_id = self._find_route_node(endpoint, nodes, route_table, api_call.get("method"))
                     if target_id:
                         edge = self._create_edge(
                             source_id, 
@@ -62,7 +70,8 @@ class CodeGraphBuilder:
                             "calls_endpoint",
                             {"endpoint": endpoint, "method": api_call.get("method", "GET")}
                         )
-                        if edge and edge["id"] not in [e["id"] for e in edges]:
+                        if edge and edge["id"] not in edge_ids:
+                            edge_ids.add(edge["id"])
                             edges.append(edge)
             
             # Create edges from event listeners
@@ -79,7 +88,8 @@ class CodeGraphBuilder:
                             "handles_event",
                             {"event": listener.get("event", ""), "handler": handler}
                         )
-                        if edge and edge["id"] not in [e["id"] for e in edges]:
+                        if edge and edge["id"] not in edge_ids:
+                            edge_ids.add(edge["id"])
                             edges.append(edge)
             
             # Create edges from routes (backend -> function)
@@ -88,7 +98,7 @@ class CodeGraphBuilder:
                 path = route.get("path", "")
                 if path:
                     # Find function that handles this route
-                    target_id = self._find_route_handler(path, nodes)
+                    target_id = self._find_route_handler(path, nodes, route_table, source_id)
                     if target_id:
                         edge = self._create_edge(
                             source_id,
@@ -96,7 +106,8 @@ class CodeGraphBuilder:
                             "handles_route",
                             {"path": path, "method": route.get("method", "GET")}
                         )
-                        if edge and edge["id"] not in [e["id"] for e in edges]:
+                        if edge and edge["id"] not in edge_ids:
+                            edge_ids.add(edge["id"])
                             edges.append(edge)
             
             # Create edges from function calls (relations)
@@ -112,7 +123,8 @@ class CodeGraphBuilder:
                             "calls_function",
                             {"function": relation}
                         )
-                        if edge and edge["id"] not in [e["id"] for e in edges]:
+                        if edge and edge["id"] not in edge_ids:
+                            edge_ids.add(edge["id"])
                             edges.append(edge)
         
         # Step 3: Identify flow chains
@@ -129,6 +141,215 @@ class CodeGraphBuilder:
             }
         }
     
+    def iter_code_graph(self, graph, items, node_indices: Optional[List[int]] = None,
+                        edge_types: Optional[Set[str]] = None, chunk_size: int = 500):
+        """
+        Nodes and then edges of the precomputed whole-repository graph (app/code_graph.py), or of
+        the subgraph induced by node_indices, as ("nodes", [...]) / ("edges", [...]) chunks.
+        Items are read one chunk at a time, so the full graph never sits in memory as dicts.
+        """
+        if node_indices is None:
+            node_indices = range(graph.node_count)
+        node_ids = {}  # graph node -> string node id
+        seen = set()
+        chunk = []
+        for index in node_indices:
+            item = items[index]
+            node_id = node_ids[index] = self._get_node_id(item)
+            if node_id not in seen:  # items with the same file, name and line share a node
+                seen.add(node_id)
+                chunk.append(self._create_node(item, node_id))
+                if len(chunk) >= chunk_size:
+                    yield "nodes", chunk
+                    chunk = []
+        if chunk:
+            yield "nodes", chunk
+        
+        chunk = []
+        edge_ids = set()
+        members = None if isinstance(node_indices, range) else list(node_ids)
+        for edge, source, target in graph.edges_between(members, edge_types):
+            edge_dict = self._create_edge(node_ids[source], node_ids[target], graph.edge_type(edge),
+                                          graph.edge_metadata(edge))
+            if edge_dict["id"] not in edge_ids:
+                edge_ids.add(edge_dict["id"])
+                chunk.append(edge_dict)
+                if len(chunk) >= chunk_size:
+                    yield "edges", chunk
+                    chunk = []
+        if chunk:
+            yield "edges", chunk
+        
+        flow_chains = [[node_ids[index] for index in chain] for chain in graph.flow_chains(members)]
+        yield "flow_chains", flow_chains
+    
+    def build_from_code_graph(self, graph, items, node_indices: Optional[List[int]] = None,
+                              edge_types: Optional[Set[str]] = None) -> Dict:
+        """
+        Serve the precomputed whole-repository graph, or the subgraph induced by node_indices,
+        in the same format as build_from_search_results.
+        """
+        graph_data = {"nodes": [], "edges": [], "flow_chains": []}
+        for kind, chunk in self.iter_code_graph(graph, items, node_indices, edge_types):
+            graph_data[kind].extend(chunk)
+        graph_data["stats"] = {
+            "total_nodes": len(graph_data["nodes"]),
+            "total_edges": len(graph_data["edges"]),
+            "flow_chains_count": len(graph_data["flow_chains"]),
+            "graph_nodes": graph.node_count,
+            "graph_edges": graph.edge_count
+        }
+        return graph_data
+    
+    def build_aggregate_graph(self, graph, level: str = "file", path_filter: str = "",
+                              edge_types: Optional[Set[str]] = None, directory: str = "",
+                              max_files: Optional[int] = None) -> Dict:
+        """
+        Level-of-detail view of the code graph: one node per file (level="file") or per
+        directory (level="directory"), edges weighted by the number of symbol edges they stand for.
+        path_filter keeps only files whose (relative) path contains it (free text);
+        directory keeps only the files under that directory (path prefix).
+        The directory level is one level deep: the subdirectories right under `directory`
+        (the top-level ones by default) roll up everything below them, and files sitting
+        directly in `directory` appear as file nodes.
+        Each node carries an "expand" query for the next level down: a directory expands to
+        its files, or to its subdirectories when it holds more than max_files files.
+        """
+        paths = [self._normalize_file_path(f) for f in graph.file_names]
+        prefix = self._directory_prefix(directory)
+        group_ids = {}
+        group_files = defaultdict(int)
+        file_groups = np.full(len(paths), -1, dtype=np.int64)
+        for file_id, path in enumerate(paths):
+            if not path.startswith(prefix) or (path_filter and path_filter not in path):
+                continue
+            key = ("file", path)
+            if level != "file":
+                head, sep, _ = path[len(prefix):].partition("/")
+                if sep:
+                    key = ("dir", prefix + head)
+            group = group_ids.setdefault(key, len(group_ids))
+            group_files[group] += 1
+            file_groups[file_id] = group
+        groups = file_groups[np.asarray(graph.node_files)] if graph.node_count else np.zeros(0, dtype=np.int64)
+        sizes = np.bincount(groups[groups >= 0], minlength=len(group_ids))
+        
+        nodes = []
+        node_ids = []
+        for (kind, key), group in sorted(group_ids.items(), key=lambda kv: kv[1]):
+            if kind == "file":
+                node_id = f"file::{key}"
+                node = {
+                    "id": node_id,
+                    "label": key.split("/")[-1] or key,
+                    "name": key,
+                    "file_path": key,
+                    "file": key,
+                    "type": "file",
+                    "context": self._detect_context(key, "", "file"),
+                    "expand": {"level": "symbol", "file": key}
+                }
+            else:
+                node_id = f"dir::{key}"
+                expand_level = "directory" if max_files is not None and group_files[group] > max_files else "file"
+                node = {
+                    "id": node_id,
+                    "label": key.split("/")[-1] or key,
+                    "name": key,
+                    "directory": key,
+                    "type": "directory",
+                    "context": self._detect_context(key, "", "directory"),
+                    "file_count": group_files[group],
+                    "expand": {"level": expand_level, "dir": key}
+                }
+            node["symbol_count"] = int(sizes[group])
+            nodes.append(node)
+            node_ids.append(node_id)
+        
+        edges = []
+        for source, target, edge_type, count in graph.aggregate(groups, edge_types):
+            edge = self._create_edge(node_ids[source], node_ids[target], EDGE_TYPES[edge_type], {"weight": count})
+            edges.append(edge)
+        
+        return {
+            "level": level,
+            "nodes": nodes,
+            "edges": edges,
+            "flow_chains": [],
+            "stats": {
+                "total_nodes": len(nodes),
+                "total_edges": len(edges),
+                "flow_chains_count": 0,
+                "graph_nodes": graph.node_count,
+                "graph_edges": graph.edge_count
+            }
+        }
+    
+    def count_files(self, graph, directory: str = "") -> int:
+        """Number of files of the code graph under directory (all of them by default)"""
+        prefix = self._directory_prefix(directory)
+        return sum(1 for f in graph.file_names if self._normalize_file_path(f).startswith(prefix))
+    
+    @staticmethod
+    def _directory_prefix(directory: str) -> str:
+        """Path prefix of the files under a directory ("a/b" -> "a/b/"; the root -> empty)"""
+        directory = directory.strip().strip("/")
+        return "" if directory in ("", ".") else directory + "/"
+    
+    def _graph_lookup(self, graph, items) -> Tuple[Dict[str, List[int]], Dict[str, List[int]]]:
+        """(node id -> graph nodes, name -> graph nodes), built once per code graph"""
+        if self._graph_lookup_cache is None or self._graph_lookup_cache[0] is not graph:
+            by_id = defaultdict(list)
+            by_name = defaultdict(list)
+            for index in range(len(items)):
+                item = items[index]
+                by_id[self._get_node_id(item)].append(index)
+                name = item.get("name") or item.get("full_name", "")
+                if name:
+                    by_name[name].append(index)
+            self._graph_lookup_cache = (graph, dict(by_id), dict(by_name))
+        return self._graph_lookup_cache[1], self._graph_lookup_cache[2]
+    
+    def find_graph_nodes(self, graph, items, node_ref: str = "", file_filter: str = "") -> List[int]:
+        """
+        Graph node indices for a node reference (node id, else symbol name, else node index)
+        and/or for the symbols of the file at path file_filter (the "file" of a file node)
+        """
+        found = []
+        if node_ref:
+            by_id, by_name = self._graph_lookup(graph, items)
+            if node_ref in by_id:
+                found.extend(by_id[node_ref])
+            elif node_ref in by_name:
+                found.extend(by_name[node_ref])
+            elif node_ref.isdigit() and int(node_ref) < graph.node_count:
+                found.append(int(node_ref))
+        if file_filter:
+            path = self._normalize_file_path(file_filter)
+            file_ids = [file_id for file_id, name in enumerate(graph.file_names)
+                        if self._normalize_file_path(name) == path]
+            if file_ids and graph.node_count:
+                found.extend(int(node) for node in np.flatnonzero(np.isin(graph.node_files, file_ids)))
+        return found
+    
+    def describe_graph_steps(self, graph, items, steps: List[Tuple[int, Optional[int]]]) -> Dict:
+        """Nodes and edges of a path or chain from CodeGraph ([(node, edge into node)])"""
+        node_ids = [self._get_node_id(items[node]) for node, _ in steps]
+        edges = []
+        for position, (node, edge) in enumerate(steps):
+            if edge is None:
+                continue
+            previous = steps[position - 1][0]
+            # Undirected searches may walk an edge backwards
+            forward = int(graph.targets[edge]) == node and edge in graph.out_edges(previous)
+            source, target = (node_ids[position - 1], node_ids[position]) if forward else \
+                (node_ids[position], node_ids[position - 1])
+            edges.append(self._create_edge(source, target, graph.edge_type(edge), graph.edge_metadata(edge)))
+        return {
+            "nodes": [self._create_node(items[node], node_id) for (node, _), node_id in zip(steps, node_ids)],
+            "edges": edges
+        }
+    
     def _get_node_id(self, result: Dict) -> str:
         """Generate unique node ID from result"""
         file_path = result.get("file_path", "")
@@ -230,24 +451,31 @@ class CodeGraphBuilder:
         
         return edge
     
-    def _find_route_node(self, endpoint: str, nodes: List[Dict]) -> str:
-        """Find node that represents a route handling this endpoint"""
-        # Normalize endpoint
-        normalized = self._normalize_endpoint(endpoint)
-        
+    def _build_route_table(self, results: List[Dict]) -> RouteTable:
+        """Route table of the result nodes: every route path a node serves -> node id"""
+        table = RouteTable()
+        for result in results:
+            node_id = self._get_node_id(result)
+            for route in result.get("routes", []):
+                if route.get("path"):
+                    table.add(route["path"], node_id, route_methods(route))
+        return table
+    
+    def _route_table_from_nodes(self, nodes: List[Dict]) -> RouteTable:
+        """Route table from route nodes alone (their name is the path)"""
+        table = RouteTable()
         for node in nodes:
-            # Check if node has routes
-            if node.get("type") == "route":
-                node_path = node.get("file_path", "")
-                if normalized in node_path.lower() or endpoint in node_path:
-                    return node["id"]
-            
-            # Check node name/label
-            node_name = (node.get("name") or node.get("label", "")).lower()
-            if normalized in node_name or endpoint.lower() in node_name:
-                return node["id"]
-        
-        return None
+            if node.get("type") == "route" and node.get("name"):
+                table.add(node["name"], node["id"])
+        return table
+    
+    def _find_route_node(self, endpoint: str, nodes: List[Dict], route_table: Optional[RouteTable] = None,
+                         method: Optional[str] = None) -> str:
+        """Find node that represents a route handling this endpoint"""
+        if route_table is None:
+            route_table = self._route_table_from_nodes(nodes)
+        matches = route_table.resolve(endpoint, method)
+        return matches[0] if matches else None
     
     def _find_handler_node(self, handler_name: str, nodes: List[Dict]) -> str:
         """Find JS function node that handles an event"""
@@ -262,18 +490,15 @@ class CodeGraphBuilder:
         
         return None
     
-    def _find_route_handler(self, path: str, nodes: List[Dict]) -> str:
+    def _find_route_handler(self, path: str, nodes: List[Dict], route_table: Optional[RouteTable] = None,
+                            source_id: str = None) -> str:
         """Find function that handles a route"""
-        path_lower = path.lower()
-        
-        for node in nodes:
-            # Check if node is a Python function in routes file
-            if node.get("context") == "backend" and node.get("type") == "function":
-                node_file = node.get("file_path", "").lower()
-                if "route" in node_file or "api" in node_file:
-                    node_name = (node.get("name") or "").lower()
-                    if path_lower in node_name or node_name in path_lower:
-                        return node["id"]
+        if route_table is None:
+            return None
+        node_types = {node["id"]: node.get("type") for node in nodes}
+        for node_id in route_table.resolve(path):
+            if node_id != source_id and node_types.get(node_id) == "function":
+                return node_id
         
         return None
     
@@ -300,46 +525,37 @@ class CodeGraphBuilder:
             normalized = normalized[4:]
         return normalized
     
-    def _identify_flow_chains(self, nodes: List[Dict], edges: List[Dict]) -> List[List[str]]:
+    def _identify_flow_chains(self, nodes: List[Dict], edges: List[Dict], limit: int = 10) -> List[List[str]]:
         """
         Identify complete flow chains: HTML → JS → API → Backend
         """
         chains = []
         
+        # Index edges once by (source, type) instead of rescanning the edge list per step
+        targets_by_source = defaultdict(list)
+        for e in edges:
+            targets_by_source[(e.get("source"), e.get("type"))].append(e["target"])
+        
         # Find HTML elements (buttons, forms)
         html_nodes = [n for n in nodes if n.get("type") in ["button", "element", "form", "input"]]
         
         for html_node in html_nodes:
-            chain = [html_node["id"]]
-            
-            # Find JS handlers (handles_event edges)
-            event_edges = [e for e in edges if e.get("source") == html_node["id"] and e.get("type") == "handles_event"]
-            for event_edge in event_edges:
-                js_node_id = event_edge["target"]
-                if js_node_id not in chain:
-                    chain.append(js_node_id)
-                
-                # Find API calls from JS (calls_endpoint edges)
-                api_edges = [e for e in edges if e.get("source") == js_node_id and e.get("type") == "calls_endpoint"]
-                for api_edge in api_edges:
-                    api_node_id = api_edge["target"]
-                    if api_node_id not in chain:
-                        chain.append(api_node_id)
-                    
-                    # Find backend handlers (handles_route edges)
-                    backend_edges = [e for e in edges if e.get("source") == api_node_id and e.get("type") == "handles_route"]
-                    for backend_edge in backend_edges:
-                        backend_node_id = backend_edge["target"]
-                        if backend_node_id not in chain:
-                            chain.append(backend_node_id)
-                            chains.append(chain.copy())
-                            chain.pop()  # Backtrack
-                    if api_node_id in chain:
-                        chain.pop()  # Backtrack
-                if js_node_id in chain:
-                    chain.pop()  # Backtrack
-        
-        return chains[:10]  # Limit to top 10 chains
+            html_id = html_node["id"]
+            # JS handlers (handles_event) -> API routes (calls_endpoint) -> backend handlers (handles_route)
+            for js_node_id in targets_by_source.get((html_id, "handles_event"), []):
+                if js_node_id == html_id:
+                    continue
+                for api_node_id in targets_by_source.get((js_node_id, "calls_endpoint"), []):
+                    if api_node_id in (html_id, js_node_id):
+                        continue
+                    for backend_node_id in targets_by_source.get((api_node_id, "handles_route"), []):
+                        if backend_node_id in (html_id, js_node_id, api_node_id):
+                            continue
+                        chains.append([html_id, js_node_id, api_node_id, backend_node_id])
+                        if len(chains) >= limit:
+                            return chains
+        
+        return chains
     
     def build_from_contextual_results(self, contextual_results: List[Dict]) -> Dict:
         """
@@ -349,6 +565,7 @@ class CodeGraphBuilder:
         nodes = []
         edges = []
         node_ids = set()
+        edge_ids = set()
         
         for ctx_result in contextual_results:
             base = ctx_result.get("base", {})
@@ -382,7 +599,8 @@ class CodeGraphBuilder:
                         "direction": rel.get("direction", "")
                     }
                 )
-                if edge["id"] not in [e["id"] for e in edges]:
+                if edge["id"] not in edge_ids:
+                    edge_ids.add(edge["id"])
                     edges.append(edge)
         
         # Identify flow chains
@@ -100,11 +100,20 @@ class CodeParser:
                                 # Extract route path from decorator
                                 if isinstance(decorator.args[0], (ast.Str, ast.Constant)):
                                     route_path = decorator.args[0].s if hasattr(decorator.args[0], 's') else str(decorator.args[0].value)
-                                    decorators.append({
+                                    route_info = {
                                         "type": "route",
                                         "path": route_path,
                                         "method": decorator_name.upper() if decorator_name in ['get', 'post', 'put', 'delete'] else "GET"
-                                    })
+                                    }
+                                    # Flask: @bp.route(path, methods=["GET", "POST"])
+                                    for keyword in decorator.keywords:
+                                        if keyword.arg == "methods" and isinstance(keyword.value, (ast.List, ast.Tuple)):
+                                            methods = [elt.value.upper() for elt in keyword.value.elts
+                                                       if isinstance(elt, ast.Constant) and isinstance(elt.value, str)]
+                                            if methods:
+                                                route_info["method"] = methods[0]
+                                                route_info["methods"] = methods
+                                    decorators.append(route_info)
                 
                 # Extract API calls (requests, httpx, etc.)
                 api_calls = self._extract_python_api_calls(node, code)
@@ -0,0 +1,48 @@
+"""
+Durable IO - fsync and atomic-rename helpers for index files
+A file is written aside, flushed to disk, then renamed over its destination, and the rename
+itself is flushed by syncing the parent directory; after a crash the destination holds either
+the old or the new file, never a torn one.
+"""
+import os
+from pathlib import Path
+
+
+def fsync_file(path) -> None:
+    """Flush a file's data to disk"""
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def fsync_directory(directory) -> None:
+    """Flush a directory's entries (renames, new files); not supported on Windows, where it is a no-op"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(str(directory), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_tree(directory) -> None:
+    """Flush every file directly in directory, then the directory itself"""
+    for path in Path(directory).iterdir():
+        if path.is_file():
+            fsync_file(path)
+    fsync_directory(directory)
+
+
+def replace_file(tmp_path, path) -> None:
+    """Durably move a fully written tmp_path over path"""
+    fsync_file(tmp_path)
+    os.replace(tmp_path, path)
+    fsync_directory(Path(path).parent)
+
+
+def write_atomic(path, data: bytes) -> None:
+    """Write data to path through a flushed temp file and an atomic rename"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    replace_file(tmp_path, path)
@@ -0,0 +1,144 @@
+"""
+Embedding Cache - Persistent SQLite store of embeddings keyed by (model id, text hash)
+Re-scans only encode texts the cache has not seen for the current model.
+Every lookup hit and insert stamps the entry's last use, and prune() (run after each scan)
+drops entries unused for max_age_days, then the least recently used beyond max_entries,
+so vectors of deleted or rewritten code do not pile up forever.
+"""
+import hashlib
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_LOOKUP_BATCH = 500  # stay under SQLite's bound-parameter limit
+DEFAULT_MAX_AGE_DAYS = 30.0
+DEFAULT_MAX_ENTRIES = 500_000
+_DAY_SECONDS = 86400
+
+
+class EmbeddingCache:
+    """
+    Maps sha1(text) to its float32 embedding, per model.
+    A connection is opened per call, so one instance is safe to share between request threads.
+    """
+
+    def __init__(self, db_path: str, max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = str(db_path)
+        self.max_age_days = max_age_days  # 0 = never expire by age
+        self.max_entries = max_entries    # 0 = no entry limit
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " last_used INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (model, text_hash))"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(embeddings)")]
+            if "last_used" not in columns:
+                # Cache from before pruning: its entries count as used now
+                conn.execute("ALTER TABLE embeddings ADD COLUMN last_used INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE embeddings SET last_used = ?", (int(time.time()),))
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+    def get_many(self, model_id: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Cached vectors for the given hashes (missing hashes are simply absent); hits are marked used"""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        now = int(time.time())
+        with closing(self._connect()) as conn, conn:
+            for i in range(0, len(unique), _LOOKUP_BATCH):
+                batch = unique[i:i + _LOOKUP_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, dim, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model_id, *batch]
+                )
+                for text_hash, dim, vector in rows:
+                    found[text_hash] = np.frombuffer(vector, dtype=np.float32, count=dim)
+                conn.execute(
+                    f"UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash IN ({placeholders})"
+                    " AND last_used < ?",
+                    [now, model_id, *batch, now]
+                )
+        return found
+
+    def put_many(self, model_id: str, entries: Dict[str, np.ndarray]):
+        """Store vectors by text hash, replacing any existing entry"""
+        with closing(self._connect()) as conn, conn:
+            now = int(time.time())
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (model_id, text_hash, int(vector.shape[0]),
+                     np.ascontiguousarray(vector, dtype=np.float32).tobytes(), now)
+                    for text_hash, vector in entries.items()
+                ]
+            )
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Drop entries unused for max_age_days, then the least recently used beyond max_entries.
+        Returns the number of entries removed.
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        with closing(self._connect()) as conn, conn:
+            if self.max_age_days and self.max_age_days > 0:
+                cutoff = int(now - self.max_age_days * _DAY_SECONDS)
+                removed += conn.execute("DELETE FROM embeddings WHERE last_used < ?", (cutoff,)).rowcount
+            if self.max_entries and self.max_entries > 0:
+                removed += conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN"
+                    " (SELECT rowid FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                ).rowcount
+        return removed
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def encode(self, model, model_id: str, texts: List[str], **encode_kwargs) -> Tuple[np.ndarray, Dict]:
+        """
+        Embeddings for texts (float32, one row per text, same order), encoding only cache misses.
+        Returns (embeddings, stats) where stats has hits, misses and hit_rate.
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        cached = self.get_many(model_id, hashes)
+
+        # Encode each distinct missing text once
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+        if missing:
+            encoded = model.encode(list(missing.values()), convert_to_numpy=True, **encode_kwargs)
+            fresh = dict(zip(missing.keys(), np.asarray(encoded, dtype=np.float32)))
+            self.put_many(model_id, fresh)
+            cached.update(fresh)
+
+        hits = sum(1 for text_hash in hashes if text_hash not in missing)
+        stats = {
+            "hits": hits,
+            "misses": len(texts) - hits,
+            "hit_rate": round(hits / len(texts), 4) if texts else 0.0
+        }
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32), stats
+        return np.stack([cached[text_hash] for text_hash in hashes]), stats
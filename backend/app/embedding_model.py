@@ -0,0 +1,106 @@
+"""
+Embedding Model - Process-wide registry of SentenceTransformer instances
+Each model is loaded once, on first use, and the same instance is handed to
+SemanticSearchService and the hybrid pipeline, so the weights live in memory once
+and queries are encoded by the same model as the index.
+"""
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from app.query_embedding_cache import QueryEmbeddingCache
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+# Local copy in sentence-transformers format: backend/models/all-MiniLM-L6-v2
+LOCAL_MODELS_DIR = Path(__file__).resolve().parent.parent / "models"
+
+_models = {}
+_load_locks = {}
+_registry_lock = threading.Lock()
+
+# Every query encode goes through this cache (see encode_query)
+query_cache = QueryEmbeddingCache()
+
+
+def _resolve_source(model_name: str, model_path: Optional[Path]) -> str:
+    """Explicit model_path, else the local copy of model_name, else the HuggingFace name"""
+    if model_path and Path(model_path).exists():
+        return str(model_path)
+    local_model_path = LOCAL_MODELS_DIR / model_name
+    if (local_model_path / "modules.json").exists():
+        return str(local_model_path)
+    return model_name
+
+
+def get_embedding_model(model_name: str = DEFAULT_MODEL_NAME, model_path: Optional[Path] = None):
+    """
+    Return the shared SentenceTransformer for model_name, loading it on first call.
+    Concurrent first calls wait for a single load; other models load independently.
+    """
+    source = _resolve_source(model_name, model_path)
+    model = _models.get(source)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        load_lock = _load_locks.setdefault(source, threading.Lock())
+    with load_lock:
+        model = _models.get(source)
+        if model is None:
+            # Imported here so importing the services does not pull in torch
+            from sentence_transformers import SentenceTransformer
+
+            if source == model_name:
+                print(f"Local model not found, downloading {model_name} from HuggingFace...")
+            else:
+                print(f"Loading local model from: {source}")
+            model = _models[source] = SentenceTransformer(source)
+        return model
+
+
+def encode_query(query: str, model_name: str = DEFAULT_MODEL_NAME, model_path: Optional[Path] = None) -> np.ndarray:
+    """Raw float32 query vector from the shared model, memoized in query_cache (read-only array)"""
+    source = _resolve_source(model_name, model_path)
+    return query_cache.get_or_encode(
+        source, query,
+        lambda text: get_embedding_model(model_name, model_path).encode([text], convert_to_numpy=True)[0]
+    )
+
+
+def encode_queries(queries: List[str], model_name: str = DEFAULT_MODEL_NAME,
+                   model_path: Optional[Path] = None) -> np.ndarray:
+    """
+    (len(queries), dim) float32 matrix of raw query vectors; queries missing from
+    query_cache are encoded in a single batched model.encode call.
+    """
+    if not queries:
+        return np.empty((0, 0), dtype=np.float32)
+    source = _resolve_source(model_name, model_path)
+    vectors = query_cache.get_or_encode_many(
+        source, queries,
+        lambda texts: get_embedding_model(model_name, model_path).encode(texts, convert_to_numpy=True)
+    )
+    return np.array(vectors, dtype=np.float32).reshape(len(queries), -1)
+
+
+def is_loaded(model_name: str = DEFAULT_MODEL_NAME, model_path: Optional[Path] = None) -> bool:
+    return _resolve_source(model_name, model_path) in _models
+
+
+def warm_up(model_name: str = DEFAULT_MODEL_NAME, background: bool = True):
+    """Load a model ahead of the first encode; in a daemon thread unless background=False"""
+    def load():
+        try:
+            get_embedding_model(model_name)
+            print(f"✅ Embedding model {model_name} warmed up")
+        except Exception as e:
+            print(f"⚠️ Could not warm up embedding model {model_name}: {e}")
+
+    if not background:
+        load()
+        return None
+    thread = threading.Thread(target=load, name=f"warm-up-{model_name}", daemon=True)
+    thread.start()
+    return thread
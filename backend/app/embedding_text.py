@@ -0,0 +1,42 @@
+"""
+Embedding Text - The one text format embedded for a parsed code component
+Shared by scan_semantic, build_vector_index and the hybrid pipeline so all indexes
+embed (and cache) the same text for the same component.
+"""
+from typing import Dict
+
+CODE_PREVIEW_CHARS = 500
+
+
+def build_embedding_text(item: Dict) -> str:
+    """type + name + description + API/event/route context + start of the code"""
+    text = f"{item.get('type', 'code')}: {item.get('name', '')}\n"
+    if item.get('docstring'):
+        text += f"Description: {item['docstring']}\n"
+    elif item.get('context'):
+        text += f"{item['context']}\n"
+
+    # Add context: API calls
+    api_calls = item.get('api_calls', [])
+    if api_calls:
+        api_info = ", ".join([f"{ac.get('method', 'GET')} {ac.get('endpoint', '')}"
+                             for ac in api_calls[:3]])
+        text += f"API calls: {api_info}\n"
+
+    # Add context: Event listeners
+    event_listeners = item.get('event_listeners', [])
+    if event_listeners:
+        event_info = ", ".join([f"{el.get('event', '')} -> {el.get('handler', '')}"
+                               for el in event_listeners[:3]])
+        text += f"Events: {event_info}\n"
+
+    # Add context: Routes
+    routes = item.get('routes', [])
+    if routes:
+        route_info = ", ".join([f"{r.get('method', 'GET')} {r.get('path', '')}"
+                               for r in routes[:3]])
+        text += f"Routes: {route_info}\n"
+
+    # Add code
+    text += f"\nCode:\n{item.get('code', '')[:CODE_PREVIEW_CHARS]}"
+    return text
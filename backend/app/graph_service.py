@@ -3,6 +3,8 @@ Graph Service - Contextual relationships and graph processing
 Enhanced with relationship finding and contextual search
 """
 from typing import List, Dict, Optional
+from collections import defaultdict
+from app.relationship_index import RelationshipIndex, normalize_endpoint, detect_context
 
 
 class GraphService:
@@ -10,53 +12,26 @@ class GraphService:
     
     def __init__(self, search_service):
         self.search_service = search_service
+        self._own_index = None  # for search services without a relationship_index
     
     def _normalize_endpoint(self, endpoint: str) -> str:
-        """
-        Normalize endpoint for matching (remove /api/, leading/trailing slashes).
-        Example: '/api/search' -> 'search', '/api/users/123' -> 'users/123'
-        """
-        if not endpoint:
-            return ""
-        
-        # Remove leading/trailing slashes
-        normalized = endpoint.strip('/')
-        
-        # Remove /api/ prefix if present
-        if normalized.startswith('api/'):
-            normalized = normalized[4:]
-        elif normalized.startswith('/api/'):
-            normalized = normalized[5:]
-        
-        return normalized.lower()
+        """Normalize endpoint for matching, e.g. '/api/users/123' -> 'users/123'"""
+        return normalize_endpoint(endpoint)
     
     def _detect_context(self, item: Dict) -> str:
-        """
-        Detect context (frontend/backend) based on file path and language.
-        """
-        file_path = item.get("file_path", "").lower()
-        language = item.get("language", "").lower()
-        
-        # Frontend indicators
-        if any(indicator in file_path for indicator in ['frontend', 'client', 'src', 'public', 'static']):
-            return "frontend"
-        if language in ["javascript", "typescript", "html", "css"]:
-            return "frontend"
-        
-        # Backend indicators
-        if any(indicator in file_path for indicator in ['backend', 'server', 'api', 'routes', 'app']):
-            return "backend"
-        if language == "python":
-            return "backend"
-        
-        # Default based on type
-        item_type = item.get("type", "").lower()
-        if item_type in ["route", "api_call"]:
-            if "api" in file_path or "route" in file_path:
-                return "backend"
-            return "frontend"
-        
-        return "unknown"
+        """Detect context (frontend/backend) based on file path and language."""
+        return detect_context(item)
+    
+    def _relationship_index(self) -> Optional[RelationshipIndex]:
+        """The search service's index when it keeps one, else one built here for the current items"""
+        if hasattr(self.search_service, 'relationship_index'):
+            return self.search_service.relationship_index
+        items = getattr(self.search_service, 'semantic_index_data', None)
+        if not items:
+            return None
+        if self._own_index is None or self._own_index.items is not items:
+            self._own_index = RelationshipIndex(items)
+        return self._own_index
     
     def get_graph_data(self):
         """Get graph data from search service"""
@@ -71,161 +46,17 @@ class GraphService:
         - Event handler connections (HTML ↔ JS)
         - Import relationships
         """
-        related = []
-        base_name = base_item.get("name", "")
-        base_type = base_item.get("type", "")
-        base_file = base_item.get("file_path", "")
-        base_language = base_item.get("language", "")
-        
-        # Get all indexed items
-        all_items = []
-        if hasattr(self.search_service, 'semantic_index_data'):
-            all_items = self.search_service.semantic_index_data
-        elif hasattr(self.search_service, 'engine') and self.search_service.engine:
-            # Fallback to BM25 engine data if available
-            pass
+        index = self._relationship_index()
+        if index is None:
+            return []
         
-        for item in all_items:
-            # Skip self
-            if item.get("file_path") == base_file and item.get("name") == base_name:
-                continue
-            
-            item_language = item.get("language", "")
-            
-            # 1. Function call relationships (bidirectional)
-            # Check if base function is called by this item
-            relations = item.get("relations", [])
-            if base_name in relations or any(base_name in rel for rel in relations):
-                related.append({
-                    **item,
-                    "relation_type": "calls_function",
-                    "relation_strength": "strong",
-                    "direction": "outgoing"
-                })
-            
-            # Check if base function calls this item
-            base_relations = base_item.get("relations", [])
-            if item.get("name", "") in base_relations or any(item.get("name", "") in rel for rel in base_relations):
-                related.append({
-                    **item,
-                    "relation_type": "called_by_function",
-                    "relation_strength": "strong",
-                    "direction": "incoming"
-                })
-            
-            # 2. API endpoint matches (frontend ↔ backend) - CRITICAL for linking
-            # If base is a frontend API call, find backend route
-            base_context = self._detect_context(base_item)
-            item_context = self._detect_context(item)
-            
-            if base_type == "api_call" and base_context == "frontend":
-                base_endpoint = ""
-                base_endpoint_normalized = ""
-                
-                # Get endpoint from api_calls array
-                for api_call in base_item.get("api_calls", []):
-                    endpoint = api_call.get("endpoint", "")
-                    if endpoint:
-                        base_endpoint = endpoint
-                        # Use normalized endpoint if available, otherwise normalize
-                        base_endpoint_normalized = api_call.get("endpoint_normalized", self._normalize_endpoint(endpoint))
-                        break
-                
-                if base_endpoint and base_endpoint_normalized:
-                    # Check if item is a route handler (backend)
-                    if item_context == "backend":
-                        routes = item.get("routes", [])
-                        for route in routes:
-                            route_path = route.get("path", "")
-                            route_normalized = self._normalize_endpoint(route_path)
-                            
-                            # Match normalized endpoints
-                            if base_endpoint_normalized == route_normalized or \
-                               base_endpoint_normalized in route_normalized or \
-                               route_normalized in base_endpoint_normalized:
-                                related.append({
-                                    **item,
-                                    "relation_type": "handles_endpoint",
-                                    "relation_strength": "strong",
-                                    "direction": "backend",
-                                    "endpoint_match": base_endpoint,
-                                    "context": item_context
-                                })
-                                break
-                        
-                        # Also check if item name matches endpoint
-                        item_name_normalized = self._normalize_endpoint(item.get("name", ""))
-                        if base_endpoint_normalized == item_name_normalized or \
-                           base_endpoint_normalized in item_name_normalized:
-                            related.append({
-                                **item,
-                                "relation_type": "endpoint_handler",
-                                "relation_strength": "medium",
-                                "direction": "backend",
-                                "context": item_context
-                            })
-            
-            # If base is a backend route, find frontend calls
-            if base_type == "route" and base_context == "backend":
-                route_path = base_item.get("name", "")
-                normalized_route = self._normalize_endpoint(route_path)
-                
-                # Check if item calls this route (frontend)
-                if item_context == "frontend":
-                    api_calls = item.get("api_calls", [])
-                    for api_call in api_calls:
-                        endpoint = api_call.get("endpoint", "")
-                        endpoint_normalized = api_call.get("endpoint_normalized", self._normalize_endpoint(endpoint))
-                        
-                        # Match normalized endpoints
-                        if normalized_route == endpoint_normalized or \
-                           normalized_route in endpoint_normalized or \
-                           endpoint_normalized in normalized_route:
-                            related.append({
-                                **item,
-                                "relation_type": "calls_route",
-                                "relation_strength": "strong",
-                                "direction": "frontend",
-                                "endpoint_match": endpoint,
-                                "context": item_context
-                            })
-                            break
-            
-            # 3. Event handler connections (HTML ↔ JS)
-            if base_type in ["button", "element", "input"] and base_language == "html":
-                elem_id = base_item.get("attributes", {}).get("id", "")
-                elem_class = " ".join(base_item.get("attributes", {}).get("class", []))
-                
-                # Check if item has event listener for this element
-                event_listeners = item.get("event_listeners", [])
-                for listener in event_listeners:
-                    handler = listener.get("handler", "").lower()
-                    if elem_id and elem_id.lower() in handler:
-                        related.append({
-                            **item,
-                            "relation_type": "handles_event",
-                            "relation_strength": "strong",
-                            "direction": "js_handler"
-                        })
-                        break
-                    if elem_class and any(cls.lower() in handler for cls in elem_class.split()):
-                        related.append({
-                            **item,
-                            "relation_type": "handles_event",
-                            "relation_strength": "medium",
-                            "direction": "js_handler"
-                        })
-                        break
-            
-            # 4. Import relationships
-            imports = item.get("imports", [])
-            if base_name in imports or any(base_name in imp for imp in imports):
-                related.append({
-                    **item,
-                    "relation_type": "imports",
-                    "relation_strength": "weak",
-                    "direction": "depends_on"
-                })
+        # Lookups in the precomputed index; only matching items are fetched (once each)
+        fetched = {}
+        related = []
+        for item_id, relation in index.find(base_item):
+            if item_id not in fetched:
+                fetched[item_id] = index.items[item_id]
+            related.append({**fetched[item_id], **relation})
         
         # Remove duplicates based on file_path + name
         seen = set()
@@ -381,40 +212,31 @@ class GraphService:
             }
         }
     
-    def _identify_flow_chains(self, nodes: List[Dict], edges: List[Dict]) -> List[List[str]]:
+    def _identify_flow_chains(self, nodes: List[Dict], edges: List[Dict], limit: int = 10) -> List[List[str]]:
         """
         Identify complete flow chains from HTML → JS → API → Backend.
         Returns list of node ID chains.
         """
         chains = []
         
+        # Index edges once by (source, type) instead of rescanning the edge list per step
+        targets_by_source = defaultdict(list)
+        for e in edges:
+            targets_by_source[(e.get("source"), e.get("type"))].append(e["target"])
+        
+        def targets(node_id, edge_types):
+            return [t for edge_type in edge_types for t in targets_by_source.get((node_id, edge_type), [])]
+        
         # Find HTML elements
         html_nodes = [n for n in nodes if n.get("type") in ["button", "element", "input"]]
         
         for html_node in html_nodes:
-            chain = [html_node["id"]]
-            
-            # Find JS handlers
-            js_edges = [e for e in edges if e.get("source") == html_node["id"] and e.get("type") == "handles_event"]
-            for js_edge in js_edges:
-                js_node_id = js_edge["target"]
-                chain.append(js_node_id)
-                
-                # Find API calls from JS
-                api_edges = [e for e in edges if e.get("source") == js_node_id and e.get("type") in ["calls_endpoint", "calls_route"]]
-                for api_edge in api_edges:
-                    api_node_id = api_edge["target"]
-                    chain.append(api_node_id)
-                    
-                    # Find backend handlers
-                    backend_edges = [e for e in edges if e.get("source") == api_node_id and e.get("type") == "handles_endpoint"]
-                    for backend_edge in backend_edges:
-                        backend_node_id = backend_edge["target"]
-                        chain.append(backend_node_id)
-                        chains.append(chain.copy())
-                        chain.pop()  # Backtrack
-                    chain.pop()  # Backtrack
-                chain.pop()  # Backtrack
-        
-        return chains[:10]  # Limit to top 10 chains
+            for js_node_id in targets(html_node["id"], ["handles_event"]):
+                for api_node_id in targets(js_node_id, ["calls_endpoint", "calls_route"]):
+                    for backend_node_id in targets(api_node_id, ["handles_endpoint"]):
+                        chains.append([html_node["id"], js_node_id, api_node_id, backend_node_id])
+                        if len(chains) >= limit:
+                            return chains
+        
+        return chains
 
@@ -13,6 +13,7 @@ from app.hybrid_search_pipeline import (
     GraphContextSearch,
     OutputFormatter
 )
+from app.embedding_text import build_embedding_text
 
 
 class HybridPipelineAdapter:
@@ -29,8 +30,11 @@ class HybridPipelineAdapter:
             search_service: Existing SearchService instance
         """
         self.search_service = search_service
-        self.pipeline = None
+        self.pipeline = None  # replaced as a whole by refresh(), never re-indexed in place
         self._initialized = False
+        self._model_path = None
+        self._graph_service = None
+        self._explanation_service = None
     
     def initialize(self, model_path: Optional[Path] = None, graph_service=None, explanation_service=None):
         """
@@ -44,22 +48,30 @@ class HybridPipelineAdapter:
         if self._initialized:
             return
         
+        self._model_path = model_path
+        self._graph_service = graph_service
+        self._explanation_service = explanation_service
+        self.pipeline = self._build_pipeline()
+        self._initialized = True
+    
+    def _build_pipeline(self, generation=None) -> HybridSearchPipeline:
+        """A new pipeline over a SearchService generation (default the current one)"""
         # Initialize components
         query_understanding = QueryUnderstandingLayer()
         lexical_engine = LexicalSearchEngine()
-        semantic_engine = SemanticSearchEngine(model_path=model_path)
+        semantic_engine = SemanticSearchEngine(model_path=self._model_path)
         ranker = HybridRanker(alpha=0.6, beta=0.3, gamma=0.1)
         
         # Graph context search (if available)
         graph_context = None
-        if graph_service:
-            graph_context = GraphContextSearch(graph_service)
+        if self._graph_service:
+            graph_context = GraphContextSearch(self._graph_service)
         
         # Output formatter
-        output_formatter = OutputFormatter(explanation_service=explanation_service)
+        output_formatter = OutputFormatter(explanation_service=self._explanation_service)
         
         # Create pipeline
-        self.pipeline = HybridSearchPipeline(
+        pipeline = HybridSearchPipeline(
             lexical_engine=lexical_engine,
             semantic_engine=semantic_engine,
             ranker=ranker,
@@ -69,50 +81,25 @@ class HybridPipelineAdapter:
         )
         
         # Load data from SearchService if indexed
-        if hasattr(self.search_service, 'semantic_index_data') and self.search_service.semantic_index_data:
-            self._load_from_search_service()
-        
-        self._initialized = True
+        if generation is None:
+            generation = getattr(self.search_service, 'generation', None)
+        if generation is not None and generation.metadata:
+            self._load_generation(pipeline, generation)
+        return pipeline
     
-    def _load_from_search_service(self):
-        """Load indexed data from SearchService into pipeline"""
-        if not hasattr(self.search_service, 'semantic_index_data'):
-            return
-        
-        index_data = self.search_service.semantic_index_data
-        
+    def _load_generation(self, pipeline: HybridSearchPipeline, generation):
+        """
+        Index one SearchService generation into pipeline. Metadata, embeddings and BM25
+        postings all come from the same snapshot, so a scan swapping generations meanwhile
+        cannot pair one generation's items with another's vectors.
+        """
         # Extract documents and metadata
         documents = []
         metadata = []
         
-        for item in index_data:
-            # Build text for embedding (same format as used in indexing)
-            text = f"{item.get('type', 'code')}: {item.get('name', '')}\n"
-            if item.get('docstring'):
-                text += f"Description: {item['docstring']}\n"
-            elif item.get('context'):
-                text += f"{item['context']}\n"
-            
-            # Add API calls, events, routes
-            api_calls = item.get('api_calls', [])
-            if api_calls:
-                api_info = ", ".join([f"{ac.get('method', 'GET')} {ac.get('endpoint', '')}" 
-                                     for ac in api_calls[:3]])
-                text += f"API calls: {api_info}\n"
-            
-            event_listeners = item.get('event_listeners', [])
-            if event_listeners:
-                event_info = ", ".join([f"{el.get('event', '')} -> {el.get('handler', '')}" 
-                                       for el in event_listeners[:3]])
-                text += f"Events: {event_info}\n"
-            
-            routes = item.get('routes', [])
-            if routes:
-                route_info = ", ".join([f"{r.get('method', 'GET')} {r.get('path', '')}" 
-                                       for r in routes[:3]])
-                text += f"Routes: {route_info}\n"
-            
-            text += f"\nCode:\n{item.get('code', '')[:500]}"
+        for item in generation.metadata:
+            # Same text the embeddings were computed from
+            text = build_embedding_text(item)
             
             documents.append(text)
             metadata.append({
@@ -129,12 +116,35 @@ class HybridPipelineAdapter:
                 "routes": item.get("routes", [])
             })
         
-        # Index in pipeline
+        # Index in pipeline, reusing the scan's embeddings and BM25 postings when they line up with the items
+        embeddings = generation.embeddings
+        if embeddings is not None and len(embeddings) != len(documents):
+            embeddings = None
+        bm25 = generation.bm25
+        if bm25 is not None and len(bm25) != len(documents):
+            bm25 = None
         if documents:
             print(f"📚 Loading {len(documents)} documents into hybrid pipeline...")
-            self.pipeline.index(documents, metadata)
+            pipeline.index(documents, metadata, embeddings=embeddings, bm25=bm25)
             print("✅ Pipeline initialized with SearchService data")
     
+    def refresh(self, pipeline: Optional[HybridSearchPipeline] = None):
+        """
+        Rebuild the pipeline after SearchService re-indexed (no re-encoding), or swap in one
+        from prepare_refresh. The new pipeline is built aside and swapped in with one
+        assignment; searches keep the one they started with.
+        """
+        if pipeline is None:
+            pipeline = self.prepare_refresh(self.search_service.generation)
+        if pipeline is not None:
+            self.pipeline = pipeline
+    
+    def prepare_refresh(self, generation) -> Optional[HybridSearchPipeline]:
+        """Pipeline over a generation that is not served yet, for refresh() (None when there is nothing to swap)"""
+        if self._initialized and generation.metadata:
+            return self._build_pipeline(generation)
+        return None
+    
     def search(
         self,
         query: str,
@@ -162,12 +172,13 @@ class HybridPipelineAdapter:
             explanation_service = getattr(self.search_service, 'explanation_service', None) if hasattr(self.search_service, 'explanation_service') else None
             self.initialize(graph_service=graph_service, explanation_service=explanation_service)
         
-        if not self.pipeline:
+        pipeline = self.pipeline  # one pipeline for the whole request, even if refresh() swaps it
+        if not pipeline:
             # Fallback to SearchService
             return self.search_service.search(query, max_results=top_k)
         
         # Use pipeline
-        results = self.pipeline.search(query, top_k=top_k, alpha=alpha, beta=beta, gamma=gamma)
+        results = pipeline.search(query, top_k=top_k, alpha=alpha, beta=beta, gamma=gamma)
         
         # Convert to SearchService format (preserve new fields)
         formatted_results = []
@@ -11,8 +11,9 @@ Architecture:
 import re
 import numpy as np
 from typing import List, Dict, Tuple, Optional
-from rank_bm25 import BM25Okapi
-from sentence_transformers import SentenceTransformer, util
+from app.bm25_index import BM25Index
+from app.embedding_model import get_embedding_model, encode_query
+from app.top_k import top_k_indices, top_k_items
 from pathlib import Path
 import pickle
 import json
@@ -173,22 +174,29 @@ class LexicalSearchEngine:
         self.docs = []
         self.doc_metadata = []  # Metadata for each document
     
-    def index(self, documents: List[str], metadata: List[Dict] = None):
+    def index(self, documents: List[str], metadata: List[Dict] = None, bm25: Optional[BM25Index] = None):
         """
         Index documents for BM25 search
         
         Args:
             documents: List of document texts
             metadata: Optional list of metadata dicts (one per document)
+            bm25: Optional prebuilt BM25Index over the same documents (same tokenization); skips the
+                  rebuild. No tokenized corpus is kept, so save_index() writes its postings instead
         """
         self.docs = documents
         self.doc_metadata = metadata or [{}] * len(documents)
         
+        if bm25 is not None:
+            self.tokenized_corpus = []  # postings already built
+            self.bm25 = bm25
+            return
+        
         # Tokenize documents
         self.tokenized_corpus = [self._tokenize(doc) for doc in documents]
         
         # Build BM25 index
-        self.bm25 = BM25Okapi(self.tokenized_corpus)
+        self.bm25 = BM25Index(self.tokenized_corpus)
     
     def search(self, query: str, top_k: int = 10) -> List[Tuple[Dict, float]]:
         """
@@ -206,18 +214,11 @@ class LexicalSearchEngine:
         if not tokenized_query:
             return []
         
-        # Get BM25 scores
-        scores = self.bm25.get_scores(tokenized_query)
-        
-        # Rank results
-        ranked_indices = np.argsort(scores)[::-1][:top_k]
-        
-        results = []
-        for idx in ranked_indices:
-            if scores[idx] > 0:  # Only include results with positive scores
-                results.append((self.doc_metadata[idx], float(scores[idx])))
-        
-        return results
+        # Score only documents containing a query term; top_k keeps positive scores
+        return [
+            (self.doc_metadata[idx], score)
+            for idx, score in self.bm25.top_k(tokenized_query, top_k)
+        ]
     
     def _tokenize(self, text: str) -> List[str]:
         """Tokenize text for BM25"""
@@ -226,12 +227,20 @@ class LexicalSearchEngine:
         return tokens
     
     def save_index(self, file_path: Path):
-        """Save BM25 index to disk"""
+        """
+        Save BM25 index to disk
+        An index built from a prebuilt BM25Index has no tokenized corpus to rebuild from, so its
+        postings are written next to file_path (BM25Index.save, prefix = the file's stem).
+        """
+        file_path = Path(file_path)
         index_data = {
             "tokenized_corpus": self.tokenized_corpus,
             "docs": self.docs,
             "doc_metadata": self.doc_metadata
         }
+        if self.bm25 is not None and len(self.tokenized_corpus) != len(self.docs):
+            self.bm25.save(file_path.parent, prefix=file_path.stem)
+            index_data["bm25_prefix"] = file_path.stem
         with open(file_path, "wb") as f:
             pickle.dump(index_data, f)
     
@@ -244,8 +253,13 @@ class LexicalSearchEngine:
         self.docs = index_data["docs"]
         self.doc_metadata = index_data["doc_metadata"]
         
+        if index_data.get("bm25_prefix"):
+            # Saved from a prebuilt index: load its postings
+            self.bm25 = BM25Index.load(Path(file_path).parent, prefix=index_data["bm25_prefix"])
+            return
+        
         # Rebuild BM25 index
-        self.bm25 = BM25Okapi(self.tokenized_corpus)
+        self.bm25 = BM25Index(self.tokenized_corpus)
 
 
 class SemanticSearchEngine:
@@ -262,18 +276,21 @@ class SemanticSearchEngine:
             model_name: HuggingFace model name
             model_path: Optional local path to model
         """
-        if model_path and Path(model_path).exists():
-            print(f"Loading local model from: {model_path}")
-            self.model = SentenceTransformer(str(model_path))
-        else:
-            print(f"Loading model: {model_name}")
-            self.model = SentenceTransformer(model_name)
+        # Resolved through the shared registry on first use (see the model property)
+        self.model_name = model_name
+        self.model_path = model_path
         
-        self.embeddings = None
+        self.embeddings = None  # float32 (n_docs, dim); may be a read-only memory map
+        self._norms = None  # row norms of embeddings, for cosine scores
         self.docs = []
         self.doc_metadata = []
     
-    def index(self, documents: List[str], metadata: List[Dict] = None, batch_size: int = 32):
+    @property
+    def model(self):
+        """Shared with SemanticSearchService, so the model is loaded once per process"""
+        return get_embedding_model(self.model_name, self.model_path)
+    
+    def index(self, documents: List[str], metadata: List[Dict] = None, batch_size: int = 32, embeddings=None):
         """
         Index documents with embeddings
         
@@ -281,20 +298,33 @@ class SemanticSearchEngine:
             documents: List of document texts
             metadata: Optional list of metadata dicts
             batch_size: Batch size for encoding
+            embeddings: Optional precomputed (n_docs, dim) matrix for documents; skips encoding
         """
         self.docs = documents
         self.doc_metadata = metadata or [{}] * len(documents)
         
+        if embeddings is not None:
+            # Shares the caller's (possibly memory-mapped) matrix instead of copying it
+            self._set_embeddings(embeddings)
+            print(f"✅ Reused {len(documents)} precomputed embeddings")
+            return
+        
         print(f"Encoding {len(documents)} documents...")
         # Encode documents
-        self.embeddings = self.model.encode(
+        self._set_embeddings(self.model.encode(
             documents,
-            convert_to_tensor=True,
+            convert_to_numpy=True,
             show_progress_bar=True,
             batch_size=batch_size
-        )
+        ))
         print("✅ Encoding complete")
     
+    def _set_embeddings(self, embeddings):
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(self.embeddings, axis=1) if self.embeddings.ndim == 2 else np.zeros(0)
+        norms[norms == 0] = 1.0
+        self._norms = norms
+    
     def search(self, query: str, top_k: int = 10) -> List[Tuple[Dict, float]]:
         """
         Search using semantic similarity
@@ -302,28 +332,25 @@ class SemanticSearchEngine:
         Returns:
             List of (metadata_dict, score) tuples
         """
-        if self.embeddings is None:
+        if self.embeddings is None or len(self.embeddings) == 0:
             return []
         
         # Encode query
-        query_embedding = self.model.encode(query, convert_to_tensor=True)
+        query_embedding = np.asarray(encode_query(query, self.model_name, self.model_path), dtype=np.float32)
+        query_norm = np.linalg.norm(query_embedding)
         
-        # Semantic search
-        hits = util.semantic_search(query_embedding, self.embeddings, top_k=top_k)[0]
+        # Cosine similarity against every document in one matrix-vector product
+        scores = (self.embeddings @ query_embedding) / self._norms
+        if query_norm > 0:
+            scores /= query_norm
         
-        results = []
-        for hit in hits:
-            idx = hit['corpus_id']
-            score = hit['score']
-            results.append((self.doc_metadata[idx], float(score)))
-        
-        return results
+        return [(self.doc_metadata[idx], float(scores[idx])) for idx in top_k_indices(scores, top_k)]
     
     def save_index(self, embeddings_path: Path, metadata_path: Path):
         """Save embeddings and metadata to disk"""
         # Save embeddings as numpy array
         if self.embeddings is not None:
-            np.save(embeddings_path, self.embeddings.cpu().numpy())
+            np.save(embeddings_path, self.embeddings)
         
         # Save metadata as JSON
         with open(metadata_path, "w", encoding="utf-8") as f:
@@ -332,10 +359,7 @@ class SemanticSearchEngine:
     def load_index(self, embeddings_path: Path, metadata_path: Path):
         """Load embeddings and metadata from disk"""
         # Load embeddings
-        embeddings_array = np.load(embeddings_path)
-        # Convert to tensor format
-        import torch
-        self.embeddings = torch.from_numpy(embeddings_array)
+        self._set_embeddings(np.load(embeddings_path))
         
         # Load metadata
         with open(metadata_path, "r", encoding="utf-8") as f:
@@ -351,16 +375,22 @@ class HybridRanker:
     מאחד תוצאות מ-Lexical ו-Semantic search עם משקולות
     """
     
-    def __init__(self, alpha: float = 0.7, beta: float = 0.3):
+    def __init__(self, alpha: float = 0.7, beta: float = 0.3, gamma: float = 0.0):
         """
         Initialize hybrid ranker
         
         Args:
             alpha: Weight for semantic search (default 0.7 = 70%)
             beta: Weight for lexical search (default 0.3 = 30%)
+            gamma: Weight for graph context (default 0 = unused)
         """
         self.alpha = alpha
         self.beta = beta
+        self.gamma = gamma
+    
+    def get_adaptive_weights(self, intent: str) -> Tuple[float, float, float]:
+        """(alpha, beta, gamma) for a query intent: the configured weights, whatever the intent"""
+        return self.alpha, self.beta, self.gamma
     
     def combine_results(
         self,
@@ -397,23 +427,24 @@ class HybridRanker:
         # Combine scores with three weights
         combined_scores = {}
         for doc_key in all_docs:
-            lex_score = lex_scores_dict.get(doc_key, 0.0)
-            sem_score = sem_scores_dict.get(doc_key, 0.0)
-            ctx_score = ctx_scores_dict.get(doc_key, 0.0)
+            lex_score = lex_scores_dict.get(doc_key, (None, 0.0))[1]
+            sem_score = sem_scores_dict.get(doc_key, (None, 0.0))[1]
+            ctx_score = ctx_scores_dict.get(doc_key, (None, 0.0))[1]
             
             # Weighted combination: α * semantic + β * lexical + γ * context
             combined_score = alpha * sem_score + beta * lex_score + gamma * ctx_score
             combined_scores[doc_key] = combined_score
         
-        # Rank by combined score
-        ranked = sorted(combined_scores.items(), key=lambda x: x[1], reverse=True)
+        # Select the top_k before copying any metadata
+        ranked = top_k_items(combined_scores.items(), top_k, key=lambda x: x[1])
         
-        # Build result list
+        # Build result list (survivors only)
         results = []
-        for doc_key, score in ranked[:top_k]:
+        for doc_key, score in ranked:
             # Get metadata from either source
             metadata = lex_scores_dict.get(doc_key, (None, 0))[0] if doc_key in lex_scores_dict else \
-                      sem_scores_dict.get(doc_key, (None, 0))[0] if doc_key in sem_scores_dict else None
+                      sem_scores_dict.get(doc_key, (None, 0))[0] if doc_key in sem_scores_dict else \
+                      ctx_scores_dict.get(doc_key, (None, 0))[0]
             
             if metadata:
                 result = dict(metadata)
@@ -780,7 +811,9 @@ class HybridSearchPipeline:
         self,
         documents: List[str],
         metadata: List[Dict],
-        save_path: Optional[Path] = None
+        save_path: Optional[Path] = None,
+        embeddings=None,
+        bm25: Optional[BM25Index] = None
     ):
         """
         Index documents in both lexical and semantic engines
@@ -789,16 +822,18 @@ class HybridSearchPipeline:
             documents: List of document texts
             metadata: List of metadata dicts
             save_path: Optional path to save indices
+            embeddings: Optional precomputed embedding matrix (one row per document)
+            bm25: Optional prebuilt BM25Index over documents
         """
         print("📚 Indexing documents...")
         
         # Index in lexical engine
         print("  → Building BM25 index...")
-        self.lexical_engine.index(documents, metadata)
+        self.lexical_engine.index(documents, metadata, bm25=bm25)
         
         # Index in semantic engine
         print("  → Building semantic embeddings...")
-        self.semantic_engine.index(documents, metadata)
+        self.semantic_engine.index(documents, metadata, embeddings=embeddings)
         
         # Save indices if path provided
         if save_path:
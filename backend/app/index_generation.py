@@ -0,0 +1,41 @@
+"""
+Index Generation - One consistent snapshot of the indexes a search reads
+SearchService holds a single reference to the current generation: the BM25 engine, the
+semantic metadata, its embedding matrix and BM25 postings, the directory they are
+mapped from and the codebase root they were built from. A scan builds the next
+generation aside and swaps the reference in one assignment, so a search that took the
+reference at its start reads matching pieces to the end, however long the scan runs.
+"""
+from pathlib import Path
+from typing import Optional
+
+
+class IndexGeneration:
+    """
+    Snapshot of the search indexes. Treated as immutable: changes go through replace(),
+    which returns a new generation. The lookups derived from it (relationship index,
+    code graph) are filled in on first use and belong to the generation they came from.
+    """
+
+    __slots__ = ("engine", "metadata", "embeddings", "bm25", "directory", "root_path", "relationship_index",
+                 "code_graph")
+
+    def __init__(self, engine=None, metadata=(), embeddings=None, bm25=None, directory: Optional[str] = None,
+                 root_path: Optional[Path] = None, relationship_index=None, code_graph=None):
+        self.engine = engine          # SearchEngine (file-level BM25, snippets, file graph)
+        self.metadata = metadata      # parsed components: MetadataStore, or a list for legacy pickles
+        self.embeddings = embeddings  # float32 (n_items, dim), rows L2-normalized, aligned with metadata
+        self.bm25 = bm25              # BM25Index over the components
+        self.directory = directory    # generation directory metadata/embeddings/bm25 are mapped from
+        self.root_path = root_path    # codebase root the indexes were built from (None: not known)
+        self.relationship_index = relationship_index
+        self.code_graph = code_graph
+
+    def replace(self, **changes) -> "IndexGeneration":
+        """Copy with some fields changed; derived lookups are dropped when the components change"""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        if {"metadata", "embeddings", "bm25", "directory"} & changes.keys():
+            fields["relationship_index"] = None
+            fields["code_graph"] = None
+        fields.update(changes)
+        return IndexGeneration(**fields)
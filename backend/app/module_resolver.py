@@ -0,0 +1,112 @@
+"""
+Module Resolver - In-memory import resolution over the indexed files
+Built once per index from the relative paths of the indexed files, so resolving an
+import is a few set/dict lookups instead of filesystem stats and a scan of the file list.
+
+Python: absolute modules ("app.routes") are looked up under the importing file's import
+root - the sys.path entry it runs under, i.e. the nearest directory above it that is not a
+package (backend/ for backend/app/routes.py) - then under the repository root; relative
+modules (".routes", "..app") are resolved from the importing package. A module that is not
+found resolves to None (a standard-library or third-party import), never to a parent package.
+JavaScript/TypeScript: relative paths with extension and index-file resolution, plus the
+"@/..." alias for the nearest enclosing src/ directory.
+"""
+import posixpath
+from typing import Dict, Iterable, List, Optional, Set
+
+JS_EXTENSIONS = ('', '.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs')
+JS_INDEX_FILES = ('/index.js', '/index.jsx', '/index.ts', '/index.tsx')
+
+
+class ModuleResolver:
+    """Resolves Python and JS/TS imports to indexed relative paths without touching disk"""
+
+    def __init__(self, rel_paths: Iterable[str]):
+        self._paths: Dict[str, str] = {}   # posix relative path -> path as the index stores it
+        for rel_path in rel_paths:
+            posix = rel_path.replace('\\', '/')
+            self._paths[posix] = rel_path
+        self._packages = self._package_dirs(self._paths)
+
+    def __setstate__(self, state):
+        """Resolvers pickled with the old dotted-suffix table derive their packages instead"""
+        self.__dict__.update(state)
+        self.__dict__.pop('_modules', None)
+        self._packages = self._package_dirs(self._paths)
+
+    @staticmethod
+    def _package_dirs(paths: Iterable[str]) -> Set[str]:
+        """Directories holding an __init__.py"""
+        return {posixpath.dirname(p) for p in paths if posixpath.basename(p) == '__init__.py'}
+
+    def _import_root(self, directory: str) -> str:
+        """sys.path entry a module in directory is imported under: the nearest ancestor that is not a package"""
+        while directory and directory in self._packages:
+            directory = posixpath.dirname(directory)
+        return directory
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, rel_path: str) -> bool:
+        return rel_path.replace('\\', '/') in self._paths
+
+    def _python_file(self, directory: str, parts: List[str]) -> Optional[str]:
+        base = posixpath.join(directory, *parts)
+        candidates = (base + '.py', posixpath.join(base, '__init__.py')) if parts else \
+            (posixpath.join(directory, '__init__.py'),)  # the package itself
+        for candidate in candidates:
+            candidate = posixpath.normpath(candidate)
+            if candidate in self._paths:
+                return candidate
+        return None
+
+    def resolve_python(self, module_name: str, source_file: str) -> Optional[str]:
+        """Indexed file for `import module_name` / `from module_name import ...` in source_file"""
+        source_dir = posixpath.dirname(source_file.replace('\\', '/'))
+        if module_name.startswith('.'):
+            level = len(module_name) - len(module_name.lstrip('.'))
+            package = source_dir
+            for _ in range(level - 1):
+                if not package:
+                    return None
+                package = posixpath.dirname(package)
+            parts = [p for p in module_name[level:].split('.') if p]
+            found = self._python_file(package, parts)
+            return self._paths[found] if found else None
+
+        parts = module_name.split('.')
+        for root in dict.fromkeys((self._import_root(source_dir), '')):
+            found = self._python_file(root, parts)
+            if found:
+                return self._paths[found]
+        return None
+
+    def resolve_js(self, import_path: str, source_file: str) -> Optional[str]:
+        """Indexed file for a relative (or "@/") JS/TS import in source_file; packages resolve to None"""
+        source_dir = posixpath.dirname(source_file.replace('\\', '/'))
+        if import_path.startswith('@/'):
+            bases = []
+            directory = source_dir
+            while True:
+                head, tail = posixpath.split(directory)
+                if tail == 'src':
+                    bases.append(posixpath.join(directory, import_path[2:]))
+                    break
+                if not directory or directory == head:
+                    break
+                directory = head
+        elif import_path.startswith('.'):
+            bases = [posixpath.join(source_dir, import_path)]
+        else:
+            return None
+
+        for base in bases:
+            base = posixpath.normpath(base)
+            if base.startswith('..'):
+                continue
+            for suffix in JS_EXTENSIONS + JS_INDEX_FILES:
+                candidate = base + suffix
+                if candidate in self._paths:
+                    return self._paths[candidate]
+        return None
@@ -0,0 +1,78 @@
+"""
+Parallel Parser - Fans CodeParser.parse_file out to a process pool
+AST parsing, regex extraction and BeautifulSoup are CPU-bound and hold the GIL,
+so files are parsed in worker processes and streamed back in input order.
+Workers are spawned rather than forked: scans run on background threads of the server,
+and a fork of a threaded process can inherit locks held by other threads and hang.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.code_parser import CodeParser
+
+DEFAULT_CHUNK_SIZE = 16
+START_METHOD = "spawn"
+
+_worker_parser = None  # one CodeParser per worker process
+
+
+def _parse_chunk(paths: List[str]) -> List[Optional[List[Dict]]]:
+    """Worker entry point: parse a chunk of files (None marks a file that raised)"""
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = CodeParser()
+
+    results = []
+    for path in paths:
+        try:
+            results.append(_worker_parser.parse_file(Path(path)))
+        except Exception as e:
+            print(f"⚠️ Error parsing {path}: {e}")
+            results.append(None)
+    return results
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """Worker count: explicit positive value, else one per CPU"""
+    if not workers or workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def iter_parsed_files(
+    paths: Iterable[Path],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Tuple[Path, Optional[List[Dict]]]]:
+    """
+    Parse files and yield (path, items) in the same order as paths.
+    items is None when parsing the file raised.
+
+    Files are sent to workers in chunks; small inputs or workers=1 are parsed
+    in-process. If the pool cannot be used, the remaining files are parsed serially.
+    """
+    paths = [Path(p) for p in paths]
+    workers = min(resolve_workers(workers), max(1, len(paths) // chunk_size))
+    done = 0
+
+    if workers > 1:
+        chunks = [[str(p) for p in paths[i:i + chunk_size]] for i in range(0, len(paths), chunk_size)]
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+            try:
+                for results in pool.map(_parse_chunk, chunks):
+                    for items in results:
+                        yield paths[done], items
+                        done += 1
+            finally:
+                # Closed early (e.g. a cancelled scan): drop the chunks not started yet
+                pool.shutdown(wait=True, cancel_futures=True)
+            return
+        except Exception as e:
+            print(f"⚠️ Parallel parsing unavailable ({e}), continuing serially")
+
+    for path, items in zip(paths[done:], map(_parse_chunk, ([str(p)] for p in paths[done:]))):
+        yield path, items[0]
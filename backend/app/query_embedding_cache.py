@@ -0,0 +1,128 @@
+"""
+Query Embedding Cache - Bounded LRU with TTL for encoded search queries
+One request often encodes the same query several times (hybrid, FAISS, graph and flow
+searches), and the UI repeats popular queries, so query vectors are memoized per model.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """Cache key form of a query: surrounding and repeated whitespace collapsed"""
+    return " ".join(query.split())
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU of (model, normalized query) -> read-only float32 vector"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock  # seconds, for the TTL
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_entries: int = None, ttl_seconds: float = None):
+        """Change the limits; entries beyond the new size are evicted"""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if ttl_seconds is not None:
+                self.ttl_seconds = ttl_seconds
+            self._evict_overflow()
+
+    def _evict_overflow(self):
+        while len(self._entries) > max(self.max_entries, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_encode(self, model_id: str, query: str, encode: Callable[[str], np.ndarray]) -> np.ndarray:
+        """
+        Vector for query under model_id; encode(normalized_query) is called on a miss.
+        The returned array is shared and read-only: copy before modifying it.
+        """
+        text = normalize_query(query)
+        key = (model_id, text)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl_seconds <= 0 or now - entry[0] < self.ttl_seconds):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]  # expired
+            self.misses += 1
+
+        # Encode outside the lock so slow encodes do not block cache hits
+        vector = np.array(encode(text), dtype=np.float32).reshape(-1)
+        vector.flags.writeable = False
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = (now, vector)
+                self._entries.move_to_end(key)
+                self._evict_overflow()
+        return vector
+
+    def get_or_encode_many(self, model_id: str, queries: Sequence[str],
+                           encode_many: Callable[[List[str]], np.ndarray]) -> List[np.ndarray]:
+        """
+        Vectors for several queries; the misses are encoded together in one
+        encode_many(normalized_queries) call (one row per query). Same sharing rules as get_or_encode.
+        """
+        texts = [normalize_query(query) for query in queries]
+        now = self._clock()
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for text in texts:
+                if text in found:
+                    continue
+                key = (model_id, text)
+                entry = self._entries.get(key)
+                if entry is not None and (self.ttl_seconds <= 0 or now - entry[0] < self.ttl_seconds):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    found[text] = entry[1]
+                    continue
+                if entry is not None:
+                    del self._entries[key]  # expired
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+
+        if missing:
+            # Encode outside the lock so slow encodes do not block cache hits
+            vectors = np.array(encode_many(missing), dtype=np.float32).reshape(len(missing), -1)
+            with self._lock:
+                self.misses += len(missing)
+                for text, vector in zip(missing, vectors):
+                    vector.flags.writeable = False
+                    found[text] = vector
+                    if self.max_entries > 0:
+                        self._entries[(model_id, text)] = (now, vector)
+                        self._entries.move_to_end((model_id, text))
+                self._evict_overflow()
+        return [found[text] for text in texts]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,307 @@
+"""
+Relationship Index - Precomputed lookup tables behind GraphService.find_related
+Built once per semantic index (at scan time, or lazily after loading one), so finding
+the components related to a result is a handful of dict lookups instead of a pass
+over every indexed item.
+
+API calls are linked to routes through RouteTable (app/route_table.py), which
+understands path parameters, /api prefixes and HTTP methods.
+
+Other strings are compared as token sequences: "a relates to b" means b's tokens appear
+contiguously in a's tokens. Calls and imports use identifier tokens
+("self.search_service.search" -> self, search_service, search), so "search" matches
+that call but no longer "research_notes"; only identifier-like names take part in
+call/import matching, and an empty name matches nothing. Event handlers are split
+into lowercase words ("handleSearchClick" -> handle, search, click) so element ids
+and classes can be found inside them.
+"""
+import re
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.route_table import RouteTable, route_methods, segments_match, split_path
+
+_WORD = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+_IDENTIFIER = re.compile(r"\w+")
+_DOTTED_NAME = re.compile(r"[A-Za-z_][\w.]*")
+MAX_WINDOW = 6  # longest word sequence indexed as a key; longer lookups are verified per candidate
+
+Words = Tuple[str, ...]
+
+
+def words(text: str) -> Words:
+    """Lowercase words, splitting snake_case and camelCase"""
+    return tuple(w.lower() for w in _WORD.findall(text or ""))
+
+
+def identifiers(text: str) -> Words:
+    """Identifier tokens, split on anything that is not a word character"""
+    return tuple(_IDENTIFIER.findall(text or ""))
+
+
+def _name_tokens(name: str) -> Words:
+    """Tokens of a function/class name for call and import matching (nothing for paths, tags, ...)"""
+    return identifiers(name) if _DOTTED_NAME.fullmatch(name or "") else ()
+
+
+def contains(haystack: Words, needle: Words) -> bool:
+    """needle appears as a contiguous run in haystack (empty needle never matches)"""
+    n = len(needle)
+    if not n or n > len(haystack):
+        return False
+    return any(haystack[i:i + n] == needle for i in range(len(haystack) - n + 1))
+
+
+def _windows(text_words: Words) -> Iterable[Words]:
+    for size in range(1, min(len(text_words), MAX_WINDOW) + 1):
+        for start in range(len(text_words) - size + 1):
+            yield text_words[start:start + size]
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    """
+    Normalize endpoint for matching (remove /api/, leading/trailing slashes).
+    Example: '/api/search' -> 'search', '/api/users/123' -> 'users/123'
+    """
+    if not endpoint:
+        return ""
+
+    # Remove leading/trailing slashes
+    normalized = endpoint.strip('/')
+
+    # Remove /api/ prefix if present
+    if normalized.startswith('api/'):
+        normalized = normalized[4:]
+    elif normalized.startswith('/api/'):
+        normalized = normalized[5:]
+
+    return normalized.lower()
+
+
+def detect_context(item: Dict) -> str:
+    """
+    Detect context (frontend/backend) based on file path and language.
+    """
+    file_path = item.get("file_path", "").lower()
+    language = item.get("language", "").lower()
+
+    # Frontend indicators
+    if any(indicator in file_path for indicator in ['frontend', 'client', 'src', 'public', 'static']):
+        return "frontend"
+    if language in ["javascript", "typescript", "html", "css"]:
+        return "frontend"
+
+    # Backend indicators
+    if any(indicator in file_path for indicator in ['backend', 'server', 'api', 'routes', 'app']):
+        return "backend"
+    if language == "python":
+        return "backend"
+
+    # Default based on type
+    item_type = item.get("type", "").lower()
+    if item_type in ["route", "api_call"]:
+        if "api" in file_path or "route" in file_path:
+            return "backend"
+        return "frontend"
+
+    return "unknown"
+
+
+class _WordIndex:
+    """Item ids by the word sequences of the texts attached to them"""
+
+    def __init__(self, tokenize=identifiers):
+        self._tokenize = tokenize
+        self._by_window: Dict[Words, Set[int]] = defaultdict(set)  # every run of <= MAX_WINDOW words
+        self._by_text: Dict[Words, Set[int]] = defaultdict(set)  # complete texts
+
+    def add(self, item_id: int, text: str):
+        text_words = self._tokenize(text)
+        if not text_words:
+            return
+        self._by_text[text_words].add(item_id)
+        for window in _windows(text_words):
+            self._by_window[window].add(item_id)
+
+    def containing(self, text_words: Words) -> FrozenSet[int]:
+        """Candidates with a text containing text_words (verify when longer than MAX_WINDOW)"""
+        if not text_words:
+            return frozenset()
+        return frozenset(self._by_window.get(text_words[:MAX_WINDOW], ()))
+
+    def contained_in(self, text_words: Words) -> Set[int]:
+        """Items with a text that is a run of text_words"""
+        found = set()
+        for start in range(len(text_words)):
+            for end in range(start + 1, len(text_words) + 1):
+                found |= self._by_text.get(text_words[start:end], set())
+        return found
+
+
+class RelationshipIndex:
+    """
+    Lookup tables over the items of a semantic index:
+    callers and callees by name, importers, endpoint -> backend routes and handlers,
+    endpoint -> frontend API callers, and handler -> event listeners.
+    """
+
+    def __init__(self, items: Sequence[Dict], records: Optional[Iterable[Dict]] = None):
+        """
+        items: the indexed items, fetched by id when a relationship is found
+        records: the same items in the same order when they are cheaper to iterate
+                 (e.g. the in-memory list a MetadataStore was just written from)
+        """
+        self.items = items
+        self._keys: List[Tuple[str, str]] = []
+        self._relations: List[List[Words]] = []
+        self._callers = _WordIndex()        # relation texts -> items making the call
+        self._names = _WordIndex()          # item name -> item
+        self._importers = _WordIndex()      # import texts -> importing items
+        self._routes = RouteTable()         # route path -> backend items serving it
+        self._route_handlers = _WordIndex(words)  # normalized item name -> backend items
+        self._api_callers = RouteTable()    # API endpoint -> frontend items calling it
+        self._listeners = _WordIndex(words)  # event handler name -> items with the listener
+        self._api_calls_by_item: Dict[int, List[Tuple[str, str, Tuple[str, ...]]]] = {}
+        self._handlers_by_item: Dict[int, List[Words]] = {}
+        self._imports_by_item: Dict[int, List[Words]] = {}
+
+        for item_id, item in enumerate(items if records is None else records):
+            name = item.get("name", "")
+            context = detect_context(item)
+            self._keys.append((item.get("file_path"), name))
+
+            self._relations.append([identifiers(rel) for rel in item.get("relations", [])])
+            for rel in item.get("relations", []):
+                self._callers.add(item_id, rel)
+            if _name_tokens(name):
+                self._names.add(item_id, name)
+
+            imports = item.get("imports", [])
+            if imports:
+                self._imports_by_item[item_id] = [identifiers(imp) for imp in imports]
+                for imp in imports:
+                    self._importers.add(item_id, imp)
+
+            if context == "backend":
+                for route in item.get("routes", []):
+                    if route.get("path"):
+                        self._routes.add(route["path"], item_id, route_methods(route))
+                self._route_handlers.add(item_id, normalize_endpoint(name))
+
+            if context == "frontend":
+                api_calls = []
+                for api_call in item.get("api_calls", []):
+                    endpoint = api_call.get("endpoint", "")
+                    if not endpoint:
+                        continue
+                    method = (api_call.get("method") or "GET").upper()
+                    api_calls.append((endpoint, method, split_path(endpoint)))
+                    self._api_callers.add(endpoint, item_id, (method,))
+                if api_calls:
+                    self._api_calls_by_item[item_id] = api_calls
+
+            listeners = item.get("event_listeners", [])
+            if listeners:
+                self._handlers_by_item[item_id] = [words(l.get("handler", "")) for l in listeners]
+                for listener in listeners:
+                    self._listeners.add(item_id, listener.get("handler", ""))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def find(self, base_item: Dict) -> List[Tuple[int, Dict]]:
+        """
+        (item id, relation fields) for every relationship of base_item, ordered by item id
+        and, per item, in the order calls / called-by / endpoint / route / event / import.
+        """
+        found: Dict[int, List[Dict]] = defaultdict(list)
+        base_name = base_item.get("name", "")
+        base_type = base_item.get("type", "")
+        base_key = (base_item.get("file_path", ""), base_name)
+        base_context = detect_context(base_item)
+        name_words = _name_tokens(base_name)
+        base_relations = [identifiers(rel) for rel in base_item.get("relations", [])]
+
+        # 1. Function call relationships (bidirectional)
+        for item_id in self._callers.containing(name_words):
+            if any(contains(rel, name_words) for rel in self._relations[item_id]):
+                found[item_id].append({"relation_type": "calls_function", "relation_strength": "strong",
+                                       "direction": "outgoing"})
+        callees = set()
+        for rel in base_relations:
+            callees |= self._names.contained_in(rel)
+        for item_id in callees:
+            found[item_id].append({"relation_type": "called_by_function", "relation_strength": "strong",
+                                   "direction": "incoming"})
+
+        # 2. API endpoint matches (frontend <-> backend)
+        if base_type == "api_call" and base_context == "frontend":
+            base_endpoint, base_method = "", None
+            for api_call in base_item.get("api_calls", []):
+                endpoint = api_call.get("endpoint", "")
+                if endpoint:
+                    base_endpoint, base_method = endpoint, api_call.get("method")
+                    break
+            if base_endpoint:
+                # Route table: parameters, /api prefixes and methods resolved in one trie walk
+                for item_id in self._routes.resolve(base_endpoint, base_method):
+                    found[item_id].append({"relation_type": "handles_endpoint", "relation_strength": "strong",
+                                           "direction": "backend", "endpoint_match": base_endpoint,
+                                           "context": "backend"})
+                # Handler names are matched by words: endpoint "search" finds search_code()
+                endpoint_name_words = words(normalize_endpoint(base_endpoint))
+                for item_id in self._route_handlers.containing(endpoint_name_words):
+                    if contains(words(normalize_endpoint(self._keys[item_id][1])), endpoint_name_words):
+                        found[item_id].append({"relation_type": "endpoint_handler", "relation_strength": "medium",
+                                               "direction": "backend", "context": "backend"})
+
+        # If base is a backend route, find frontend calls
+        if base_type == "route" and base_context == "backend" and base_name:
+            route_segments = split_path(base_name)
+            methods = ()
+            for route in base_item.get("routes", []):
+                if route.get("path") == base_name:
+                    methods = route_methods(route)
+                    break
+            for item_id in self._api_callers.resolve(base_name, query_is_route=True):
+                calls = [(endpoint, method) for endpoint, method, segments in self._api_calls_by_item[item_id]
+                         if segments_match(segments, route_segments)]
+                # Report the call made with one of the route's methods when there is one
+                endpoint = next((e for e, m in calls if m in methods), calls[0][0])
+                found[item_id].append({"relation_type": "calls_route", "relation_strength": "strong",
+                                       "direction": "frontend", "endpoint_match": endpoint,
+                                       "context": "frontend"})
+
+        # 3. Event handler connections (HTML <-> JS)
+        if base_type in ["button", "element", "input"] and base_item.get("language", "") == "html":
+            attributes = base_item.get("attributes", {})
+            id_words = words(attributes.get("id", ""))
+            class_words = [words(cls) for cls in attributes.get("class", [])]
+            class_words = [cw for cw in class_words if cw]
+            candidates = set(self._listeners.containing(id_words))
+            for cw in class_words:
+                candidates |= self._listeners.containing(cw)
+            for item_id in candidates:
+                for handler in self._handlers_by_item.get(item_id, []):
+                    if contains(handler, id_words):
+                        strength = "strong"
+                    elif any(contains(handler, cw) for cw in class_words):
+                        strength = "medium"
+                    else:
+                        continue
+                    found[item_id].append({"relation_type": "handles_event", "relation_strength": strength,
+                                           "direction": "js_handler"})
+                    break
+
+        # 4. Import relationships
+        for item_id in self._importers.containing(name_words):
+            if any(contains(imp, name_words) for imp in self._imports_by_item.get(item_id, [])):
+                found[item_id].append({"relation_type": "imports", "relation_strength": "weak",
+                                       "direction": "depends_on"})
+
+        return [
+            (item_id, relation)
+            for item_id in sorted(found)
+            if self._keys[item_id] != base_key
+            for relation in found[item_id]
+        ]
@@ -0,0 +1,175 @@
+"""
+Route Table - Path-segment trie for matching frontend API calls to backend routes
+Paths are split into segments once when the table is built; resolving a call walks
+the trie, so matching costs O(path length) instead of a substring test per route.
+
+Handled forms:
+    parameters   /users/<id>, /users/<int:id>, /users/{id}, /users/:id, `/users/${id}`
+    catch-all    /files/<path:rest>  (matches one or more trailing segments)
+    prefixes     leading /api and /api/v<n>, scheme and host (http://localhost:8000/api/...),
+                 template bases (`${API_BASE}/search`), query strings and template suffixes
+    methods      routes record the HTTP methods they accept; calls prefer routes with their method
+
+A route parameter accepts any value, but a parameter in a call (`${id}`) is an unknown
+value: it fits a parameter or catch-all of the route, never one of its static segments.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PARAM = "<param>"
+CATCH_ALL = "<path>"
+
+_SCHEME_HOST = re.compile(r"^[a-z][a-z0-9+.-]*://[^/]*", re.IGNORECASE)
+# `${API_BASE}/search` -> /search; `/graph${query}` -> /graph (whole-segment `${id}` stays a parameter)
+_TEMPLATE_PREFIX = re.compile(r"^\$\{[^}]*\}")
+_TEMPLATE_SUFFIX = re.compile(r"(?<=[^/])\$\{.*$")
+_API_VERSION = re.compile(r"^v\d+$")
+_CATCH_ALL = re.compile(r"^<path:[^>]*>$")
+_PARAM = re.compile(r"^(<[^>]*>|\{[^}]*\}|:\w+|\$\{[^}]*\}|\*)$")
+
+
+def strip_templates(path: str) -> str:
+    """Drop a leading template base and a template suffix: `${API_BASE}/graph${query}` -> /graph"""
+    return _TEMPLATE_SUFFIX.sub("", _TEMPLATE_PREFIX.sub("", path))
+
+
+def split_path(path: str) -> Tuple[str, ...]:
+    """
+    Normalized segments of a route or call path.
+    '/api/users/<int:id>' -> ('users', PARAM); 'http://h/api/v1/search?q=x' -> ('search',)
+    """
+    if not path:
+        return ()
+    path = strip_templates(_SCHEME_HOST.sub("", path.strip()))
+    path = path.split("?", 1)[0].split("#", 1)[0]
+    segments = []
+    for segment in path.split("/"):
+        if not segment:
+            continue
+        if _CATCH_ALL.match(segment):
+            segments.append(CATCH_ALL)
+        elif _PARAM.match(segment) or "${" in segment:
+            segments.append(PARAM)
+        else:
+            segments.append(segment.lower())
+    if len(segments) > 1 and segments[0] == "api":
+        segments = segments[1:]
+        if len(segments) > 1 and _API_VERSION.match(segments[0]):
+            segments = segments[1:]
+    return tuple(segments)
+
+
+def segments_match(call: Tuple[str, ...], route: Tuple[str, ...]) -> bool:
+    """
+    Whether a split call path reaches a split route path: route parameters match any one
+    segment and catch-alls the rest; a call parameter only matches a route parameter
+    """
+    for c, r in zip(call, route):
+        if r == CATCH_ALL or c == CATCH_ALL:
+            return True
+        if c != r and r != PARAM:
+            return False
+    return len(call) == len(route)
+
+
+def route_methods(route: Dict) -> Tuple[str, ...]:
+    """HTTP methods a parsed route accepts ('methods' list when known, else its 'method')"""
+    methods = route.get("methods") or [route.get("method") or "GET"]
+    return tuple(m.upper() for m in methods)
+
+
+class _Node:
+    __slots__ = ("children", "param", "catch_all", "entries")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.param: Optional["_Node"] = None
+        self.catch_all: Optional["_Node"] = None
+        self.entries: List[Tuple[int, Tuple[str, ...], object]] = []  # (insertion order, methods, value)
+
+
+class RouteTable:
+    """
+    Compiled table of paths -> values (item ids, graph node ids, ...).
+    Either side of a match may contain parameters: a parameter matches any one segment.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, path: str, value, methods: Iterable[str] = ()):
+        """Register value under path; methods empty means any method"""
+        node = self._root
+        for segment in split_path(path):
+            if segment == CATCH_ALL:
+                node.catch_all = node.catch_all or _Node()
+                node = node.catch_all
+                break
+            if segment == PARAM:
+                node.param = node.param or _Node()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        node.entries.append((self._count, tuple(m.upper() for m in methods), value))
+        self._count += 1
+
+    def _walk(self, node: _Node, segments: Tuple[str, ...], depth: int, out: list, query_is_route: bool):
+        if node.catch_all is not None and depth < len(segments):
+            out.extend(node.catch_all.entries)
+        if depth == len(segments):
+            out.extend(node.entries)
+            return
+        segment = segments[depth]
+        if segment == CATCH_ALL:
+            self._collect_below(node, out)  # the query accepts anything below here
+            return
+        if segment == PARAM:
+            if query_is_route:  # a route parameter accepts whatever the stored calls put there
+                for child in node.children.values():
+                    self._walk(child, segments, depth + 1, out, query_is_route)
+        else:
+            child = node.children.get(segment)
+            if child is not None:
+                self._walk(child, segments, depth + 1, out, query_is_route)
+        # A stored parameter fits a query parameter; a static query segment only fits it when
+        # the stored paths are routes (a stored call's parameter is an unknown value)
+        if node.param is not None and (segment == PARAM or not query_is_route):
+            self._walk(node.param, segments, depth + 1, out, query_is_route)
+
+    def _collect_below(self, node: _Node, out: list):
+        """Entries of every path at least one segment below node"""
+        for child in (*node.children.values(), node.param, node.catch_all):
+            if child is not None:
+                out.extend(child.entries)
+                self._collect_below(child, out)
+
+    def resolve(self, path: str, method: Optional[str] = None, query_is_route: bool = False) -> List:
+        """
+        Values whose path matches path, in insertion order.
+        By default path is a call resolved against stored routes; with query_is_route it is a
+        route resolved against stored calls (its parameters then match any call segment).
+        With a method, entries accepting it win; if none does, every path match is returned
+        (parsed Flask routes often do not record their methods).
+        """
+        segments = split_path(path)
+        if not segments and not path:
+            return []
+        matches = []
+        self._walk(self._root, segments, 0, matches, query_is_route)
+        matches.sort(key=lambda entry: entry[0])
+        if method:
+            method = method.upper()
+            preferred = [entry for entry in matches if not entry[1] or method in entry[1]]
+            if preferred:
+                matches = preferred
+        seen = set()
+        values = []
+        for _, _, value in matches:
+            if value not in seen:
+                seen.add(value)
+                values.append(value)
+        return values
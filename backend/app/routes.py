@@ -1,7 +1,8 @@
 """
 API Routes - All endpoints with error handling
 """
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context, url_for
+import json
 from pathlib import Path
 import re
 from app.search_service import SearchService
@@ -11,6 +12,10 @@ from app.explanation_service import ExplanationService
 from app.contextual_search import ContextualSearch
 from app.hybrid_pipeline_adapter import HybridPipelineAdapter
 from app.code_graph_builder import CodeGraphBuilder
+from app.code_graph import FLOW_PATTERN
+from app.scan_jobs import ScanJobManager, FAILED
+from app import embedding_model
+from app.embedding_cache import DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_ENTRIES
 
 routes_bp = Blueprint("routes", __name__)
 
@@ -22,13 +27,20 @@ explanation_service = None
 contextual_search_engine = None
 hybrid_pipeline_adapter = None
 graph_builder = None
+scan_jobs = None
+
+GRAPH_QUERY_MAX_LIMIT = 1000  # page size cap for the /graph/* query routes
+GRAPH_QUERY_MAX_DEPTH = 10
+GRAPH_LOD_MAX_FILES = 400  # /graph serves file-level aggregates up to this many files, directories beyond
+SEARCH_BATCH_MAX_QUERIES = 1000  # queries per /search/batch request
 
 
 def init_services(app):
     """Initialize services with app config"""
-    global search_service, graph_service, semantic_service, explanation_service, contextual_search_engine, hybrid_pipeline_adapter, graph_builder, graph_builder
-    search_service = SearchService(".", app.config["INDEX_PATH"])
+    global search_service, graph_service, semantic_service, explanation_service, contextual_search_engine, hybrid_pipeline_adapter, graph_builder, graph_builder, scan_jobs
+    search_service = SearchService(".", app.config["INDEX_PATH"], parse_workers=app.config.get("PARSE_WORKERS"))
     search_service.load_index()
+    search_service.load_semantic_index()  # memory-mapped, cheap at startup
     graph_service = GraphService(search_service)
     graph_builder = CodeGraphBuilder(search_service)
     
@@ -36,9 +48,25 @@ def init_services(app):
     semantic_service = SemanticSearchService(
         root_path=".",
         vector_index_file=app.config.get("VECTOR_INDEX_PATH", "vector.index"),
-        bm25_service=search_service  # Enable hybrid search
+        bm25_service=search_service,  # Enable hybrid search
+        parse_workers=app.config.get("PARSE_WORKERS"),
+        embedding_cache_file=app.config.get("EMBEDDING_CACHE_PATH"),
+        embedding_cache_max_age_days=app.config.get("EMBEDDING_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS),
+        embedding_cache_max_entries=app.config.get("EMBEDDING_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+        index_type=app.config.get("VECTOR_INDEX_TYPE", "flat_ip"),
+        nlist=app.config.get("VECTOR_INDEX_NLIST") or None,
+        nprobe=app.config.get("VECTOR_INDEX_NPROBE") or None,
+        ef_search=app.config.get("VECTOR_INDEX_EF_SEARCH") or None,
+        mmap_index=app.config.get("VECTOR_INDEX_MMAP", True)
     )
     semantic_service.load_index()
+    search_service.semantic_service = semantic_service  # one service (and model handle) for both
+    embedding_model.query_cache.configure(
+        max_entries=app.config.get("QUERY_CACHE_SIZE"),
+        ttl_seconds=app.config.get("QUERY_CACHE_TTL")
+    )
+    if app.config.get("WARM_UP_EMBEDDING_MODEL"):
+        embedding_model.warm_up()
     
     # Initialize explanation service
     explanation_service = ExplanationService(semantic_service, search_service)
@@ -56,6 +84,12 @@ def init_services(app):
     
     # Initialize code graph builder
     graph_builder = CodeGraphBuilder(search_service)
+    
+    # Worker pool for /scan and /build_semantic_index (run there even when the request waits for the result)
+    scan_jobs = ScanJobManager(
+        workers=app.config.get("SCAN_WORKERS", 1),
+        max_finished=app.config.get("SCAN_JOBS_KEPT", 50)
+    )
 
 
 @routes_bp.route("/health", methods=["GET"])
@@ -71,13 +105,108 @@ def health():
         "ok": True,
         "status": "healthy",
         "indexed": is_indexed,
-        "file_count": file_count
+        "file_count": file_count,
+        "query_cache": embedding_model.query_cache.stats()
     })
 
 
+def _submit_scan_job(kind, params, fn):
+    """Queue fn(progress) on the scan worker pool, inside this app's context"""
+    app = current_app._get_current_object()
+    
+    def run(progress):
+        with app.app_context():
+            return fn(progress)
+    return scan_jobs.submit(kind, run, params)
+
+
+def _scan_job_response(job, background):
+    """202 with the job to poll when background, else wait for it and answer with its result"""
+    if background:
+        body = job.to_dict()
+        body["status_url"] = url_for("routes.scan_status", job_id=job.id)
+        return jsonify(body), 202
+    job.wait()
+    if job.status == FAILED:
+        return jsonify({"error": job.error}), 500
+    if job.result is None:
+        return jsonify({"error": f"Scan {job.status}", "job_id": job.id}), 409
+    return jsonify(job.result)
+
+
+def _run_scan(root_path, incremental, progress):
+    """
+    Index root_path (BM25, semantic and vector indexes); returns the /scan response body.
+    The new generation, vector index and hybrid pipeline are all built aside, then swapped in
+    back to back, so queries never pair the previous vector index or pipeline with the new
+    generation (or the other way round) while the slower builds run.
+    """
+    changes, generation = search_service.build_generation(incremental=incremental, progress=progress,
+                                                          root_path=root_path)
+    
+    # Also build semantic index if semantic service is available
+    # (the semantic generation is already published on disk by now, so this step is no longer cancelled)
+    semantic_indexed = False
+    semantic_snippets = 0
+    vector = None
+    embedding_cache = {"semantic_index": (search_service.last_semantic_scan or {}).get("embedding_cache")}
+    if semantic_service:
+        try:
+            if generation.metadata and generation.embeddings is not None:
+                # Reuse the components and embeddings from this scan instead of re-parsing
+                vector = semantic_service.build_vector_index_from(generation.metadata, generation.embeddings,
+                                                                  root_path=root_path, publish=False)
+            else:
+                vector = semantic_service.build_vector_index(root_path, publish=False)
+            _, vector_file_map, vector_file, _ = vector
+            semantic_indexed = True
+            semantic_snippets = len(vector_file_map)
+            embedding_cache["vector_index"] = semantic_service.last_cache_stats
+            if vector_file is not None:
+                progress.advance("bytes_written", Path(vector_file).stat().st_size)
+        except Exception as e:
+            current_app.logger.warning(f"Could not build semantic index: {e}")
+    
+    pipeline = None
+    try:
+        if hybrid_pipeline_adapter:
+            pipeline = hybrid_pipeline_adapter.prepare_refresh(generation)
+    except BaseException:
+        if vector is not None:
+            semantic_service.discard_vector_index(vector)
+        raise
+    
+    # Swap everything in together
+    progress.set_stage("swapping")
+    search_service.publish_generation(generation)
+    if vector is not None:
+        semantic_service.publish_vector_index(vector)
+    if pipeline is not None:
+        hybrid_pipeline_adapter.refresh(pipeline)
+    
+    file_count = generation.engine.get_file_count()  # this scan's, even if another one has swapped in since
+    message = f"Indexed {file_count} files"
+    if semantic_indexed:
+        message += f" and {semantic_snippets} code snippets"
+    
+    return {
+        "status": "success",
+        "count": file_count,  # Frontend expects 'count'
+        "files_indexed": file_count,  # Keep for backward compatibility
+        "semantic_indexed": semantic_indexed,
+        "semantic_snippets": semantic_snippets,
+        "changes": changes,
+        "embedding_cache": embedding_cache,
+        "message": message
+    }
+
+
 @routes_bp.route("/scan", methods=["POST"])
 def scan():
-    """Scan and index a codebase"""
+    """
+    Scan and index a codebase.
+    With "background": true answers 202 with a job id right away; poll GET /scan/<job_id>.
+    """
     data = request.get_json()
     if not data or "root_path" not in data:
         return jsonify({"error": "root_path is required"}), 400
@@ -92,38 +221,44 @@ def scan():
         return jsonify({"error": f"Path is not a directory: {root_path}"}), 400
 
     try:
-        search_service.root_path = path
-        search_service.index_codebase()
-        
-        # Also build semantic index if semantic service is available
-        semantic_indexed = False
-        semantic_snippets = 0
-        if semantic_service:
-            try:
-                semantic_service.set_root_path(root_path)
-                semantic_service.build_vector_index()
-                semantic_indexed = True
-                semantic_snippets = semantic_service.file_count()
-            except Exception as e:
-                current_app.logger.warning(f"Could not build semantic index: {e}")
-        
-        message = f"Indexed {search_service.file_count()} files"
-        if semantic_indexed:
-            message += f" and {semantic_snippets} code snippets"
-        
-        return jsonify({
-            "status": "success",
-            "count": search_service.file_count(),  # Frontend expects 'count'
-            "files_indexed": search_service.file_count(),  # Keep for backward compatibility
-            "semantic_indexed": semantic_indexed,
-            "semantic_snippets": semantic_snippets,
-            "message": message
-        })
+        incremental = bool(data.get("incremental", True))
+        job = _submit_scan_job(
+            "scan", {"root_path": root_path, "incremental": incremental},
+            lambda progress: _run_scan(root_path, incremental, progress)
+        )
+        return _scan_job_response(job, bool(data.get("background", False)))
     except Exception as e:
         current_app.logger.error(f"Scan error: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@routes_bp.route("/scan/jobs", methods=["GET"])
+def scan_jobs_list():
+    """Known scan jobs, oldest first"""
+    return jsonify({"jobs": [job.to_dict() for job in scan_jobs.list()]})
+
+
+@routes_bp.route("/scan/<job_id>", methods=["GET"])
+def scan_status(job_id):
+    """State and progress (files walked, parsed, embedded, bytes written) of a scan job"""
+    job = scan_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown scan job: {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+
+@routes_bp.route("/scan/<job_id>", methods=["DELETE"])
+@routes_bp.route("/scan/<job_id>/cancel", methods=["POST"])
+def scan_cancel(job_id):
+    """Cancel a queued or running scan job; the index being served is left as it was"""
+    job = scan_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown scan job: {job_id}"}), 404
+    if job.finished:
+        return jsonify({"error": f"Scan job already {job.status}", **job.to_dict()}), 409
+    return jsonify({"cancel_requested": True, **job.to_dict()})
+
+
 @routes_bp.route("/search", methods=["POST"])
 def search():
     """Search the indexed codebase"""
@@ -170,10 +305,99 @@ def search():
         return jsonify({"error": str(e)}), 500
 
 
+@routes_bp.route("/search/batch", methods=["POST"])
+def search_batch():
+    """Run many searches in one request (same options as /search, applied to every query)"""
+    if not search_service or not search_service.is_indexed():
+        return jsonify({"error": "Codebase not indexed. Call /scan first."}), 400
+
+    data = request.get_json()
+    queries = data.get("queries") if data else None
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": "queries must be a non-empty list"}), 400
+    if len(queries) > SEARCH_BATCH_MAX_QUERIES:
+        return jsonify({"error": f"At most {SEARCH_BATCH_MAX_QUERIES} queries per batch"}), 400
+    if not all(isinstance(query, str) and query.strip() for query in queries):
+        return jsonify({"error": "Queries must be non-empty strings"}), 400
+    queries = [query.strip() for query in queries]
+
+    try:
+        max_results = int(data.get("max_results", 10))
+        use_hybrid = data.get("use_hybrid", True)
+        adaptive = data.get("adaptive", True)
+        semantic_weight = data.get("semantic_weight")  # None = adaptive
+        lexical_weight = data.get("lexical_weight")  # None = adaptive
+        if semantic_weight is not None:
+            semantic_weight = float(semantic_weight)
+        if lexical_weight is not None:
+            lexical_weight = float(lexical_weight)
+
+        batch_results = search_service.search_many(
+            queries,
+            max_results=max_results,
+            use_hybrid=use_hybrid,
+            semantic_weight=semantic_weight,
+            lexical_weight=lexical_weight,
+            adaptive=adaptive
+        )
+
+        return jsonify({
+            "results": [
+                {"query": query, "results": results, "total_matches": len(results)}
+                for query, results in zip(queries, batch_results)
+            ],
+            "count": len(queries),
+            "search_type": "hybrid" if use_hybrid else "semantic"
+        })
+    except Exception as e:
+        current_app.logger.error(f"Batch search error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _ndjson_graph_response(level, code_graph, chunks):
+    """Stream graph chunks as NDJSON: meta line, nodes/edges lines, end line with flow chains and stats"""
+    def generate():
+        yield json.dumps({"kind": "meta", "level": level, "graph_nodes": code_graph.node_count,
+                          "graph_edges": code_graph.edge_count}) + "\n"
+        totals = {"nodes": 0, "edges": 0}
+        try:
+            for kind, chunk in chunks:
+                if kind == "flow_chains":
+                    yield json.dumps({"kind": "end", "flow_chains": chunk, "stats": {
+                        "total_nodes": totals["nodes"],
+                        "total_edges": totals["edges"],
+                        "flow_chains_count": len(chunk)
+                    }}) + "\n"
+                else:
+                    totals[kind] += len(chunk)
+                    yield json.dumps({"kind": kind, kind: chunk}) + "\n"
+        except Exception as e:
+            current_app.logger.error(f"Graph stream error: {e}")
+            yield json.dumps({"kind": "error", "error": str(e)}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @routes_bp.route("/graph", methods=["GET"])
 @routes_bp.route("/api/graph", methods=["GET"])
 def graph():
-    """Get codebase relationship graph - builds actual graph structure from indexed data"""
+    """
+    Get codebase relationship graph - served from the code graph built at scan time.
+    Query parameters (all optional):
+        level     directory | file | symbol. Default: symbol with node/file, else file-level
+                  aggregates, or directory-level ones past GRAPH_LOD_MAX_FILES files.
+                  Aggregate nodes carry an "expand" query for the next level down.
+        node      node id (as returned in "nodes"), symbol name or node index to center a subgraph on
+        file      symbol level: the components of the file at this path (a file node's "file");
+                  aggregate levels: only files whose path contains this text
+        dir       aggregate levels: only files under this directory (path prefix)
+        depth     hops around node/file matches to include (default 1 with node, 0 with file)
+        types     comma-separated edge types (calls_endpoint, handles_event, handles_route,
+                  calls_function, imports)
+        format    json (default) or ndjson: one JSON object per line - "meta", then "nodes" and
+                  "edges" chunks, then "end" with flow chains and stats - streamed as it is built
+        links     0 to leave out the legacy "links" array (a copy of "edges"; JSON format only)
+    """
     if not search_service or not graph_builder:
         return jsonify({"error": "Services not initialized"}), 500
     
@@ -187,15 +411,11 @@ def graph():
     
     try:
         # Get all indexed items from search service
-        all_items = []
-        if hasattr(search_service, 'semantic_index_data') and search_service.semantic_index_data:
-            all_items = search_service.semantic_index_data
-        elif hasattr(search_service, 'engine') and search_service.engine:
-            # Fallback: try to get from BM25 engine if available
-            # This is a simplified approach - in production you'd want a better way
-            pass
-        
-        if not all_items:
+        generation = search_service.generation  # items and graph from the same index generation
+        all_items = generation.metadata or []
+        
+        code_graph = search_service.code_graph_of(generation) if all_items else None
+        if code_graph is None:
             # Return empty graph structure
             return jsonify({
                 "nodes": [],
@@ -204,28 +424,58 @@ def graph():
                 "flow_chains": []
             })
         
-        # Build graph from indexed items
-        graph_data = graph_builder.build_from_search_results(all_items[:50])  # Limit to first 50 for performance
+        node_param = request.args.get("node", "").strip()
+        file_param = request.args.get("file", "").strip()
+        dir_param = request.args.get("dir", "").strip()
+        edge_types = _edge_types_arg()
+        level = request.args.get("level", "").strip().lower()
+        if not level:
+            if node_param or file_param:
+                level = "symbol"
+            else:
+                file_count = graph_builder.count_files(code_graph, dir_param)
+                level = "file" if file_count <= GRAPH_LOD_MAX_FILES else "directory"
+        if level not in ("directory", "file", "symbol"):
+            return jsonify({"error": f"Unknown level: {level}"}), 400
+        streamed = request.args.get("format", "json").lower() == "ndjson"
         
-        # Convert edges to links for compatibility
-        links = []
-        for edge in graph_data.get("edges", []):
-            links.append({
-                "source": edge.get("source"),
-                "target": edge.get("target"),
-                "type": edge.get("type", "related")
-            })
+        if level != "symbol":
+            graph_data = graph_builder.build_aggregate_graph(code_graph, level, file_param, edge_types,
+                                                             directory=dir_param, max_files=GRAPH_LOD_MAX_FILES)
+            if streamed:
+                chunks = [("nodes", graph_data["nodes"]), ("edges", graph_data["edges"]), ("flow_chains", [])]
+                return _ndjson_graph_response(level, code_graph, iter(chunks))
+        else:
+            node_indices = None
+            if node_param or file_param:
+                seeds = graph_builder.find_graph_nodes(code_graph, all_items, node_ref=node_param, file_filter=file_param)
+                node_indices = code_graph.neighborhood(seeds, depth=_depth_arg(1 if node_param else 0),
+                                                       edge_types=edge_types)
+            if streamed:
+                chunks = graph_builder.iter_code_graph(code_graph, all_items, node_indices, edge_types)
+                return _ndjson_graph_response(level, code_graph, chunks)
+            graph_data = graph_builder.build_from_code_graph(code_graph, all_items, node_indices, edge_types)
+            graph_data["level"] = level
         
         result = {
+            "level": level,
             "nodes": graph_data.get("nodes", []),
-            "links": links,  # For compatibility with old frontend
-            "edges": graph_data.get("edges", []),  # New format
+            "edges": graph_data.get("edges", []),
             "flow_chains": graph_data.get("flow_chains", []),
             "stats": graph_data.get("stats", {})
         }
+        if request.args.get("links", "1") != "0":
+            # Legacy format for the old frontend (large graphs can opt out with links=0)
+            result["links"] = [
+                {"source": edge.get("source"), "target": edge.get("target"), "type": edge.get("type", "related")}
+                for edge in result["edges"]
+            ]
         
         current_app.logger.info(f"Returning graph with {len(result.get('nodes', []))} nodes and {len(result.get('edges', []))} edges")
         return jsonify(result)
+    except ValueError as e:
+        # Bad query parameters (depth, types)
+        return jsonify({"error": str(e), "nodes": [], "links": [], "edges": []}), 400
     except Exception as e:
         current_app.logger.error(f"Graph error: {e}")
         import traceback
@@ -233,6 +483,117 @@ def graph():
         return jsonify({"error": str(e), "nodes": [], "links": [], "edges": []}), 500
 
 
+def _graph_query_context():
+    """(code graph, indexed items) for the graph query routes, or (None, error response)"""
+    if not search_service or not graph_builder:
+        return None, (jsonify({"error": "Services not initialized"}), 500)
+    generation = search_service.generation if search_service.is_semantic_indexed_check() else None
+    items = generation.metadata if generation is not None else []
+    code_graph = search_service.code_graph_of(generation) if items else None
+    if code_graph is None:
+        return None, (jsonify({"error": "No code graph. Call /scan first."}), 400)
+    return (code_graph, items), None
+
+
+def _depth_arg(default: int) -> int:
+    """?depth clamped to [0, GRAPH_QUERY_MAX_DEPTH]; ValueError when it is not an integer"""
+    return min(max(int(request.args.get("depth", default)), 0), GRAPH_QUERY_MAX_DEPTH)
+
+
+def _page_args(default_limit: int):
+    offset = max(int(request.args.get("offset", 0)), 0)
+    limit = min(max(int(request.args.get("limit", default_limit)), 1), GRAPH_QUERY_MAX_LIMIT)
+    return offset, limit
+
+
+def _edge_types_arg():
+    types_param = request.args.get("types", "").strip()
+    return {t.strip() for t in types_param.split(",") if t.strip()} or None
+
+
+@routes_bp.route("/graph/neighborhood", methods=["GET"])
+@routes_bp.route("/api/graph/neighborhood", methods=["GET"])
+def graph_neighborhood():
+    """
+    k-hop neighborhood of a node: ?node=<node id|name|index>&depth=2&types=&directed=0
+    Nodes are paginated in BFS order (offset, limit); edges are those among the page's nodes.
+    """
+    context, error = _graph_query_context()
+    if error:
+        return error
+    code_graph, items = context
+    try:
+        seeds = graph_builder.find_graph_nodes(code_graph, items, node_ref=request.args.get("node", "").strip())
+        if not seeds:
+            return jsonify({"error": "Node not found"}), 404
+        depth = _depth_arg(1)
+        offset, limit = _page_args(200)
+        directed = request.args.get("directed", "0") == "1"
+        found = code_graph.neighborhood(seeds, depth=depth, edge_types=_edge_types_arg(),
+                                        max_nodes=offset + limit + 1, directed=directed)
+        page = found[offset:offset + limit]
+        graph_data = graph_builder.build_from_code_graph(code_graph, items, page, _edge_types_arg())
+        graph_data.update({"offset": offset, "limit": limit, "has_more": len(found) > offset + limit})
+        return jsonify(graph_data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@routes_bp.route("/graph/path", methods=["GET"])
+@routes_bp.route("/api/graph/path", methods=["GET"])
+def graph_path():
+    """Shortest path between two symbols: ?source=...&target=...&types=&directed=0&max_depth="""
+    context, error = _graph_query_context()
+    if error:
+        return error
+    code_graph, items = context
+    try:
+        sources = graph_builder.find_graph_nodes(code_graph, items, node_ref=request.args.get("source", "").strip())
+        targets = graph_builder.find_graph_nodes(code_graph, items, node_ref=request.args.get("target", "").strip())
+        if not sources or not targets:
+            return jsonify({"error": "Source or target node not found"}), 404
+        max_depth = request.args.get("max_depth")
+        max_depth = min(int(max_depth), GRAPH_QUERY_MAX_DEPTH) if max_depth else GRAPH_QUERY_MAX_DEPTH
+        directed = request.args.get("directed", "0") == "1"
+        path = code_graph.shortest_path(sources[0], targets[0], edge_types=_edge_types_arg(),
+                                        directed=directed, max_depth=max_depth)
+        if path is None:
+            return jsonify({"found": False, "nodes": [], "edges": [], "length": None})
+        result = graph_builder.describe_graph_steps(code_graph, items, path)
+        result.update({"found": True, "length": len(path) - 1})
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@routes_bp.route("/graph/chains", methods=["GET"])
+@routes_bp.route("/api/graph/chains", methods=["GET"])
+def graph_chains():
+    """
+    Typed chains: ?pattern=button -> handles_event -> function -> calls_endpoint -> route
+    (node types and edge types alternate; "a|b" and "*" allowed), paginated with offset/limit.
+    "truncated" is true when the search hit its work budget before filling the page.
+    """
+    context, error = _graph_query_context()
+    if error:
+        return error
+    code_graph, items = context
+    try:
+        pattern = request.args.get("pattern", "").strip() or FLOW_PATTERN
+        offset, limit = _page_args(50)
+        chains, has_more, truncated = code_graph.match_chains(pattern, offset=offset, limit=limit)
+        return jsonify({
+            "pattern": pattern,
+            "chains": [graph_builder.describe_graph_steps(code_graph, items, chain) for chain in chains],
+            "offset": offset,
+            "limit": limit,
+            "has_more": has_more,
+            "truncated": truncated
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
 @routes_bp.route("/contextual_search", methods=["POST"])
 def contextual_search():
     """Contextual search with relationship graph"""
@@ -388,7 +749,7 @@ def get_file_content():
         return jsonify({"error": "File path is required"}), 400
 
     try:
-        # Get codebase root from search_service
+        # Codebase root of the generation being served (a scan in progress does not move it)
         base_dir = Path(search_service.root_path).resolve() if search_service else Path(".").resolve()
         
         # Normalize the path string - handle Windows paths that lost backslashes
@@ -630,7 +991,7 @@ def semantic_search():
 
 @routes_bp.route("/build_semantic_index", methods=["POST"])
 def build_semantic_index():
-    """Build semantic vector index from codebase"""
+    """Build semantic vector index from codebase ("background": true runs it as a scan job)"""
     if not semantic_service:
         return jsonify({"error": "Semantic service not initialized"}), 500
     
@@ -644,16 +1005,18 @@ def build_semantic_index():
     if not path.is_dir():
         return jsonify({"error": f"Path is not a directory: {root_path}"}), 400
     
-    try:
-        semantic_service.set_root_path(root_path)
-        semantic_service.build_vector_index()
-        semantic_service.save_file_map()
-        
-        return jsonify({
+    def build(progress):
+        semantic_service.build_vector_index(root_path, progress=progress)
+        return {
             "status": "success",
             "files_indexed": semantic_service.file_count(),
+            "embedding_cache": semantic_service.last_cache_stats,
             "message": f"Built vector index for {semantic_service.file_count()} files"
-        })
+        }
+    
+    try:
+        job = _submit_scan_job("semantic_index", {"root_path": root_path}, build)
+        return _scan_job_response(job, bool(data.get("background", False)))
     except Exception as e:
         current_app.logger.error(f"Build semantic index error: {e}")
         import traceback
@@ -0,0 +1,183 @@
+"""
+Scan Jobs - Background indexing jobs with progress and cancellation
+A job runs a scan function on a small worker pool and hands it a ScanProgress, which the
+indexing code advances (files walked, parsed, embedded, bytes written) and checks for a
+cancellation request between steps. The services build each index generation aside and
+swap it in only when it is complete, so queries are served from the previous generation
+until then, and a cancelled or failed job leaves it in place.
+"""
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class ScanCancelled(BaseException):
+    """
+    Raised inside a job when it is cancelled. A BaseException (like asyncio.CancelledError),
+    so the per-file `except Exception` handlers of the indexing code do not swallow it.
+    """
+
+
+class ScanProgress:
+    """Counters a running scan advances, plus its cancellation flag"""
+
+    COUNTERS = ("files_walked", "files_parsed", "components", "embedded", "bytes_written")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self.counts = {name: 0 for name in self.COUNTERS}
+        self.totals = {}  # known totals, e.g. files to parse / texts to embed
+        self.stage = QUEUED
+
+    def set_stage(self, stage: str):
+        self.check_cancelled()
+        self.stage = stage
+
+    def advance(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.counts[counter] += amount
+
+    def set_total(self, counter: str, total: int):
+        with self._lock:
+            self.totals[counter] = total
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Raise ScanCancelled if the job was asked to stop"""
+        if self._cancel.is_set():
+            raise ScanCancelled()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"stage": self.stage, **self.counts, "totals": dict(self.totals)}
+
+
+class ScanJob:
+    """One submitted scan: id, state, progress and (when finished) result or error"""
+
+    def __init__(self, kind: str, params: Optional[Dict] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = QUEUED
+        self.progress = ScanProgress()
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "progress": self.progress.snapshot(),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else 0.0
+        }
+
+
+class ScanJobManager:
+    """
+    Runs scan jobs on a thread pool and keeps their state for polling.
+    With one worker (the default) scans run one after another, since they write the same index files.
+    """
+
+    def __init__(self, workers: int = 1, max_finished: int = 50):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers or 1), thread_name_prefix="scan")
+        self._jobs: Dict[str, ScanJob] = {}
+        self._lock = threading.Lock()
+        self.max_finished = max_finished  # finished jobs kept for polling, oldest dropped first
+
+    def submit(self, kind: str, fn: Callable[[ScanProgress], Dict], params: Optional[Dict] = None) -> ScanJob:
+        """Queue fn(progress) as a job; its return value becomes the job result"""
+        job = ScanJob(kind, params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[ScanJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at)
+
+    def cancel(self, job_id: str) -> Optional[ScanJob]:
+        """
+        Ask a job to stop; a queued job never starts, a running one stops at its next check.
+        Returns the job (None if unknown).
+        """
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.progress.cancel()
+        return job
+
+    def shutdown(self, wait: bool = False):
+        for job in self.list():
+            job.progress.cancel()
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: ScanJob, fn: Callable[[ScanProgress], Dict]):
+        job.started_at = time.time()
+        try:
+            job.progress.check_cancelled()
+            job.status = RUNNING
+            job.progress.stage = RUNNING
+            job.result = fn(job.progress)
+            job.status = SUCCEEDED
+            job.progress.stage = "done"
+        except ScanCancelled:
+            job.status = CANCELLED
+            job.progress.stage = CANCELLED
+            print(f"🛑 Scan job {job.id} cancelled")
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            job.progress.stage = FAILED
+            print(f"❌ Scan job {job.id} failed: {e}")
+            traceback.print_exc()
+        finally:
+            job.finished_at = time.time()
+            job._done.set()
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.finished]
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
@@ -3,6 +3,7 @@ Search Service - Manages indexing, persistence and searching
 Enhanced with semantic parsing and embeddings
 """
 from pathlib import Path
+import copy
 import pickle
 import sys
 import os
@@ -13,38 +14,92 @@ backend_dir = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(backend_dir))
 
 # Import search_engine from parent directory
-from search_engine import SearchEngine
+from search_engine import SearchEngine, load_engine
 from app.code_parser import CodeParser
 from app.semantic_service import SemanticSearchService
-from rank_bm25 import BM25Okapi
+from app.parallel_parser import iter_parsed_files
+from app.embedding_text import build_embedding_text
+from app.embedding_model import encode_query, encode_queries
+from app.bm25_index import BM25Index
+from app import semantic_index_store
+from app.relationship_index import RelationshipIndex
+from app.code_graph import CodeGraph
+from app.index_generation import IndexGeneration
+from app.durable_io import replace_file
+from app.top_k import top_k_indices
 import re
 
 
 class SearchService:
     """Service managing indexing, persistence and searching with semantic capabilities."""
 
-    def __init__(self, root_path: str, index_file: str):
-        self.root_path = Path(root_path)
+    def __init__(self, root_path: str, index_file: str, parse_workers: int = None):
+        self._root_path = Path(root_path)  # until a generation records the root it was built from
         self.index_file = index_file
-        self.engine = None  # BM25 engine (legacy)
+        self.parse_workers = parse_workers  # None = one per CPU
+        # Everything searches read (BM25 engine, semantic metadata, embeddings, BM25 postings),
+        # replaced as one reference; see engine / semantic_index_data / embedding_matrix / bm25
+        self.generation = IndexGeneration()
         
         # New semantic components
         self.parser = CodeParser()
-        self.semantic_index_file = str(Path(index_file).parent / "semantic_index.pkl")
-        self.semantic_index_data = []
+        self.semantic_index_file = str(Path(index_file).parent / "semantic_index.pkl")  # legacy pickle
+        self.semantic_index_dir = str(Path(index_file).parent / "semantic_index")  # memory-mapped format
         self.semantic_service = None  # Will be initialized when needed
         self.is_semantic_indexed = False
+        self.last_semantic_scan = None  # result of the latest scan_semantic (count, index_path, embedding_cache)
         
         # BM25 components for hybrid search
-        self.bm25 = None
         self.tokenized_corpus = []
+    
+    # Fields of the current generation; assigning one swaps in a copy with it changed.
+    # Code reading several of them together should take self.generation once instead.
+    @property
+    def root_path(self) -> Path:
+        """Codebase root of the current generation (the configured root before the first scan); read-only"""
+        return self.generation.root_path or self._root_path
+    
+    @property
+    def engine(self):
+        """BM25 engine (legacy)"""
+        return self.generation.engine
+    
+    @engine.setter
+    def engine(self, engine):
+        self.generation = self.generation.replace(engine=engine)
+    
+    @property
+    def semantic_index_data(self):
+        return self.generation.metadata
+    
+    @semantic_index_data.setter
+    def semantic_index_data(self, metadata):
+        self.generation = self.generation.replace(metadata=metadata)
+    
+    @property
+    def embedding_matrix(self):
+        """float32 (n_items, dim), rows L2-normalized, aligned with semantic_index_data"""
+        return self.generation.embeddings
+    
+    @embedding_matrix.setter
+    def embedding_matrix(self, embeddings):
+        self.generation = self.generation.replace(embeddings=embeddings)
+    
+    @property
+    def bm25(self):
+        return self.generation.bm25
+    
+    @bm25.setter
+    def bm25(self, bm25):
+        self.generation = self.generation.replace(bm25=bm25)
 
     def load_index(self):
         """Load index if exists"""
         if Path(self.index_file).exists():
             try:
                 with open(self.index_file, "rb") as f:
-                    self.engine = pickle.load(f)
+                    engine = load_engine(f)
+                self.generation = self.generation.replace(engine=engine, root_path=engine.root_path)
                 print(f"[OK] Index loaded from {self.index_file}")
                 return True
             except Exception as e:
@@ -60,104 +115,133 @@ class SearchService:
             try:
                 self.semantic_service = SemanticSearchService(
                     root_path=str(self.root_path),
-                    vector_index_file=str(Path(self.index_file).parent / "vector.index")
+                    vector_index_file=str(Path(self.index_file).parent / "vector.index"),
+                    parse_workers=self.parse_workers
                 )
             except Exception as e:
                 print(f"Warning: Could not initialize semantic service: {e}")
                 return False
         return self.semantic_service is not None
     
-    def index_codebase(self):
-        """Index a new codebase with both BM25 and semantic indexing"""
-        # Legacy BM25 indexing
-        self.engine = SearchEngine(self.root_path)
-        self.engine.index_codebase()
-        self.save_index()
+    def index_codebase(self, incremental=True, progress=None, root_path=None):
+        """
+        Index a codebase with both BM25 and semantic indexing (build_generation, then
+        publish_generation). Returns the BM25 engine's change counts (added/updated/removed/unchanged).
+        """
+        changes, generation = self.build_generation(incremental, progress, root_path)
+        self.publish_generation(generation)
+        return changes
+    
+    def build_generation(self, incremental=True, progress=None, root_path=None):
+        """
+        Build the next generation for root_path (default the current root) without serving it.
+        Re-scans of the same root reuse the current engine so only changed files are re-read;
+        the new engine is built on a copy, so searches running meanwhile (or after a cancelled
+        scan) use the previous one.
+        progress: optional ScanProgress (app/scan_jobs.py) for background scans.
+        Returns (change counts, IndexGeneration) for publish_generation.
+        """
+        root = Path(root_path) if root_path is not None else self.root_path
+        current = self.generation
         
-        # New semantic indexing
-        self.scan_semantic()
+        # Legacy BM25 indexing
+        if current.engine is None or current.engine.root_path != root.resolve():
+            engine = SearchEngine(root)
+        else:
+            engine = copy.copy(current.engine)  # index_codebase replaces its structures, never mutates them
+        if progress is not None:
+            progress.set_stage("walking")
+        changes = engine.index_codebase(incremental=incremental, progress=progress)
+        
+        # New semantic indexing, over the files the BM25 walk already found
+        parseable = set(self.parser.supported_ext)
+        file_paths = [p for p in engine.indexed_files if p.suffix.lower() in parseable]
+        self.last_semantic_scan, semantic = self._build_semantic_generation(file_paths, progress, root)
+        
+        self.save_index(engine, progress=progress)
+        return changes, (semantic or current).replace(engine=engine, root_path=engine.root_path)
+    
+    def publish_generation(self, generation: IndexGeneration):
+        """One swap: searches see the generation's engine, semantic index and root together"""
+        self.generation = generation
+        if generation.directory is not None:
+            self.tokenized_corpus = []  # postings are kept on disk
+            self.is_semantic_indexed = True
     
-    def scan_semantic(self):
+    def scan_semantic(self, file_paths=None, progress=None):
         """
         מבצע סריקה חכמה של הקוד (Python / JS / HTML)
         יוצר אינדקס סמנטי עם embeddings עבור כל רכיב קוד
+        file_paths: files to parse; walks root_path when not given
+        progress: optional ScanProgress; the index is written as a new generation and
+        swapped in only once complete (a cancelled scan leaves the current one in place)
+        """
+        root = self.root_path
+        result, semantic = self._build_semantic_generation(file_paths, progress, root)
+        if semantic is not None:
+            self.generation = semantic.replace(engine=self.engine, root_path=root)
+            self.tokenized_corpus = []  # postings are kept on disk
+            self.is_semantic_indexed = True
+        return result
+    
+    def _build_semantic_generation(self, file_paths=None, progress=None, root_path=None):
+        """
+        Parse, embed and publish the next on-disk semantic generation (see scan_semantic).
+        root_path: walked when file_paths is not given (default the current root)
+        Returns (scan result, IndexGeneration mapping it without an engine, or None when nothing was built).
         """
         print("🔍 Scanning codebase for semantic indexing...")
         
         if not self._init_semantic_service():
             print("⚠️ Semantic service not available, skipping semantic indexing")
-            return {"count": 0, "index_path": None}
+            return {"count": 0, "index_path": None}, None
         
         if not self.semantic_service.embedding_model:
             print("⚠️ Embedding model not loaded, skipping semantic indexing")
-            return {"count": 0, "index_path": None}
+            return {"count": 0, "index_path": None}, None
         
         all_items = []
-        ignored_dirs = {'venv', '__pycache__', '.git', 'node_modules', '.venv', 'env'}
         
-        # Walk through all files
-        for root, dirs, files in os.walk(self.root_path):
-            # Skip ignored directories
-            dirs[:] = [d for d in dirs if d not in ignored_dirs]
-            
-            for fname in files:
-                ext = os.path.splitext(fname)[1].lower()
-                if ext not in self.parser.supported_ext:
-                    continue
+        if file_paths is None:
+            # Walk through all files (sorted, so the parallel parse output is deterministic)
+            file_paths = []
+            for root, dirs, files in os.walk(root_path or self.root_path):
+                # Skip ignored directories (same set as the BM25 engine)
+                dirs[:] = sorted(d for d in dirs if d not in SearchEngine.IGNORE_DIRS)
                 
-                fpath = Path(root) / fname
-                try:
-                    parsed = self.parser.parse_file(fpath)
-                    if parsed:
-                        all_items.extend(parsed)
-                except Exception as e:
-                    print(f"⚠️ Error parsing {fpath}: {e}")
-                    continue
+                for fname in sorted(files):
+                    ext = os.path.splitext(fname)[1].lower()
+                    if ext in self.parser.supported_ext:
+                        file_paths.append(Path(root) / fname)
+        
+        # Parse in worker processes; results stream back in file order
+        if progress is not None:
+            progress.set_stage("parsing")
+            progress.set_total("files_parsed", len(file_paths))
+        for fpath, parsed in iter_parsed_files(file_paths, workers=self.parse_workers):
+            if progress is not None:
+                progress.check_cancelled()
+                progress.advance("files_parsed")
+            if parsed:
+                all_items.extend(parsed)
         
         print(f"✅ Extracted {len(all_items)} code components")
+        if progress is not None:
+            progress.advance("components", len(all_items))
         
         if not all_items:
             print("⚠️ No code components found")
-            return {"count": 0, "index_path": None}
+            return {"count": 0, "index_path": None}, None
         
         # Create embeddings and BM25 tokens for each component
         print("📊 Generating embeddings and BM25 tokens...")
-        enriched = []
         tokenized_corpus = []  # For BM25
         
         # Prepare texts for batch encoding
         texts_for_embedding = []
         for item in all_items:
-            # Build text for embedding (same format as semantic_service)
-            text = f"{item.get('type', 'code')}: {item.get('name', '')}\n"
-            if item.get('docstring'):
-                text += f"Description: {item['docstring']}\n"
-            elif item.get('context'):
-                text += f"{item['context']}\n"
-            
-            # Add context: API calls
-            api_calls = item.get('api_calls', [])
-            if api_calls:
-                api_info = ", ".join([f"{ac.get('method', 'GET')} {ac.get('endpoint', '')}" 
-                                     for ac in api_calls[:3]])
-                text += f"API calls: {api_info}\n"
-            
-            # Add context: Event listeners
-            event_listeners = item.get('event_listeners', [])
-            if event_listeners:
-                event_info = ", ".join([f"{el.get('event', '')} -> {el.get('handler', '')}" 
-                                       for el in event_listeners[:3]])
-                text += f"Events: {event_info}\n"
-            
-            # Add context: Routes
-            routes = item.get('routes', [])
-            if routes:
-                route_info = ", ".join([f"{r.get('method', 'GET')} {r.get('path', '')}" 
-                                       for r in routes[:3]])
-                text += f"Routes: {route_info}\n"
-            
-            # Add code
-            text += f"\nCode:\n{item.get('code', '')[:500]}"  # First 500 chars
+            # Build text for embedding (shared with semantic_service and the hybrid pipeline)
+            text = build_embedding_text(item)
             
             texts_for_embedding.append(text)
             
@@ -166,96 +250,249 @@ class SearchService:
             tokenized_corpus.append(tokens)
         
         # Batch encode for efficiency
+        generation_dir = None
         try:
-            embeddings = self.semantic_service.embedding_model.encode(
-                texts_for_embedding, 
-                convert_to_numpy=True,
-                show_progress_bar=True
-            )
+            # Only texts not already in the embedding cache are encoded
+            embeddings, cache_stats = self._encode_texts(texts_for_embedding, progress)
+            print(f"♻️ Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} encoded")
+            self.semantic_service.prune_embedding_cache()
             
-            # Combine items with embeddings
-            for item, embedding in zip(all_items, embeddings):
-                item["embedding"] = embedding.tolist()  # Convert to list for pickle
-                enriched.append(item)
+            # Embeddings live in one matrix next to the metadata, not on the items
+            enriched = all_items
+            embedding_matrix = self._normalize_embeddings(embeddings)
             
             # Build BM25 index
-            self.bm25 = BM25Okapi(tokenized_corpus)
-            self.tokenized_corpus = tokenized_corpus
-            
-            # Save to index (include BM25 corpus)
-            with open(self.semantic_index_file, "wb") as f:
-                pickle.dump({
-                    "data": enriched,
-                    "corpus": tokenized_corpus
-                }, f)
+            bm25 = BM25Index(tokenized_corpus)
+            code_graph = CodeGraph.build(enriched)
             
-            self.semantic_index_data = enriched
-            self.is_semantic_indexed = True
-            print(f"💾 Semantic index saved to {self.semantic_index_file}")
+            # Save to a new generation, then serve from its memory-mapped files instead of the Python objects
+            if progress is not None:
+                progress.set_stage("writing")
+            generation_dir = semantic_index_store.new_generation_dir(self.semantic_index_dir)
+            semantic_index_store.write_semantic_index(generation_dir, enriched, embedding_matrix, bm25)
+            code_graph.save(generation_dir)
+            if progress is not None:
+                progress.advance("bytes_written", semantic_index_store.directory_size(generation_dir))
+                progress.set_stage("swapping")
+            published_dir = semantic_index_store.publish_generation(self.semantic_index_dir, generation_dir)
+            generation_dir = None  # published, no longer ours to discard
+            semantic = self._map_semantic_generation(published_dir, code_graph=code_graph, records=enriched)
+            print(f"🕸️ Code graph: {code_graph.node_count} nodes, {code_graph.edge_count} edges")
+            print(f"💾 Semantic index saved to {self.semantic_index_dir}")
             print(f"✅ Indexed {len(enriched)} code components with embeddings and BM25 tokens")
             
             return {
                 "count": len(enriched),
-                "index_path": self.semantic_index_file
-            }
+                "index_path": self.semantic_index_dir,
+                "embedding_cache": cache_stats
+            }, semantic
         except Exception as e:
             print(f"❌ Error generating embeddings: {e}")
             import traceback
             traceback.print_exc()
-            return {"count": 0, "index_path": None}
+            return {"count": 0, "index_path": None}, None
+        finally:
+            if generation_dir is not None:
+                semantic_index_store.discard_generation(generation_dir)
+    
+    EMBED_PROGRESS_BATCH = 1024  # texts per encode call when a scan reports progress
+    
+    def _encode_texts(self, texts, progress=None):
+        """
+        semantic_service.encode_texts, in batches that advance progress (and can be cancelled
+        between) when one is given. Returns (embeddings, embedding cache stats).
+        """
+        if progress is None:
+            embeddings = self.semantic_service.encode_texts(texts)
+            return embeddings, self.semantic_service.last_cache_stats
+        
+        progress.set_stage("embedding")
+        progress.set_total("embedded", len(texts))
+        parts, hits, misses = [], 0, 0
+        for start in range(0, len(texts), self.EMBED_PROGRESS_BATCH):
+            progress.check_cancelled()
+            batch = texts[start:start + self.EMBED_PROGRESS_BATCH]
+            parts.append(np.asarray(self.semantic_service.encode_texts(batch, show_progress_bar=False),
+                                    dtype=np.float32))
+            hits += self.semantic_service.last_cache_stats["hits"]
+            misses += self.semantic_service.last_cache_stats["misses"]
+            progress.advance("embedded", len(batch))
+        cache_stats = {"hits": hits, "misses": misses, "hit_rate": round(hits / len(texts), 4) if texts else 0.0}
+        return np.concatenate(parts), cache_stats
 
-    def save_index(self):
-        """Save BM25 index to disk"""
-        if self.engine:
+    def save_index(self, engine=None, progress=None):
+        """
+        Save BM25 index (engine, default the current one) to disk; written aside, fsynced and
+        renamed, so a crash or a concurrent load never sees a partial file
+        """
+        engine = engine or self.engine
+        if engine:
             try:
-                with open(self.index_file, "wb") as f:
-                    pickle.dump(self.engine, f)
+                tmp_file = f"{self.index_file}.tmp"
+                with open(tmp_file, "wb") as f:
+                    pickle.dump(engine, f)
+                replace_file(tmp_file, self.index_file)
+                if progress is not None:
+                    progress.advance("bytes_written", os.path.getsize(self.index_file))
                 print(f"[OK] Index saved to {self.index_file}")
             except Exception as e:
                 print(f"[WARN] Error saving index: {e}")
 
+    @staticmethod
+    def _normalize_embeddings(embeddings) -> np.ndarray:
+        """Stack embeddings into a contiguous float32 matrix with unit-length rows"""
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+    
+    def _embedding_matrix_from_items(self, items) -> np.ndarray:
+        """Build the matrix from legacy items that carry their own 'embedding' list"""
+        dim = next((len(item["embedding"]) for item in items if item.get("embedding")), 0)
+        matrix = np.zeros((len(items), dim), dtype=np.float32)
+        for row, item in enumerate(items):
+            embedding = item.pop("embedding", None)
+            if embedding:
+                matrix[row] = embedding
+        return self._normalize_embeddings(matrix)
+    
+    def _encode_query(self, query: str):
+        """Encode a query into a unit-length float32 vector (None on failure)"""
+        try:
+            query_vector = encode_query(query, self.semantic_service.embedding_model_id)
+        except Exception as e:
+            print(f"⚠️ Error encoding query: {e}")
+            return None
+        norm = np.linalg.norm(query_vector)
+        return query_vector / norm if norm > 0 else query_vector
+    
     def _tokenize_for_bm25(self, text: str) -> list:
         """Tokenize text for BM25 indexing"""
         # Split on whitespace and common code delimiters
         tokens = re.findall(r'\b\w+\b', text.lower())
         return tokens
     
+    @property
+    def relationship_index(self):
+        """Relationship lookups for GraphService.find_related, built at scan time or on first use after a load"""
+        generation = self.generation
+        if not generation.metadata:
+            return None
+        if generation.relationship_index is None or generation.relationship_index.items is not generation.metadata:
+            generation.relationship_index = RelationshipIndex(generation.metadata)
+        return generation.relationship_index
+    
+    @property
+    def code_graph(self):
+        """
+        Whole-repository graph for /graph: built and saved at scan time, mapped from disk
+        after a load (rebuilt when missing or out of date with the index)
+        """
+        return self.code_graph_of(self.generation)
+    
+    def code_graph_of(self, generation: IndexGeneration):
+        """code_graph of a given generation (for callers that also read its metadata)"""
+        if not generation.metadata:
+            return None
+        if generation.code_graph is not None and generation.code_graph.node_count == len(generation.metadata):
+            return generation.code_graph
+        generation_dir = generation.directory
+        on_disk = generation_dir is not None and semantic_index_store.has_semantic_index(generation_dir)
+        if on_disk and CodeGraph.exists(generation_dir):
+            try:
+                graph = CodeGraph.load(generation_dir)
+                if graph.node_count == len(generation.metadata):
+                    generation.code_graph = graph
+                    return graph
+            except Exception as e:
+                print(f"⚠️ Error loading code graph, rebuilding: {e}")
+        generation.code_graph = CodeGraph.build(generation.metadata)
+        if on_disk and isinstance(generation.metadata, semantic_index_store.MetadataStore):
+            generation.code_graph.save(generation_dir)
+        return generation.code_graph
+    
+    def _map_semantic_generation(self, generation_dir=None, code_graph=None, records=None) -> IndexGeneration:
+        """
+        Map an on-disk semantic generation (metadata, embeddings, BM25 postings; default the
+        current one) as an IndexGeneration without an engine.
+        code_graph / records: already built for this generation by scan_semantic
+        """
+        if generation_dir is None:
+            generation_dir = semantic_index_store.current_generation_dir(self.semantic_index_dir)
+        metadata, embeddings, bm25 = semantic_index_store.load_semantic_index(generation_dir)
+        return IndexGeneration(
+            metadata=metadata,
+            embeddings=embeddings,
+            bm25=bm25,
+            directory=str(generation_dir),
+            relationship_index=RelationshipIndex(metadata, records=records) if records is not None else None,
+            code_graph=code_graph  # None: mapped again from the generation directory on first use
+        )
+    
+    def _open_semantic_index(self):
+        """Map the current on-disk semantic generation into this service, next to the current engine"""
+        current = self.generation
+        self.generation = self._map_semantic_generation().replace(engine=current.engine,
+                                                                  root_path=current.root_path)
+        self.tokenized_corpus = []  # postings are kept on disk
+        self.is_semantic_indexed = True
+    
     def load_semantic_index(self):
         """טעינת אינדקס סמנטי קיים"""
+        if semantic_index_store.has_semantic_index(self.semantic_index_dir):
+            try:
+                self._open_semantic_index()
+                print(f"📦 Mapped semantic index with {len(self.semantic_index_data)} items.")
+                return True
+            except Exception as e:
+                print(f"⚠️ Error loading semantic index: {e}")
+                return False
+        
         if not Path(self.semantic_index_file).exists():
-            print("⚠️ No semantic_index.pkl found. Run scan_semantic() first.")
+            print("⚠️ No semantic index found. Run scan_semantic() first.")
             return False
         
+        # Legacy semantic_index.pkl
         try:
             with open(self.semantic_index_file, "rb") as f:
                 payload = pickle.load(f)
                 
+                bm25 = self.bm25
                 # Handle both old format (list) and new format (dict with data and corpus)
                 if isinstance(payload, dict) and "data" in payload:
-                    self.semantic_index_data = payload["data"]
-                    self.tokenized_corpus = payload.get("corpus", [])
+                    data = payload["data"]
+                    tokenized_corpus = payload.get("corpus", [])
+                    if payload.get("embeddings") is not None:
+                        embedding_matrix = payload["embeddings"]
+                    else:
+                        embedding_matrix = self._embedding_matrix_from_items(data)
                     # Rebuild BM25 index
-                    if self.tokenized_corpus:
-                        self.bm25 = BM25Okapi(self.tokenized_corpus)
+                    if tokenized_corpus:
+                        bm25 = BM25Index(tokenized_corpus)
                 else:
                     # Old format - just a list
-                    self.semantic_index_data = payload
-                    self.tokenized_corpus = []
+                    data = payload
+                    embedding_matrix = self._embedding_matrix_from_items(data)
+                    tokenized_corpus = []
                     # Rebuild corpus from data
-                    for item in self.semantic_index_data:
+                    for item in data:
                         # Reconstruct text for tokenization
                         text = f"{item.get('type', 'code')}: {item.get('name', '')}\n"
                         if item.get('docstring'):
                             text += f"{item['docstring']}\n"
                         text += item.get('code', '')
-                        self.tokenized_corpus.append(self._tokenize_for_bm25(text))
-                    if self.tokenized_corpus:
-                        self.bm25 = BM25Okapi(self.tokenized_corpus)
+                        tokenized_corpus.append(self._tokenize_for_bm25(text))
+                    if tokenized_corpus:
+                        bm25 = BM25Index(tokenized_corpus)
             
+            self.generation = self.generation.replace(metadata=data, embeddings=embedding_matrix, bm25=bm25,
+                                                      directory=None)
+            self.tokenized_corpus = tokenized_corpus
             self.is_semantic_indexed = True
             print(f"📦 Loaded semantic index with {len(self.semantic_index_data)} items.")
             if self.bm25:
-                print(f"📦 BM25 index ready with {len(self.tokenized_corpus)} tokenized documents.")
+                print(f"📦 BM25 index ready with {len(self.bm25)} documents.")
             return True
         except Exception as e:
             print(f"⚠️ Error loading semantic index: {e}")
@@ -326,19 +563,16 @@ class SearchService:
         Returns:
             רשימת תוצאות מדורגות לפי ציון משולב
         """
-        # Calculate adaptive weights if needed
-        if adaptive and (semantic_weight is None or lexical_weight is None):
-            semantic_weight, lexical_weight = self._calculate_adaptive_weights(query)
-        
         if not self.is_semantic_indexed or len(self.semantic_index_data) == 0:
             loaded = self.load_semantic_index()
             if not loaded:
                 return []
         
-        if not self.semantic_index_data:
+        generation = self.generation  # one snapshot for the whole query
+        if not generation.metadata:
             return []
         
-        if not self.bm25 or not self.tokenized_corpus:
+        if not generation.bm25:
             print("⚠️ BM25 index not available, falling back to semantic search only")
             return self.search_semantic(query, max_results)
         
@@ -348,11 +582,7 @@ class SearchService:
         if not self.semantic_service.embedding_model:
             return []
         
-        # Normalize weights
-        total_weight = semantic_weight + lexical_weight
-        if total_weight > 0:
-            semantic_weight = semantic_weight / total_weight
-            lexical_weight = lexical_weight / total_weight
+        semantic_weight, lexical_weight = self._hybrid_weights(query, semantic_weight, lexical_weight, adaptive)
         
         # 1. BM25 scores
         query_tokens = self._tokenize_for_bm25(query)
@@ -360,33 +590,30 @@ class SearchService:
             # If query can't be tokenized, use semantic only
             return self.search_semantic(query, max_results)
         
-        bm25_scores = self.bm25.get_scores(query_tokens)
+        bm25_scores = generation.bm25.get_scores(query_tokens)
         
-        # 2. Semantic scores
-        try:
-            query_vector = self.semantic_service.embedding_model.encode(
-                [query], 
-                convert_to_numpy=True
-            )[0]
-        except Exception as e:
-            print(f"⚠️ Error encoding query: {e}")
+        # 2. Semantic scores - cosine similarity as one matrix-vector product
+        query_vector = self._encode_query(query)
+        if query_vector is None:
             return []
         
-        semantic_scores = []
-        for item in self.semantic_index_data:
-            if "embedding" not in item:
-                semantic_scores.append(0.0)
-                continue
-            
-            embedding = np.array(item["embedding"])
-            # Cosine similarity
-            similarity = np.dot(query_vector, embedding) / (
-                np.linalg.norm(query_vector) * np.linalg.norm(embedding)
-            )
-            semantic_scores.append(float(similarity))
-        
-        semantic_scores = np.array(semantic_scores)
+        semantic_scores = generation.embeddings @ query_vector
         
+        return self._rank_hybrid(generation.metadata, bm25_scores, semantic_scores, semantic_weight, lexical_weight,
+                                 max_results)
+    
+    def _hybrid_weights(self, query: str, semantic_weight, lexical_weight, adaptive: bool) -> tuple:
+        """(semantic, lexical) weights for a query: adaptive when not given, normalized to sum to 1"""
+        if adaptive and (semantic_weight is None or lexical_weight is None):
+            semantic_weight, lexical_weight = self._calculate_adaptive_weights(query)
+        total_weight = semantic_weight + lexical_weight
+        if total_weight > 0:
+            semantic_weight = semantic_weight / total_weight
+            lexical_weight = lexical_weight / total_weight
+        return semantic_weight, lexical_weight
+    
+    def _rank_hybrid(self, items, bm25_scores, semantic_scores, semantic_weight, lexical_weight, max_results):
+        """Fuse one query's BM25 and cosine score vectors over items and format the best max_results"""
         # 3. Normalize scores to 0-1 range
         # BM25 normalization
         bm25_min = np.min(bm25_scores)
@@ -410,12 +637,12 @@ class SearchService:
         combined_scores = semantic_weight * sem_norm + lexical_weight * bm25_norm
         
         # 5. Rank and get top results
-        ranked_indices = np.argsort(combined_scores)[::-1][:max_results]
+        ranked_indices = top_k_indices(combined_scores, max_results)
         
         # 6. Format results
         formatted_results = []
         for idx in ranked_indices:
-            item = self.semantic_index_data[idx]
+            item = items[idx]
             formatted_results.append({
                 "score": round(float(combined_scores[idx]), 3),
                 "semantic_score": round(float(sem_norm[idx]), 3),
@@ -438,6 +665,59 @@ class SearchService:
         
         return formatted_results
     
+    # Queries scored together by search_many, bounded so the score matrices stay around 100 MB
+    SEARCH_BATCH_MAX_QUERIES = 64
+    SEARCH_BATCH_MAX_CELLS = 1 << 23
+    
+    def search_many(self, queries, max_results=10, use_hybrid=True, semantic_weight=0.6, lexical_weight=0.4,
+                    adaptive=True):
+        """
+        search() for many queries at once: one list of results per query, in order.
+        Hybrid queries are encoded in one batched call, scored against the embedding matrix as one
+        matrix product and against BM25 postings shared between queries; queries the batch path
+        cannot serve (no hybrid index, no BM25 tokens) go through search() one by one.
+        """
+        results = [None] * len(queries)  # None until the batch path has served the query
+        batch = []  # (position, query, bm25 tokens)
+        if use_hybrid and self._hybrid_ready():
+            for position, query in enumerate(queries):
+                query_tokens = self._tokenize_for_bm25(query)
+                if query_tokens:
+                    batch.append((position, query, query_tokens))
+        
+        generation = self.generation  # every query of the batch is scored against the same snapshot
+        rows_per_chunk = max(1, min(self.SEARCH_BATCH_MAX_QUERIES,
+                                    self.SEARCH_BATCH_MAX_CELLS // max(len(generation.metadata), 1)))
+        for start in range(0, len(batch), rows_per_chunk):
+            chunk = batch[start:start + rows_per_chunk]
+            try:
+                query_vectors = encode_queries([query for _, query, _ in chunk],
+                                               self.semantic_service.embedding_model_id)
+            except Exception as e:
+                print(f"⚠️ Error encoding queries: {e}")
+                continue
+            query_vectors = self._normalize_embeddings(query_vectors)
+            semantic_scores = query_vectors @ generation.embeddings.T
+            bm25_scores = generation.bm25.get_scores_many([tokens for _, _, tokens in chunk])
+            for row, (position, query, _) in enumerate(chunk):
+                weights = self._hybrid_weights(query, semantic_weight, lexical_weight, adaptive)
+                results[position] = self._rank_hybrid(generation.metadata, bm25_scores[row], semantic_scores[row],
+                                                      *weights, max_results)
+        
+        for position, query in enumerate(queries):
+            if results[position] is None:
+                results[position] = self.search(query, max_results, use_hybrid, semantic_weight, lexical_weight,
+                                                adaptive)
+        return results
+    
+    def _hybrid_ready(self) -> bool:
+        """The semantic index, BM25 and the embedding model are all available (see hybrid_search)"""
+        if not self.is_semantic_indexed or len(self.semantic_index_data) == 0:
+            if not self.load_semantic_index():
+                return False
+        return bool(self.semantic_index_data) and self.bm25 is not None and \
+            self._init_semantic_service() and self.semantic_service.embedding_model is not None
+    
     def search_semantic(self, query: str, max_results: int = 10):
         """
         חיפוש סמנטי בלבד (בהמשך נוסיף שילוב עם BM25)
@@ -447,7 +727,8 @@ class SearchService:
             if not loaded:
                 return []
         
-        if not self.semantic_index_data:
+        generation = self.generation  # one snapshot for the whole query
+        if not generation.metadata:
             return []
         
         if not self._init_semantic_service():
@@ -457,30 +738,14 @@ class SearchService:
             return []
         
         # Encode query
-        try:
-            query_vector = self.semantic_service.embedding_model.encode(
-                [query], 
-                convert_to_numpy=True
-            )[0]
-        except Exception as e:
-            print(f"⚠️ Error encoding query: {e}")
+        query_vector = self._encode_query(query)
+        if query_vector is None:
             return []
         
-        # Calculate cosine similarity between query and all components
-        results = []
-        for item in self.semantic_index_data:
-            if "embedding" not in item:
-                continue
-            
-            embedding = np.array(item["embedding"])
-            # Cosine similarity
-            similarity = np.dot(query_vector, embedding) / (
-                np.linalg.norm(query_vector) * np.linalg.norm(embedding)
-            )
-            results.append((similarity, item))
-        
-        # Sort by similarity and take top results
-        results = sorted(results, key=lambda x: x[0], reverse=True)[:max_results]
+        # Cosine similarity against all components in one matrix-vector product
+        similarities = generation.embeddings @ query_vector
+        top_indices = top_k_indices(similarities, max_results)
+        results = [(similarities[idx], generation.metadata[idx]) for idx in top_indices]
         
         # Format results
         formatted_results = []
@@ -503,6 +768,40 @@ class SearchService:
         
         return formatted_results
 
+    def search_lexical(self, query: str, max_results: int = 10):
+        """
+        BM25 only, over the components of the semantic index (no embedding work).
+        The lexical pass of SemanticSearchService's hybrid fusion.
+        """
+        if not self.is_semantic_indexed or len(self.semantic_index_data) == 0:
+            loaded = self.load_semantic_index()
+            if not loaded:
+                return []
+
+        generation = self.generation  # one snapshot for the whole query
+        if not generation.bm25 or not generation.metadata:
+            return []
+
+        query_tokens = self._tokenize_for_bm25(query)
+        if not query_tokens:
+            return []
+
+        formatted_results = []
+        for idx, score in generation.bm25.top_k(query_tokens, max_results):
+            item = generation.metadata[idx]
+            formatted_results.append({
+                "score": round(score, 3),
+                "file_path": item.get("file_path", ""),
+                "name": item.get("name", ""),
+                "full_name": item.get("full_name", item.get("name", "")),
+                "type": item.get("type", "code"),
+                "start_line": item.get("start_line", None),
+                "end_line": item.get("end_line", None),
+                "code": item.get("code", "")[:500]  # Same preview length as the vector index snippets
+            })
+
+        return formatted_results
+
     def get_graph(self):
         """Return relationship graph"""
         if not self.engine:
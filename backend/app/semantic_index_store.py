@@ -0,0 +1,199 @@
+"""
+Semantic Index Store - Versioned, memory-mapped on-disk format for the semantic index
+
+Layout of an index directory (format version 1):
+    manifest.json         format version, item count, embedding dimension
+    embeddings.npy        float32 (n_items, dim) with L2-normalized rows, opened with mmap_mode="r"
+    metadata.bin          UTF-8 JSON records (one per parsed item), concatenated
+    metadata_offsets.npy  int64 (n_items + 1) byte offsets of each record in metadata.bin
+    bm25_*.npy, bm25_meta.json  BM25 postings (see BM25Index.save)
+
+Loading maps the files instead of unpickling them, so a server is ready in
+milliseconds and worker processes share the same pages.
+
+Scans write each index into a temporary directory (.tmp-gen-<n>) under the index
+directory, fsync it, rename it to gen-<n> and then point CURRENT at it (written aside
+and renamed, so the switch is atomic); files a running server has mapped are never
+rewritten in place. Older generations are garbage-collected after a publish, keeping
+the previous one for processes that have not switched yet. An index directory without
+CURRENT is read as a single generation (the layout before generations).
+"""
+import json
+import mmap
+import os
+import shutil
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.bm25_index import BM25Index
+from app.durable_io import fsync_directory, fsync_tree, write_atomic
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.bin"
+OFFSETS_FILE = "metadata_offsets.npy"
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+TMP_PREFIX = ".tmp-"
+KEEP_PREVIOUS_GENERATIONS = 1
+STALE_TMP_SECONDS = 3600  # unpublished temp directories older than this are left over from a crash
+
+
+class MetadataStore(Sequence):
+    """
+    Read-only, offset-addressed sequence of item dicts backed by metadata.bin.
+    Records are decoded on access; nothing is held in memory but the mapping.
+    """
+
+    def __init__(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        self._offsets = np.load(index_dir / OFFSETS_FILE, mmap_mode="r")
+        with open(index_dir / METADATA_FILE, "rb") as f:
+            if int(self._offsets[-1]) > 0:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._buffer = b""  # mmap cannot map an empty file
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _record(self, index: int) -> Dict:
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return json.loads(self._buffer[start:end].decode("utf-8"))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("metadata index out of range")
+        return self._record(index)
+
+
+def write_semantic_index(index_dir: Path, items: List[Dict], embeddings: np.ndarray, bm25: BM25Index):
+    """Write items, their embedding matrix and BM25 postings in the versioned format"""
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    offsets = np.zeros(len(items) + 1, dtype=np.int64)
+    with open(index_dir / METADATA_FILE, "wb") as f:
+        for i, item in enumerate(items):
+            record = json.dumps(item, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+            f.write(record)
+            offsets[i + 1] = offsets[i] + len(record)
+    np.save(index_dir / OFFSETS_FILE, offsets)
+
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    np.save(index_dir / EMBEDDINGS_FILE, embeddings)
+    bm25.save(index_dir)
+
+    # Manifest last: its presence marks a complete index
+    with open(index_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": FORMAT_VERSION,
+            "count": len(items),
+            "dim": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0
+        }, f)
+
+
+def current_generation_dir(index_dir: Path) -> Path:
+    """Directory of the generation being served: the one CURRENT names, else index_dir itself"""
+    index_dir = Path(index_dir)
+    try:
+        name = (index_dir / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return index_dir
+    return index_dir / name if name else index_dir
+
+
+def new_generation_dir(index_dir: Path) -> Path:
+    """Create an empty temporary directory for the next generation (names sort by creation time)"""
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    while True:
+        tmp_dir = index_dir / f"{TMP_PREFIX}{GENERATION_PREFIX}{time.time_ns():020d}"
+        try:
+            tmp_dir.mkdir()
+            return tmp_dir
+        except FileExistsError:
+            continue
+
+
+def publish_generation(index_dir: Path, tmp_dir: Path) -> Path:
+    """
+    Make a fully written temporary directory the generation served from index_dir:
+    fsync its files, rename it to gen-<n>, atomically switch CURRENT to it, then
+    collect old generations. Returns the published directory.
+    """
+    index_dir = Path(index_dir)
+    tmp_dir = Path(tmp_dir)
+    fsync_tree(tmp_dir)
+    generation_dir = index_dir / tmp_dir.name[len(TMP_PREFIX):]
+    os.rename(tmp_dir, generation_dir)
+    fsync_directory(index_dir)
+    write_atomic(index_dir / CURRENT_FILE, generation_dir.name.encode("utf-8"))
+    collect_garbage(index_dir)
+    return generation_dir
+
+
+def discard_generation(tmp_dir: Path):
+    """Remove a generation that was never published (cancelled or failed scan)"""
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def collect_garbage(index_dir: Path, keep_previous: int = KEEP_PREVIOUS_GENERATIONS):
+    """
+    Remove generations older than the current one beyond keep_previous, and temporary
+    directories a crashed scan left behind. Readers that still map a removed generation
+    keep their pages (where the OS refuses to delete mapped files, it is retried next time).
+    """
+    index_dir = Path(index_dir)
+    current = current_generation_dir(index_dir)
+    if current == index_dir:
+        return
+    older = sorted((path for path in index_dir.glob(f"{GENERATION_PREFIX}*")
+                    if path.is_dir() and path.name < current.name), reverse=True)
+    stale = [path for path in index_dir.glob(f"{TMP_PREFIX}*")
+             if path.is_dir() and time.time() - path.stat().st_mtime > STALE_TMP_SECONDS]
+    for old in older[keep_previous:] + stale:
+        try:
+            shutil.rmtree(old)
+        except OSError as e:
+            print(f"⚠️ Could not remove old index generation {old.name}: {e}")
+
+
+def directory_size(directory: Path) -> int:
+    """Total size in bytes of the files directly in directory"""
+    return sum(path.stat().st_size for path in Path(directory).iterdir() if path.is_file())
+
+
+def has_semantic_index(index_dir: Path) -> bool:
+    """Check whether index_dir holds a complete index"""
+    return (current_generation_dir(index_dir) / MANIFEST_FILE).exists()
+
+
+def load_semantic_index(index_dir: Path) -> Tuple[MetadataStore, np.ndarray, BM25Index]:
+    """
+    Open an index written by write_semantic_index (the current generation of index_dir).
+    Returns (metadata, memory-mapped embedding matrix, BM25 index).
+    """
+    index_dir = current_generation_dir(index_dir)
+    with open(index_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported semantic index version {manifest.get('version')} (expected {FORMAT_VERSION})"
+        )
+
+    metadata = MetadataStore(index_dir)
+    embeddings = np.load(index_dir / EMBEDDINGS_FILE, mmap_mode="r")
+    bm25 = BM25Index.load(index_dir)
+    if len(metadata) != manifest["count"] or embeddings.shape[0] != manifest["count"]:
+        raise ValueError(f"Semantic index at {index_dir} is inconsistent with its manifest")
+    return metadata, embeddings, bm25
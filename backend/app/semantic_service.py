@@ -4,7 +4,7 @@ Semantic Search Service - Vector-based semantic search using embeddings
 # SSL Bypass - MUST be before any imports
 # ⚠️ WARNING: This disables SSL certificate verification (NOT recommended for production)
 # This forces all modules (requests, urllib3, huggingface_hub) to ignore SSL certificates
-import os, ssl
+import os, ssl, tempfile, time
 os.environ['CURL_CA_BUNDLE'] = ''
 os.environ['REQUESTS_CA_BUNDLE'] = ''
 ssl._create_default_https_context = ssl._create_unverified_context
@@ -12,11 +12,17 @@ ssl._create_default_https_context = ssl._create_unverified_context
 # Now safe to import libraries that use HTTPS
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from pathlib import Path
 from openai import OpenAI
 from typing import List, Tuple, Dict, Optional
 from app.code_parser import CodeParser
+from app.parallel_parser import iter_parsed_files
+from app.embedding_cache import EmbeddingCache, DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_ENTRIES
+from app.embedding_text import build_embedding_text
+from app.embedding_model import get_embedding_model, encode_query, DEFAULT_MODEL_NAME
+from app.top_k import top_k_items
+from app.durable_io import replace_file, write_atomic
+from app import vector_index
 
 # Troubleshooting tips:
 # 1. If model download still fails, clear HuggingFace cache:
@@ -27,7 +33,7 @@ from app.code_parser import CodeParser
 #      from sentence_transformers import SentenceTransformer
 #      model = SentenceTransformer('all-MiniLM-L6-v2')
 #      model.save('models/all-MiniLM-L6-v2')
-#    Then change line ~40 to: SentenceTransformer('models/all-MiniLM-L6-v2')
+#    It is picked up automatically from backend/models (see app/embedding_model.py)
 # 
 # 3. Update certificates (if you want proper SSL):
 #    pip install --upgrade certifi
@@ -37,33 +43,43 @@ from app.code_parser import CodeParser
 class SemanticSearchService:
     """Service for semantic search using embeddings and FAISS"""
     
-    def __init__(self, root_path=None, vector_index_file="vector.index", bm25_service=None):
+    # Hybrid fusion (see _fuse_ranked)
+    SEMANTIC_WEIGHT = 0.6
+    LEXICAL_WEIGHT = 0.4
+    RRF_K = 60  # rank damping of reciprocal rank fusion
+    MODEL_RETRY_SECONDS = 60  # after a failed model load, searches skip the model this long before retrying
+    
+    def __init__(self, root_path=None, vector_index_file="vector.index", bm25_service=None, parse_workers=None,
+                 embedding_cache_file=None, index_type=vector_index.DEFAULT_INDEX_TYPE, nlist=None, nprobe=None,
+                 ef_search=None, mmap_index=True, embedding_cache_max_age_days=DEFAULT_MAX_AGE_DAYS,
+                 embedding_cache_max_entries=DEFAULT_MAX_ENTRIES):
         self.root_path = Path(root_path) if root_path else None
         self.vector_index_file = vector_index_file
-        self.embedding_model = None
+        # FAISS index built by _write_vector_index (see app/vector_index.py) and its search knobs
+        self.index_type = index_type
+        self.nlist = nlist          # IVF cells (None = 4 * sqrt(vectors))
+        self.nprobe = nprobe        # IVF cells visited per query
+        self.ef_search = ef_search  # HNSW candidate list size per query
+        self.mmap_index = mmap_index
+        self.embedding_model_id = DEFAULT_MODEL_NAME  # registry name, also the embedding cache key
+        self._embedding_model_error = None
+        self._embedding_model_failed_at = 0.0
         self.faiss_index = None
         self.file_map = []  # List of dicts: {file_path, function_name, start_line, end_line, snippet}
         self.client = None
         self.bm25_service = bm25_service  # Optional BM25 service for hybrid search
         self.code_parser = CodeParser()  # Initialize tree-sitter parser
+        self.parse_workers = parse_workers  # Parser processes for build_vector_index (None = one per CPU)
         
-        # Initialize embedding model
-        # Try local model first, then fall back to downloading
+        # Persistent embedding cache, next to the vector index unless given explicitly
+        self.embedding_cache = None
+        self.last_cache_stats = None
         try:
-            # Check if local model exists (sentence-transformers format)
-            # Path: backend/models/all-MiniLM-L6-v2
-            local_model_path = Path(__file__).parent.parent / "models" / "all-MiniLM-L6-v2"
-            if local_model_path.exists() and (local_model_path / "modules.json").exists():
-                print(f"Loading local model from: {local_model_path}")
-                # SentenceTransformer can load from this path directly
-                self.embedding_model = SentenceTransformer(str(local_model_path))
-            else:
-                print("Local model not found, downloading from HuggingFace...")
-                self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            cache_file = embedding_cache_file or Path(vector_index_file).parent / "embedding_cache.sqlite"
+            self.embedding_cache = EmbeddingCache(cache_file, max_age_days=embedding_cache_max_age_days,
+                                                  max_entries=embedding_cache_max_entries)
         except Exception as e:
-            print(f"Warning: Could not load embedding model: {e}")
-            print("You may need to download the model manually or check SSL settings.")
-            print(f"Error details: {type(e).__name__}: {str(e)}")
+            print(f"Warning: Could not open embedding cache: {e}")
         
         # Initialize OpenAI client if API key is available
         api_key = os.getenv("OPENAI_API_KEY")
@@ -73,10 +89,58 @@ class SemanticSearchService:
             except Exception as e:
                 print(f"Warning: Could not initialize OpenAI client: {e}")
     
+    @property
+    def embedding_model(self):
+        """
+        Shared embedding model from the registry, loaded on first use (None if it cannot be loaded).
+        A failed load is retried after MODEL_RETRY_SECONDS, or on the next build_vector_index.
+        """
+        if (self._embedding_model_error is not None
+                and time.monotonic() - self._embedding_model_failed_at < self.MODEL_RETRY_SECONDS):
+            return None
+        try:
+            model = get_embedding_model(self.embedding_model_id)
+            self._embedding_model_error = None
+            return model
+        except Exception as e:
+            self._embedding_model_error = e
+            self._embedding_model_failed_at = time.monotonic()
+            print(f"Warning: Could not load embedding model: {e}")
+            print("You may need to download the model manually or check SSL settings.")
+            print(f"Error details: {type(e).__name__}: {str(e)}")
+            return None
+    
     def set_root_path(self, root_path):
         """Set the root path for indexing"""
         self.root_path = Path(root_path)
     
+    def encode_texts(self, texts: List[str], show_progress_bar=True) -> np.ndarray:
+        """
+        Encode texts with the embedding model, reusing cached embeddings for texts seen before.
+        Hit/miss counts of the call are kept in last_cache_stats.
+        """
+        if self.embedding_cache is not None:
+            try:
+                embeddings, self.last_cache_stats = self.embedding_cache.encode(
+                    self.embedding_model, self.embedding_model_id, texts, show_progress_bar=show_progress_bar
+                )
+                return embeddings
+            except Exception as e:
+                print(f"Warning: Embedding cache unavailable, encoding everything: {e}")
+        self.last_cache_stats = {"hits": 0, "misses": len(texts), "hit_rate": 0.0}
+        return self.embedding_model.encode(texts, convert_to_numpy=True, show_progress_bar=show_progress_bar)
+    
+    def prune_embedding_cache(self):
+        """Apply the embedding cache bounds after a scan (entries it just used are kept)"""
+        if self.embedding_cache is None:
+            return
+        try:
+            removed = self.embedding_cache.prune()
+            if removed:
+                print(f"🧹 Embedding cache: removed {removed} unused entries")
+        except Exception as e:
+            print(f"Warning: Could not prune embedding cache: {e}")
+    
     def _extract_code_structures(self, file_path: Path) -> List[Dict]:
         """
         Extract code structures (functions, classes, elements) using tree-sitter.
@@ -85,140 +149,253 @@ class SemanticSearchService:
         """
         try:
             # Use tree-sitter parser
-            structures = self.code_parser.parse_file(file_path)
-            
-            # Convert to our format with enhanced context
-            results = []
-            for struct in structures:
-                # Build rich text for embedding: type + name + docstring + context + code
-                entry_text = f"{struct.get('type', 'code')}: {struct.get('name', '')}\n"
-                
-                if struct.get('docstring'):
-                    entry_text += f"Description: {struct['docstring']}\n"
-                
-                # Add context: API calls
-                api_calls = struct.get('api_calls', [])
-                if api_calls:
-                    api_info = ", ".join([f"{ac.get('method', 'GET')} {ac.get('endpoint', '')}" 
-                                         for ac in api_calls[:3]])
-                    entry_text += f"API calls: {api_info}\n"
-                
-                # Add context: Event listeners
-                event_listeners = struct.get('event_listeners', [])
-                if event_listeners:
-                    event_info = ", ".join([f"{el.get('event', '')} -> {el.get('handler', '')}" 
-                                           for el in event_listeners[:3]])
-                    entry_text += f"Events: {event_info}\n"
-                
-                # Add context: Routes
-                routes = struct.get('routes', [])
-                if routes:
-                    route_info = ", ".join([f"{r.get('method', 'GET')} {r.get('path', '')}" 
-                                           for r in routes[:3]])
-                    entry_text += f"Routes: {route_info}\n"
-                
-                # Add the actual code
-                entry_text += f"\nCode:\n{struct.get('code', '')}"
-                
-                results.append({
-                    "name": struct.get('full_name', struct.get('name', '')),
-                    "snippet": entry_text,
-                    "start_line": struct.get('start_line', 1),
-                    "end_line": struct.get('end_line', 1),
-                    "type": struct.get('type', 'code'),
-                    "docstring": struct.get('docstring', ''),
-                    "code": struct.get('code', ''),
-                    "api_calls": api_calls,
-                    "event_listeners": event_listeners,
-                    "routes": routes,
-                    "attributes": struct.get('attributes', {})
-                })
-            
-            return results
+            return self._structures_to_entries(self.code_parser.parse_file(file_path))
         except Exception as e:
             print(f"Error extracting structures from {file_path}: {e}")
-            # Fallback: return whole file
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                lines = content.split('\n')
-                return [{
-                    "name": f"{file_path.name}::<file>",
-                    "snippet": content,
-                    "start_line": 1,
-                    "end_line": len(lines),
-                    "type": "file",
-                    "docstring": "",
-                    "code": content,
-                    "api_calls": [],
-                    "event_listeners": [],
-                    "routes": [],
-                    "attributes": {}
-                }]
-            except:
-                return []
+            return self._whole_file_entry(file_path)
     
-    def build_vector_index(self, root_path=None):
-        """Build FAISS vector index from codebase files at function/class level"""
-        if root_path:
-            self.root_path = Path(root_path)
+    def _structures_to_entries(self, structures: List[Dict]) -> List[Dict]:
+        """Convert parsed structures to index entries with rich embedding text"""
+        # Convert to our format with enhanced context
+        results = []
+        for struct in structures:
+            # Build rich text for embedding: type + name + docstring + context + code
+            entry_text = build_embedding_text(struct)
+            api_calls = struct.get('api_calls', [])
+            event_listeners = struct.get('event_listeners', [])
+            routes = struct.get('routes', [])
+            
+            results.append({
+                "name": struct.get('full_name', struct.get('name', '')),
+                "snippet": entry_text,
+                "start_line": struct.get('start_line', 1),
+                "end_line": struct.get('end_line', 1),
+                "type": struct.get('type', 'code'),
+                "docstring": struct.get('docstring', ''),
+                "code": struct.get('code', ''),
+                "api_calls": api_calls,
+                "event_listeners": event_listeners,
+                "routes": routes,
+                "attributes": struct.get('attributes', {})
+            })
         
-        if not self.root_path or not self.root_path.exists():
-            raise ValueError(f"Root path does not exist: {self.root_path}")
+        return results
+    
+    def _whole_file_entry(self, file_path: Path) -> List[Dict]:
+        """Fallback when a file cannot be parsed: index the whole file as one entry"""
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+            lines = content.split('\n')
+            return [{
+                "name": f"{file_path.name}::<file>",
+                "snippet": content,
+                "start_line": 1,
+                "end_line": len(lines),
+                "type": "file",
+                "docstring": "",
+                "code": content,
+                "api_calls": [],
+                "event_listeners": [],
+                "routes": [],
+                "attributes": {}
+            }]
+        except:
+            return []
+    
+    def build_vector_index(self, root_path=None, progress=None, publish=True):
+        """
+        Build FAISS vector index from codebase files at function/class level
+        progress: optional ScanProgress (app/scan_jobs.py) for background builds
+        publish: False to leave the current index serving and return the new one for publish_vector_index
+        """
+        root = Path(root_path) if root_path else self.root_path
+        if not root or not root.exists():
+            raise ValueError(f"Root path does not exist: {root}")
         
+        self._embedding_model_error = None  # an explicit build retries a model that failed to load
         if not self.embedding_model:
             raise RuntimeError("Embedding model not loaded")
         
         docs = []
-        self.file_map = []
+        file_map = []
         
         # Scan Python, JavaScript/TypeScript, and HTML files
+        if progress is not None:
+            progress.set_stage("walking")
+        file_paths = []
         for ext in ["*.py", "*.js", "*.ts", "*.tsx", "*.jsx", "*.html", "*.htm"]:
-            for file_path in self.root_path.rglob(ext):
-                try:
-                    rel_path = str(file_path.relative_to(self.root_path))
-                    
-                    # Extract code structures using tree-sitter
-                    structures = self._extract_code_structures(file_path)
-                    
-                    # Add each structure to index
-                    for struct in structures:
-                        snippet = struct.get("snippet", "")
-                        if snippet.strip():
-                            docs.append(snippet)
-                            self.file_map.append({
-                                "file_path": rel_path,
-                                "function_name": struct.get("name", ""),
-                                "start_line": struct.get("start_line", 1),
-                                "end_line": struct.get("end_line", 1),
-                                "type": struct.get("type", "code"),
-                                "docstring": struct.get("docstring", ""),
-                                "snippet": snippet[:500],  # Store preview
-                                "api_calls": struct.get("api_calls", []),
-                                "event_listeners": struct.get("event_listeners", []),
-                                "routes": struct.get("routes", []),
-                                "attributes": struct.get("attributes", {})
-                            })
-                except Exception as e:
-                    print(f"Skipping {file_path}: {e}")
+            file_paths.extend(sorted(root.rglob(ext)))
+        if progress is not None:
+            progress.advance("files_walked", len(file_paths))
+            progress.set_stage("parsing")
+            progress.set_total("files_parsed", len(file_paths))
         
+        # Parse in worker processes; results come back in file_paths order
+        for file_path, parsed in iter_parsed_files(file_paths, workers=self.parse_workers):
+            if progress is not None:
+                progress.check_cancelled()
+                progress.advance("files_parsed")
+            try:
+                rel_path = str(file_path.relative_to(root))
+                
+                # Extract code structures using tree-sitter
+                if parsed is None:
+                    structures = self._whole_file_entry(file_path)
+                else:
+                    structures = self._structures_to_entries(parsed)
+                
+                # Add each structure to index
+                for struct in structures:
+                    snippet = struct.get("snippet", "")
+                    if snippet.strip():
+                        docs.append(snippet)
+                        file_map.append(self._file_map_entry(rel_path, struct, snippet))
+            except Exception as e:
+                print(f"Skipping {file_path}: {e}")
+    
         if not docs:
             print("No code snippets found to index")
-            return
+            return self._finish_vector_index((None, [], None, root), publish, progress)
         
         print(f"Encoding {len(docs)} code snippets (functions/classes/files)...")
-        embeddings = self.embedding_model.encode(docs, convert_to_numpy=True, show_progress_bar=True)
+        if progress is None:
+            embeddings = self.encode_texts(docs)
+        else:
+            embeddings = self._encode_texts_with_progress(docs, progress)
+        print(f"♻️ Embedding cache: {self.last_cache_stats['hits']} hits, {self.last_cache_stats['misses']} encoded")
+        self.prune_embedding_cache()
+        return self._finish_vector_index(self._write_vector_index(embeddings, file_map, root, progress), publish,
+                                         progress)
+    
+    ENCODE_PROGRESS_BATCH = 1024  # texts per encode call when a build reports progress
+    
+    def _encode_texts_with_progress(self, texts: List[str], progress) -> np.ndarray:
+        """encode_texts in batches, advancing progress and checking for cancellation between them"""
+        progress.advance("components", len(texts))
+        progress.set_stage("embedding")
+        progress.set_total("embedded", len(texts))
+        parts, hits = [], 0
+        for start in range(0, len(texts), self.ENCODE_PROGRESS_BATCH):
+            progress.check_cancelled()
+            batch = texts[start:start + self.ENCODE_PROGRESS_BATCH]
+            parts.append(np.asarray(self.encode_texts(batch, show_progress_bar=False), dtype=np.float32))
+            hits += self.last_cache_stats["hits"]
+            progress.advance("embedded", len(batch))
+        self.last_cache_stats = {"hits": hits, "misses": len(texts) - hits,
+                                 "hit_rate": round(hits / len(texts), 4) if texts else 0.0}
+        return np.concatenate(parts)
+    
+    def build_vector_index_from(self, items, embeddings, root_path=None, progress=None, publish=True):
+        """
+        Build the FAISS index from components already parsed and embedded by SearchService.scan_semantic,
+        so /scan does not walk, parse and encode the codebase a second time.
+        items: parsed components (absolute file_path); embeddings: one row per item
+        publish: as for build_vector_index
+        """
+        root = Path(root_path) if root_path else self.root_path
+        
+        file_map = []
+        for item in items:
+            rel_path = self._relative_path(item.get("file_path", ""), root)
+            entry = dict(item, name=item.get("full_name", item.get("name", "")))
+            file_map.append(self._file_map_entry(rel_path, entry, build_embedding_text(item)))
         
-        # Create FAISS index
-        dimension = embeddings.shape[1]
-        self.faiss_index = faiss.IndexFlatL2(dimension)
-        self.faiss_index.add(embeddings.astype('float32'))
+        if not file_map:
+            print("No code snippets found to index")
+            return self._finish_vector_index((None, [], None, root), publish, progress)
+        
+        # Reused vectors, nothing encoded
+        self.last_cache_stats = {"hits": len(file_map), "misses": 0, "hit_rate": 1.0}
+        built = self._write_vector_index(np.asarray(embeddings, dtype=np.float32), file_map, root, progress)
+        return self._finish_vector_index(built, publish, progress)
+    
+    @staticmethod
+    def _relative_path(file_path, root: Optional[Path]) -> str:
+        """Path relative to root, as stored in the file map (unchanged when outside the root)"""
+        root = root.resolve() if root else None
+        try:
+            return str(Path(file_path).relative_to(root)) if root else str(file_path)
+        except ValueError:
+            return str(file_path)
+    
+    @staticmethod
+    def _file_map_entry(rel_path: str, struct: Dict, snippet: str) -> Dict:
+        """file_map record for one indexed component"""
+        return {
+            "file_path": rel_path,
+            "function_name": struct.get("name", ""),
+            "start_line": struct.get("start_line", 1),
+            "end_line": struct.get("end_line", 1),
+            "type": struct.get("type", "code"),
+            "docstring": struct.get("docstring", ""),
+            "snippet": snippet[:500],  # Store preview
+            "api_calls": struct.get("api_calls", []),
+            "event_listeners": struct.get("event_listeners", []),
+            "routes": struct.get("routes", []),
+            "attributes": struct.get("attributes", {})
+        }
+    
+    def _write_vector_index(self, embeddings: np.ndarray, file_map: List[Dict], root: Optional[Path],
+                            progress=None) -> Tuple:
+        """
+        Create the FAISS index over embeddings and write it next to the current one.
+        Searches keep using the previous index until publish_vector_index swaps both in.
+        Returns the built index as (faiss index, file map, written file, root).
+        """
+        # Create FAISS index (trained first for IVF types)
+        if progress is not None:
+            progress.set_stage("building index")
+        index = vector_index.build_index(embeddings, self.index_type, self.nlist)
+        vector_index.configure_search(index, self.nprobe, self.ef_search)
         
-        # Save index
-        faiss.write_index(self.faiss_index, self.vector_index_file)
-        # Save file map
-        self.save_file_map()
-        print(f"✅ Built vector index for {len(docs)} code snippets. Index saved to {self.vector_index_file}")
+        # Save index; written aside, fsynced and renamed, so a memory-mapped previous index stays valid
+        if progress is not None:
+            progress.set_stage("writing")
+        # (a name of its own, so concurrent builds never write the same file)
+        if progress is not None:
+            progress.set_stage("writing")
+        fd, tmp_file = tempfile.mkstemp(prefix=Path(self.vector_index_file).name + ".",
+                                        suffix=".tmp", dir=Path(self.vector_index_file).parent)
+        os.close(fd)
+        try:
+            faiss.write_index(index, tmp_file)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+        if progress is not None:
+            progress.advance("bytes_written", os.path.getsize(tmp_file))
+        print(f"✅ Built {self.index_type} vector index for {len(file_map)} code snippets")
+        return index, file_map, tmp_file, root
+    
+    def _finish_vector_index(self, built: Tuple, publish: bool, progress=None):
+        if not publish:
+            return built
+        self.publish_vector_index(built, progress)
+        return None
+    
+    def publish_vector_index(self, built: Tuple, progress=None):
+        """Swap in an index returned by build_vector_index(..., publish=False), with its file map and root"""
+        index, file_map, tmp_file, root = built
+        if progress is not None:
+            progress.set_stage("swapping")
+        if tmp_file is not None:
+            replace_file(tmp_file, self.vector_index_file)
+            self.faiss_index = index
+        self.file_map = file_map
+        if root:
+            self.root_path = Path(root)
+        if tmp_file is not None:
+            # Save file map
+            self.save_file_map()
+            print(f"💾 Vector index saved to {self.vector_index_file}")
+    
+    @staticmethod
+    def discard_vector_index(built: Tuple):
+        """Drop an unpublished index built with publish=False"""
+        tmp_file = built[2]
+        if tmp_file is not None and os.path.exists(tmp_file):
+            os.remove(tmp_file)
     
     def load_index(self):
         """Load existing FAISS index"""
@@ -226,7 +403,8 @@ class SemanticSearchService:
             return False
         
         try:
-            self.faiss_index = faiss.read_index(self.vector_index_file)
+            self.faiss_index = vector_index.read_index(self.vector_index_file, mmap=self.mmap_index)
+            vector_index.configure_search(self.faiss_index, self.nprobe, self.ef_search)
             # Load file map if available
             file_map_path = self.vector_index_file.replace(".index", "_map.pkl")
             if Path(file_map_path).exists():
@@ -252,13 +430,13 @@ class SemanticSearchService:
         if self.file_map:
             import pickle
             file_map_path = self.vector_index_file.replace(".index", "_map.pkl")
-            with open(file_map_path, "wb") as f:
-                pickle.dump(self.file_map, f)
+            write_atomic(file_map_path, pickle.dumps(self.file_map))
     
     def semantic_search(self, query, top_k=5, use_hybrid=True):
         """
         Perform semantic search and return results.
-        If use_hybrid=True and bm25_service is available, combines BM25 and FAISS scores.
+        If use_hybrid=True and bm25_service is available, one FAISS pass and one BM25 pass
+        (bm25_service.search_lexical) are fused per component by reciprocal rank.
         """
         if not self.faiss_index:
             if not self.load_index():
@@ -268,66 +446,103 @@ class SemanticSearchService:
             raise RuntimeError("Embedding model not loaded")
         
         # Encode query
-        query_emb = self.embedding_model.encode([query], convert_to_numpy=True)
+        query_emb = encode_query(query, self.embedding_model_id)[np.newaxis, :]
+        cosine = vector_index.is_cosine(self.faiss_index)
+        if cosine:
+            query_emb = vector_index.normalize_rows(query_emb)
         
         # FAISS search - get more results for hybrid scoring
         search_k = top_k * 3 if use_hybrid and self.bm25_service else top_k
         k = min(search_k, len(self.file_map))
         distances, indices = self.faiss_index.search(query_emb.astype('float32'), k)
         
-        # Convert distances to similarity scores (lower distance = higher similarity)
-        # Normalize to 0-1 range
-        max_dist = distances[0].max() if len(distances[0]) > 0 else 1.0
-        min_dist = distances[0].min() if len(distances[0]) > 0 else 0.0
+        # ANN indexes return -1 for slots they could not fill
+        found = (indices[0] >= 0) & (indices[0] < len(self.file_map))
+        
+        # L2 index: convert distances to similarity scores (lower distance = higher similarity),
+        # normalized to 0-1 range over this query's hits
+        valid_distances = distances[0][found]
+        max_dist = float(valid_distances.max()) if len(valid_distances) > 0 else 1.0
+        min_dist = float(valid_distances.min()) if len(valid_distances) > 0 else 0.0
         dist_range = max_dist - min_dist if max_dist > min_dist else 1.0
         
-        results = []
+        # Vector pass: scored hits, best first (FAISS order)
+        vector_hits = []
         for i, idx in enumerate(indices[0]):
-            if idx < len(self.file_map):
-                item = self.file_map[idx]
-                
-                # Convert L2 distance to similarity score (0-1, higher is better)
+            if found[i]:
                 distance = float(distances[0][i])
-                semantic_score = 1.0 - ((distance - min_dist) / dist_range) if dist_range > 0 else 0.5
-                
-                result = {
-                    "file_path": item.get("file_path", item) if isinstance(item, dict) else item,
-                    "function_name": item.get("function_name", ""),
-                    "start_line": item.get("start_line", 1),
-                    "end_line": item.get("end_line", 1),
-                    "snippet": item.get("snippet", ""),
-                    "semantic_score": semantic_score,
-                    "score": semantic_score  # Default score
-                }
-                
-                # Hybrid search: combine with BM25 if available
-                if use_hybrid and self.bm25_service:
-                    try:
-                        # Get BM25 results for the same file
-                        bm25_results = self.bm25_service.search(query, max_results=20)
-                        # Find matching file in BM25 results
-                        bm25_score = 0.0
-                        for bm25_result in bm25_results:
-                            if bm25_result.get("file_path") == result["file_path"]:
-                                # Normalize BM25 score (typically 0-10 range)
-                                bm25_score = min(bm25_result.get("score", 0) / 10.0, 1.0)
-                                break
-                        
-                        # Weighted combination: 60% semantic, 40% BM25
-                        combined_score = 0.6 * semantic_score + 0.4 * bm25_score
-                        result["bm25_score"] = bm25_score
-                        result["score"] = combined_score
-                    except Exception as e:
-                        # If BM25 fails, use semantic score only
-                        pass
-                
-                results.append(result)
+                if cosine:
+                    # Inner product of unit vectors: cosine similarity, clipped to 0-1
+                    semantic_score = min(max(distance, 0.0), 1.0)
+                else:
+                    # Convert L2 distance to similarity score (0-1, higher is better)
+                    semantic_score = 1.0 - ((distance - min_dist) / dist_range) if dist_range > 0 else 0.5
+                vector_hits.append((semantic_score, self.file_map[idx]))
+        
+        if not (use_hybrid and self.bm25_service):
+            return [self._result_entry(item, semantic_score, semantic_score)
+                    for semantic_score, item in top_k_items(vector_hits, top_k, key=lambda x: x[0])]
         
-        # Sort by combined score (descending)
-        results.sort(key=lambda x: x["score"], reverse=True)
+        # Lexical pass: one BM25-only search over the same components
+        try:
+            lexical_hits = self.bm25_service.search_lexical(query, max_results=search_k)
+        except Exception as e:
+            # If BM25 fails, use semantic score only
+            print(f"Warning: Lexical pass failed, using semantic scores only: {e}")
+            lexical_hits = []
+        return self._fuse_ranked(vector_hits, lexical_hits, top_k)
+    
+    def _component_key(self, file_path, start_line):
+        """(relative path, start line) of a component, as both passes spell it"""
+        return self._relative_path(file_path, self.root_path), start_line or 1
+    
+    def _fuse_ranked(self, vector_hits, lexical_hits, top_k):
+        """
+        Weighted reciprocal rank fusion per component: 60% vector rank, 40% BM25 rank.
+        Scores are scaled so a component ranked first by both passes scores 1.0.
+        """
+        fused = {}  # component key -> [rrf score, vector entry, semantic score, lexical hit, bm25 score]
+        for rank, (semantic_score, item) in enumerate(vector_hits):
+            key = self._component_key(item.get("file_path", ""), item.get("start_line"))
+            if key not in fused:
+                fused[key] = [self.SEMANTIC_WEIGHT / (self.RRF_K + rank + 1), item, semantic_score, None, 0.0]
+        top_lexical = lexical_hits[0].get("score", 0) if lexical_hits else 0
+        for rank, hit in enumerate(lexical_hits):
+            key = self._component_key(hit.get("file_path", ""), hit.get("start_line"))
+            entry = fused.setdefault(key, [0.0, None, 0.0, None, 0.0])
+            if entry[3] is None:
+                entry[0] += self.LEXICAL_WEIGHT / (self.RRF_K + rank + 1)
+                entry[3] = hit
+                entry[4] = hit.get("score", 0) / top_lexical if top_lexical else 0.0  # relative to the best hit
         
-        # Return top_k results
-        return results[:top_k]
+        best = (self.SEMANTIC_WEIGHT + self.LEXICAL_WEIGHT) / (self.RRF_K + 1)
+        results = []
+        for score, item, semantic_score, hit, bm25_score in top_k_items(fused.values(), top_k, key=lambda x: x[0]):
+            if item is None:  # found by BM25 only
+                item = {
+                    "file_path": self._relative_path(hit.get("file_path", ""), self.root_path),
+                    "function_name": hit.get("full_name") or hit.get("name", ""),
+                    "start_line": hit.get("start_line") or 1,
+                    "end_line": hit.get("end_line") or 1,
+                    "snippet": hit.get("code", "")
+                }
+            result = self._result_entry(item, score / best, semantic_score)
+            result["bm25_score"] = bm25_score
+            results.append(result)
+        return results
+    
+    @staticmethod
+    def _result_entry(item, score, semantic_score):
+        return {
+            "file_path": item.get("file_path", item) if isinstance(item, dict) else item,
+            "function_name": item.get("function_name", ""),
+            "start_line": item.get("start_line", 1),
+            "end_line": item.get("end_line", 1),
+            "snippet": item.get("snippet", ""),
+            "semantic_score": semantic_score,
+            "score": score
+        }
+    
     
     def explain_results(self, query, results, include_context=True):
         """
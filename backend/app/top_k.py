@@ -0,0 +1,36 @@
+"""
+Top-k - Shared best-k selection for every search path
+Engines select the k winners first and build result dicts (snippets, metadata copies)
+only for them, so latency follows k instead of the number of matching documents.
+Both helpers return exactly what a full stable sort would: ties keep their input order.
+"""
+import heapq
+from typing import Callable, Iterable, List, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without sorting the whole array"""
+    scores = np.asarray(scores)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k == len(scores):
+        return np.argsort(-scores, kind="stable")
+    # k-th best value, then everything above it plus the earliest ties at it
+    threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    candidates = np.concatenate([above, ties])
+    candidates.sort()
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_items(items: Iterable[T], k: int, key: Callable[[T], float]) -> List[T]:
+    """The k items with the highest key, best first (same as sorted(..., reverse=True)[:k])"""
+    if k <= 0:
+        return []
+    return heapq.nlargest(k, items, key=key)
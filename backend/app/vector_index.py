@@ -0,0 +1,113 @@
+"""
+Vector Index - FAISS index types behind SemanticSearchService
+All types except "flat_l2" index L2-normalized vectors with the inner-product metric,
+so a hit's score is its cosine similarity to the query:
+
+  flat_l2   exact L2 search (the original index; kept for existing vector.index files)
+  flat_ip   exact cosine search
+  hnsw      HNSW graph, no training; recall/speed via ef_search
+  ivf_flat  inverted lists over k-means cells (trained); recall/speed via nprobe
+  ivf_pq    inverted lists with product-quantized codes, ~16x smaller (trained); nprobe
+
+Indexes are read memory-mapped where FAISS supports it (IVF inverted lists), so a large
+index is paged in on demand instead of loaded whole.
+"""
+import math
+from typing import Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat_l2", "flat_ip", "hnsw", "ivf_flat", "ivf_pq")
+DEFAULT_INDEX_TYPE = "flat_ip"
+
+HNSW_M = 32                 # graph neighbors per node
+HNSW_EF_CONSTRUCTION = 80
+MIN_POINTS_PER_CELL = 39    # below this FAISS k-means warns that training is unreliable
+PQ_TRAINING_POINTS = 256    # one centroid per 8-bit code
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Unit-length float32 rows (zero rows stay zero)"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def is_cosine(index) -> bool:
+    """The index scores by inner product over normalized vectors (higher is better)"""
+    return index.metric_type == faiss.METRIC_INNER_PRODUCT
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    """Largest divisor of dimension up to dimension / 4 (4 dims per 8-bit code)"""
+    for m in range(max(1, dimension // 4), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def build_index(embeddings: np.ndarray, index_type: str = DEFAULT_INDEX_TYPE, nlist: Optional[int] = None):
+    """
+    Build (and train, for IVF types) a FAISS index over embeddings (one row per vector).
+    IVF types fall back to a simpler type when there are too few vectors to train on.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type '{index_type}' (expected one of {', '.join(INDEX_TYPES)})")
+    count, dimension = embeddings.shape
+
+    if index_type == "flat_l2":
+        index = faiss.IndexFlatL2(dimension)
+        index.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+        return index
+
+    vectors = normalize_rows(embeddings)
+    if index_type == "ivf_pq" and count < PQ_TRAINING_POINTS:
+        print(f"⚠️ {count} vectors are too few to train ivf_pq, using ivf_flat")
+        index_type = "ivf_flat"
+    if index_type in ("ivf_flat", "ivf_pq"):
+        nlist = nlist or int(4 * math.sqrt(count))
+        nlist = min(nlist, count // MIN_POINTS_PER_CELL)
+        if nlist < 2:
+            print(f"⚠️ {count} vectors are too few to train {index_type}, using flat_ip")
+            index_type = "flat_ip"
+
+    if index_type == "flat_ip":
+        index = faiss.IndexFlatIP(dimension)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif index_type == "ivf_flat":
+        index = faiss.index_factory(dimension, f"IVF{nlist},Flat", faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.index_factory(dimension, f"IVF{nlist},PQ{_pq_subquantizers(dimension)}x8",
+                                    faiss.METRIC_INNER_PRODUCT)
+        index.do_polysemous_training = False  # only pays off for Hamming-filtered L2 search, slow to train
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def configure_search(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """Apply the recall/speed knobs the index type understands (others are ignored)"""
+    if nprobe:
+        try:
+            ivf = faiss.extract_index_ivf(index)
+            ivf.nprobe = min(int(nprobe), ivf.nlist)
+        except RuntimeError:
+            pass  # not an IVF index
+    if ef_search and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = int(ef_search)
+
+
+def read_index(path: str, mmap: bool = True):
+    """faiss.read_index, memory-mapped and read-only when possible"""
+    if mmap:
+        try:
+            return faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass  # index type without mmap support
+    return faiss.read_index(str(path))
@@ -7,6 +7,30 @@ class Config:
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     INDEX_PATH = os.path.join(BASE_DIR, "index.pkl")
     VECTOR_INDEX_PATH = os.path.join(BASE_DIR, "vector.index")
+    # FAISS index type for new builds: flat_ip (exact cosine), hnsw, ivf_flat, ivf_pq or flat_l2
+    VECTOR_INDEX_TYPE = os.environ.get("CODEVI_VECTOR_INDEX_TYPE", "flat_ip")
+    VECTOR_INDEX_NLIST = int(os.environ.get("CODEVI_VECTOR_INDEX_NLIST", "0"))  # IVF cells (0 = 4 * sqrt(n))
+    # Recall/speed knobs: IVF cells probed and HNSW candidates per query (0 = FAISS default)
+    VECTOR_INDEX_NPROBE = int(os.environ.get("CODEVI_VECTOR_INDEX_NPROBE", "16"))
+    VECTOR_INDEX_EF_SEARCH = int(os.environ.get("CODEVI_VECTOR_INDEX_EF_SEARCH", "64"))
+    # Memory-map the vector index on load where FAISS supports it
+    VECTOR_INDEX_MMAP = os.environ.get("CODEVI_VECTOR_INDEX_MMAP", "1") == "1"
+    # Processes used to parse files during a scan (0 = one per CPU, 1 = parse in-process)
+    PARSE_WORKERS = int(os.environ.get("CODEVI_PARSE_WORKERS", "0"))
+    # Background scan jobs (POST /scan with "background": true): worker threads and finished jobs kept for polling
+    SCAN_WORKERS = int(os.environ.get("CODEVI_SCAN_WORKERS", "1"))
+    SCAN_JOBS_KEPT = int(os.environ.get("CODEVI_SCAN_JOBS_KEPT", "50"))
+    # Embeddings keyed by (model, text hash), reused across scans
+    EMBEDDING_CACHE_PATH = os.path.join(BASE_DIR, "embedding_cache.sqlite")
+    # Embedding cache bounds, applied after each scan: entries unused for this many days are dropped,
+    # then the least recently used beyond the entry limit (0 disables a bound)
+    EMBEDDING_CACHE_MAX_AGE_DAYS = float(os.environ.get("CODEVI_EMBEDDING_CACHE_MAX_AGE_DAYS", "30"))
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get("CODEVI_EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+    # Load the embedding model in the background at startup instead of on the first encode
+    WARM_UP_EMBEDDING_MODEL = os.environ.get("CODEVI_WARM_UP_MODEL", "0") == "1"
+    # LRU of encoded queries shared by all search entry points (0 entries disables it)
+    QUERY_CACHE_SIZE = int(os.environ.get("CODEVI_QUERY_CACHE_SIZE", "1024"))
+    QUERY_CACHE_TTL = float(os.environ.get("CODEVI_QUERY_CACHE_TTL", "3600"))
     ALLOWED_ORIGINS = [
         "http://localhost:8000",
         "http://127.0.0.1:8000",
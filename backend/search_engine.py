@@ -2,10 +2,75 @@
 BM25-based search engine for codebase indexing and search
 """
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import hashlib
+import os
+import pickle
 import re
-from rank_bm25 import BM25Okapi
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+try:
+    from app.bm25_index import BM25Index
+    from app.content_store import ContentStore
+    from app.module_resolver import ModuleResolver
+    from app.route_table import RouteTable, strip_templates
+except ImportError:  # imported as backend.search_engine from the project root
+    from backend.app.bm25_index import BM25Index
+    from backend.app.content_store import ContentStore
+    from backend.app.module_resolver import ModuleResolver
+    from backend.app.route_table import RouteTable, strip_templates
+
+# One combined pattern per language, so extracting a file's references is a single scan.
+# Named groups: py_import / py_from (Python modules), js_import (JS/TS module paths),
+# call (+ call_method) for API calls, route (+ route_method) for route definitions.
+# Decorators only count at the start of a line, so a route inside a string literal is not a route;
+# Python files take no fetch/axios calls, which only appear there inside strings.
+_PY_MODULE = r"\.*[a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*|\.+"
+_CALL_PATTERNS = (
+    r"\bfetch\s*\([^)]*?[`'\"](?P<call>[^`'\"]+)[`'\"]"
+    r"|\baxios\.(?P<call_method>get|post|put|patch|delete)\s*\([^)]*?[`'\"](?P<axios_call>[^`'\"]+)[`'\"]"
+)
+_ROUTE_PATTERNS = (
+    r"^[ \t]*@\w+\.route\s*\(\s*['\"](?P<route>[^'\"]+)['\"]"
+    r"|^[ \t]*@\w+\.(?P<route_method>get|post|put|patch|delete)\s*\(\s*['\"](?P<method_route>[^'\"]+)['\"]"
+)
+_REFERENCE_PATTERNS = {
+    'python': re.compile(
+        rf"^[ \t]*import\s+(?P<py_import>{_PY_MODULE})|^[ \t]*from\s+(?P<py_from>{_PY_MODULE})\s+import"
+        rf"|{_ROUTE_PATTERNS}",
+        re.MULTILINE
+    ),
+    'js': re.compile(
+        r"\bimport\s+[^;]*?\s+from\s+['\"](?P<js_import>[^'\"]+)['\"]"
+        r"|\b(?:require|import)\(\s*['\"](?P<js_dynamic>[^'\"]+)['\"]\s*\)"
+        rf"|{_CALL_PATTERNS}|{_ROUTE_PATTERNS}",
+        re.MULTILINE
+    ),
+    'other': re.compile(rf"{_CALL_PATTERNS}|{_ROUTE_PATTERNS}", re.MULTILINE),
+}
+_JS_EXTENSIONS = {'.js', '.jsx', '.ts', '.tsx'}
+
+
+class _LegacyBM25:
+    """
+    Stands in for rank_bm25 classes in engines pickled before BM25Index, so they load without
+    rank-bm25 installed; SearchEngine.__setstate__ replaces it with a BM25Index
+    """
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+
+class _EngineUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if module == 'rank_bm25' or module.startswith('rank_bm25.'):
+            return _LegacyBM25
+        return super().find_class(module, name)
+
+
+def load_engine(file) -> "SearchEngine":
+    """Unpickle a SearchEngine from an open binary file, upgrading older versions"""
+    return _EngineUnpickler(file).load()
 
 
 class SearchEngine:
@@ -27,14 +92,57 @@ class SearchEngine:
         '.idea', '.vscode', '.vs', 'coverage', '.pytest_cache'
     }
     
+    # Bumped when _extract_references changes, so loaded engines re-extract instead of reusing stale references
+    REFERENCES_VERSION = 2
+    
     def __init__(self, root_path: Path):
         self.root_path = Path(root_path).resolve()
         self.indexed_files: List[Path] = []
-        self.file_contents: Dict[str, List[str]] = {}  # file_path -> lines
-        self.file_line_map: Dict[str, Dict[int, str]] = {}  # file_path -> {line_num: full_line}
-        self.bm25: Optional[BM25Okapi] = None
-        self.tokenized_corpus: List[List[str]] = []
+        # rel_path -> file text, one UTF-8 blob per file (BM25 term counts live in the postings)
+        self.contents = ContentStore()
+        self.bm25: Optional[BM25Index] = None
+        # rel_path -> {"mtime": ns, "size": bytes, "hash": sha1} of the indexed version
+        self.file_manifest: Dict[str, Dict] = {}
+        # Import resolution over the indexed relative paths (see extract_graph)
+        self.module_resolver = ModuleResolver([])
+        # rel_path -> {"imports": [...], "api_calls": [...], "routes": [...]}, extracted at index time
+        self.file_references: Dict[str, Dict[str, list]] = {}
+        self.references_version = self.REFERENCES_VERSION
+        # rel_path -> {token: line indices (0-based, ascending)}, for best-line selection in search
+        self.line_positions: Dict[str, Dict[str, Tuple[int, ...]]] = {}
+        self._graph_cache = None
         
+    def __setstate__(self, state):
+        """Upgrade engines pickled by older versions (BM25Okapi, line lists, token lists)"""
+        self.__dict__.update(state)
+        tokenized_corpus = self.__dict__.pop('tokenized_corpus', None)
+        if not isinstance(self.bm25, BM25Index):
+            self.bm25 = BM25Index(tokenized_corpus) if tokenized_corpus else None
+        if 'contents' not in self.__dict__:
+            self.contents = ContentStore()
+            for rel_path, lines in self.__dict__.pop('file_contents', {}).items():
+                self.contents.add(rel_path, '\n'.join(lines))
+        self.__dict__.pop('file_contents', None)
+        self.__dict__.pop('file_line_map', None)
+        if not isinstance(self.__dict__.get('module_resolver'), ModuleResolver):
+            self.module_resolver = ModuleResolver(self.contents.keys())
+        if 'line_positions' not in self.__dict__:
+            self.line_positions = {
+                rel_path: self._index_lines(self.contents.lines(rel_path))[1] for rel_path in self.contents.keys()
+            }
+        if self.__dict__.get('references_version') != self.REFERENCES_VERSION:
+            self.file_references = {
+                rel_path: self._extract_references(rel_path, self.contents.text(rel_path))
+                for rel_path in self.contents.keys()
+            }
+            self.references_version = self.REFERENCES_VERSION
+        self._graph_cache = None
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_graph_cache'] = None  # rebuilt from file_references on demand
+        return state
+    
     def _should_index_file(self, file_path: Path) -> bool:
         """Check if a file should be indexed"""
         # Check extension
@@ -55,58 +163,181 @@ class SearchEngine:
         tokens = re.findall(r'\b\w+\b', text.lower())
         return tokens
     
-    def _extract_snippets(self, file_path: Path, content: str) -> Dict[int, str]:
-        """Extract line-by-line content with context"""
-        lines = content.split('\n')
-        line_map = {}
-        for i, line in enumerate(lines, start=1):
-            line_map[i] = line
-        return line_map
+    def _index_lines(self, lines: List[str]):
+        """
+        Tokenize a file line by line: (BM25 tokens of the whole file, {token: line indices}).
+        The tokens equal _tokenize(content) since tokens never span lines.
+        """
+        tokens = []
+        positions = defaultdict(list)
+        for line_idx, line in enumerate(lines):
+            line_tokens = self._tokenize(line)
+            tokens.extend(line_tokens)
+            for token in set(line_tokens):
+                positions[token].append(line_idx)
+        return tokens, {token: tuple(line_ids) for token, line_ids in positions.items()}
+    
+    @staticmethod
+    def _extract_references(rel_path: str, content: str) -> Dict[str, list]:
+        """
+        Imports, API calls and route definitions of one file, from a single scan with the
+        file's combined pattern: {"imports": [module], "api_calls": [(path, method)],
+        "routes": [(path, method)]} (method None when the pattern does not say).
+        """
+        ext = os.path.splitext(rel_path)[1].lower()
+        language = 'python' if ext == '.py' else 'js' if ext in _JS_EXTENSIONS else 'other'
+        references = {"imports": [], "api_calls": [], "routes": []}
+        for match in _REFERENCE_PATTERNS[language].finditer(content):
+            groups = match.groupdict()
+            module = groups.get('py_import') or groups.get('py_from') or \
+                groups.get('js_import') or groups.get('js_dynamic')
+            if module:
+                references["imports"].append(module)
+            elif groups.get('call') or groups.get('axios_call'):
+                path = strip_templates(groups.get('call') or groups['axios_call'])
+                method = groups['call_method'].upper() if groups.get('call_method') else None
+                if path.startswith('/') or '://' in path:  # skip variables and other non-URL strings
+                    references["api_calls"].append((path, method))
+            elif groups.get('route'):
+                references["routes"].append((groups['route'], None))
+            elif groups.get('method_route'):
+                references["routes"].append((groups['method_route'], groups['route_method'].upper()))
+        return references
+    
+    def _iter_source_files(self):
+        """Walk the codebase, pruning ignored directories instead of descending into them"""
+        for root, dirs, files in os.walk(self.root_path):
+            dirs[:] = sorted(d for d in dirs if d not in self.IGNORE_DIRS)
+            for fname in sorted(files):
+                file_path = Path(root) / fname
+                if self._should_index_file(file_path.relative_to(self.root_path)):
+                    yield file_path
+    
+    def _read_file(self, file_path: Path):
+        """Read a file, returning (text, content hash)"""
+        raw = file_path.read_bytes()
+        content = raw.decode('utf-8', errors='ignore')
+        # Match text-mode newline handling
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content, hashlib.sha1(raw).hexdigest()
     
-    def index_codebase(self):
-        """Scan and index the entire codebase"""
-        self.indexed_files = []
-        self.file_contents = {}
-        self.file_line_map = {}
-        self.tokenized_corpus = []
+    def index_codebase(self, incremental: bool = True, progress=None) -> Dict[str, int]:
+        """
+        Scan and index the codebase.
+        
+        With incremental=True, files whose mtime and size (or, failing that, content
+        hash) match the manifest of the previous run are reused without re-reading or
+        re-tokenizing (their BM25 term counts are taken from the previous postings);
+        new and changed files are read, deleted files are dropped.
+        
+        progress: optional ScanProgress (app/scan_jobs.py), advanced per file walked and
+        checked for cancellation before each file.
+        
+        Returns counts of added/updated/removed/unchanged files.
+        """
+        previous_manifest = getattr(self, 'file_manifest', None) or {}
+        if not incremental:
+            previous_manifest = {}
+        previous_positions = {
+            str(path.relative_to(self.root_path)): idx
+            for idx, path in enumerate(self.indexed_files)
+        }
+        previous_contents = self.contents
+        previous_references = getattr(self, 'file_references', None) or {}
+        previous_line_positions = getattr(self, 'line_positions', None) or {}
+        
+        indexed_files = []
+        contents = ContentStore()
+        file_references = {}
+        line_positions = {}
+        term_counts = []  # Counter per new/changed file, previous doc id per reused one
+        manifest = {}
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
         
         print(f"Scanning codebase at: {self.root_path}")
         
-        # Walk through all files
-        for file_path in self.root_path.rglob('*'):
-            if file_path.is_file() and self._should_index_file(file_path):
-                try:
-                    # Read file content
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    # Store relative path
-                    rel_path = str(file_path.relative_to(self.root_path))
-                    
+        for file_path in self._iter_source_files():
+            if progress is not None:
+                progress.check_cancelled()
+            try:
+                rel_path = str(file_path.relative_to(self.root_path))
+                stat = file_path.stat()
+                entry = previous_manifest.get(rel_path)
+                old_idx = previous_positions.get(rel_path)
+                reusable = entry is not None and old_idx is not None
+                
+                if reusable and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                    # Untouched since last scan
+                    content_hash = entry["hash"]
+                    content = None
+                else:
+                    content, content_hash = self._read_file(file_path)
+                    if not (reusable and entry["hash"] == content_hash):
+                        reusable = False
+                
+                if reusable:
+                    contents.copy_from(previous_contents, rel_path)
+                    file_references[rel_path] = previous_references.get(rel_path) or \
+                        self._extract_references(rel_path, contents.text(rel_path))
+                    line_positions[rel_path] = previous_line_positions.get(rel_path) or \
+                        self._index_lines(contents.lines(rel_path))[1]
+                    term_counts.append(old_idx)
+                    stats["unchanged"] += 1
+                else:
                     # Store file contents
-                    lines = content.split('\n')
-                    self.file_contents[rel_path] = lines
-                    self.file_line_map[rel_path] = self._extract_snippets(file_path, content)
+                    contents.add(rel_path, content)
+                    file_references[rel_path] = self._extract_references(rel_path, content)
                     
-                    # Tokenize for BM25
-                    tokenized = self._tokenize(content)
-                    self.tokenized_corpus.append(tokenized)
-                    self.indexed_files.append(file_path)
-                    
-                except Exception as e:
-                    print(f"Warning: Could not index {file_path}: {e}")
-                    continue
+                    # Tokenize for BM25, recording the lines each token occurs on
+                    tokens, line_positions[rel_path] = self._index_lines(content.split('\n'))
+                    term_counts.append(Counter(tokens))
+                    stats["updated" if rel_path in previous_manifest else "added"] += 1
+                
+                indexed_files.append(file_path)
+                manifest[rel_path] = {
+                    "mtime": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "hash": content_hash
+                }
+            except Exception as e:
+                print(f"Warning: Could not index {file_path}: {e}")
+                continue
+            finally:
+                if progress is not None:
+                    progress.advance("files_walked")
+        
+        stats["removed"] = len(set(previous_manifest) - set(manifest))
+        changed = stats["added"] or stats["updated"] or stats["removed"]
+        
+        self.indexed_files = indexed_files
+        previous_bm25 = self.bm25
+        self.contents = contents
+        self.file_references = file_references
+        self.line_positions = line_positions
+        self._graph_cache = None
+        self.file_manifest = manifest
+        self.module_resolver = ModuleResolver(contents.keys())
         
-        # Build BM25 index
-        if self.tokenized_corpus:
-            self.bm25 = BM25Okapi(self.tokenized_corpus)
-            print(f"Indexed {len(self.indexed_files)} files")
-        else:
+        # Rebuild BM25 statistics only when the corpus actually changed
+        if not term_counts:
+            self.bm25 = None
             print("Warning: No files indexed")
+        elif changed or previous_bm25 is None:
+            if any(isinstance(counts, int) for counts in term_counts):
+                previous_counts = previous_bm25.term_counts()
+                term_counts = [previous_counts[counts] if isinstance(counts, int) else counts
+                               for counts in term_counts]
+            self.bm25 = BM25Index.from_term_counts(term_counts)
+        
+        if term_counts:
+            print(f"Indexed {len(self.indexed_files)} files "
+                  f"({stats['added']} added, {stats['updated']} updated, "
+                  f"{stats['removed']} removed, {stats['unchanged']} unchanged)")
+        return stats
     
     def search(self, query: str, max_results: int = 10) -> List[Dict]:
         """Search the indexed codebase and return ranked snippets"""
-        if not self.bm25 or not self.tokenized_corpus:
+        if not self.bm25 or not self.indexed_files:
             return []
         
         # Tokenize query
@@ -114,62 +345,49 @@ class SearchEngine:
         if not query_tokens:
             return []
         
-        # Get BM25 scores
-        scores = self.bm25.get_scores(query_tokens)
-        
-        # Create results with file info
+        # Only the best-scoring files get snippets built
         results = []
-        for idx, score in enumerate(scores):
-            if score > 0:  # Only include files with positive scores
-                file_path = self.indexed_files[idx]
-                rel_path = str(file_path.relative_to(self.root_path))
-                
-                # Find best matching line in file
-                file_lines = self.file_contents[rel_path]
-                best_line_idx = self._find_best_line(file_lines, query_tokens)
-                
-                # Extract snippet with context (3 lines before and after)
-                snippet_lines = self._extract_context_snippet(
-                    file_lines, best_line_idx, context_lines=3
-                )
-                
-                results.append({
-                    "file_path": rel_path,
-                    "line_number": best_line_idx + 1,
-                    "content": '\n'.join(snippet_lines),
-                    "score": float(score)
-                })
-        
-        # Sort by score (descending)
-        results.sort(key=lambda x: x["score"], reverse=True)
+        for idx, score in self.bm25.top_k(query_tokens, max_results):
+            file_path = self.indexed_files[idx]
+            rel_path = str(file_path.relative_to(self.root_path))
+            
+            # Find best matching line in file from the precomputed token positions
+            best_line_idx = self._find_best_line(rel_path, query_tokens)
+            
+            # Extract snippet with context (3 lines before and after)
+            snippet_lines = self._extract_context_snippet(
+                rel_path, best_line_idx, context_lines=3
+            )
+            
+            results.append({
+                "file_path": rel_path,
+                "line_number": best_line_idx + 1,
+                "content": '\n'.join(snippet_lines),
+                "score": score
+            })
         
-        # Return top results
-        return results[:max_results]
+        return results
     
-    def _find_best_line(self, lines: List[str], query_tokens: List[str]) -> int:
-        """Find the line in a file that best matches the query"""
-        best_score = 0
-        best_idx = 0
-        
-        for idx, line in enumerate(lines):
-            line_tokens = self._tokenize(line)
-            # Simple overlap score
-            overlap = len(set(query_tokens) & set(line_tokens))
-            if overlap > best_score:
-                best_score = overlap
-                best_idx = idx
-        
-        return best_idx
+    def _find_best_line(self, rel_path: str, query_tokens: List[str]) -> int:
+        """Find the line in a file that matches the most distinct query tokens (first one on ties)"""
+        positions = self.line_positions.get(rel_path, {})
+        overlap = defaultdict(int)
+        for token in set(query_tokens):
+            for line_idx in positions.get(token, ()):
+                overlap[line_idx] += 1
+        if not overlap:
+            return 0
+        return min(overlap, key=lambda line_idx: (-overlap[line_idx], line_idx))
     
-    def _extract_context_snippet(self, lines: List[str], center_line: int, context_lines: int = 3) -> List[str]:
-        """Extract a snippet with context around the center line"""
+    def _extract_context_snippet(self, rel_path: str, center_line: int, context_lines: int = 3) -> List[str]:
+        """Extract a snippet with context around the center line (only those lines are decoded)"""
         start = max(0, center_line - context_lines)
-        end = min(len(lines), center_line + context_lines + 1)
+        lines = self.contents.lines(rel_path, start, center_line + context_lines + 1)
         
         snippet = []
-        for i in range(start, end):
+        for i, line in enumerate(lines, start=start):
             prefix = "  " if i != center_line else "> "
-            snippet.append(f"{prefix}{i+1:4d} | {lines[i]}")
+            snippet.append(f"{prefix}{i+1:4d} | {line}")
         
         return snippet
     
@@ -184,10 +402,13 @@ class SearchEngine:
     def extract_graph(self) -> Dict:
         """
         Extract file relationships graph from the codebase.
-        Returns a JSON-serializable dictionary with nodes and links.
+        Returns a JSON-serializable dictionary with nodes and links (import and api_call).
+        Assembled from file_references in memory and cached until the next index_codebase.
         """
         if not self.is_indexed():
             return {"nodes": [], "links": []}
+        if self._graph_cache is not None:
+            return self._graph_cache
         
         nodes = []
         links = []
@@ -231,142 +452,43 @@ class SearchEngine:
                 })
                 node_set.add(rel_path)
         
-        # Extract relationships from file contents
-        for rel_path, lines in self.file_contents.items():
-            source_file = rel_path
-            content = '\n'.join(lines)
+        # Relationships from the references extracted at index time (no regex work here)
+        routes = RouteTable()
+        for rel_path, references in self.file_references.items():
+            for path, method in references["routes"]:
+                routes.add(path, rel_path, [method] if method else ())
+        
+        def add_link(source_file, target_file, link_type, **extra):
+            link_key = (source_file, target_file, link_type)
+            if target_file and target_file != source_file and link_key not in link_set and target_file in node_set:
+                links.append({"source": source_file, "target": target_file, "type": link_type, **extra})
+                link_set.add(link_key)
+        
+        for rel_path, references in self.file_references.items():
             file_ext = Path(rel_path).suffix.lower()
             
-            # Python imports
-            if file_ext == '.py':
-                # Match: import module, from module import, from package.module import
-                import_patterns = [
-                    r'^import\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*)',
-                    r'^from\s+([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*)\s+import',
-                ]
-                for pattern in import_patterns:
-                    matches = re.finditer(pattern, content, re.MULTILINE)
-                    for match in matches:
-                        module_name = match.group(1)
-                        target_file = self._resolve_python_import(module_name, rel_path)
-                        if target_file and target_file != source_file:
-                            link_key = (source_file, target_file, 'import')
-                            if link_key not in link_set and target_file in node_set:
-                                links.append({
-                                    "source": source_file,
-                                    "target": target_file,
-                                    "type": "import"
-                                })
-                                link_set.add(link_key)
+            # Python / JavaScript / TypeScript imports
+            for module in references["imports"]:
+                if file_ext == '.py':
+                    add_link(rel_path, self._resolve_python_import(module, rel_path), 'import')
+                elif file_ext in _JS_EXTENSIONS:
+                    add_link(rel_path, self._resolve_js_import(module, rel_path), 'import')
             
-            # JavaScript/TypeScript imports
-            elif file_ext in ['.js', '.jsx', '.ts', '.tsx']:
-                # Match: import ... from '...', require('...')
-                js_patterns = [
-                    r"import\s+.*?\s+from\s+['\"]([^'\"]+)['\"]",
-                    r"require\(['\"]([^'\"]+)['\"]\)",
-                    r"import\(['\"]([^'\"]+)['\"]\)",
-                ]
-                for pattern in js_patterns:
-                    matches = re.finditer(pattern, content, re.MULTILINE)
-                    for match in matches:
-                        import_path = match.group(1)
-                        target_file = self._resolve_js_import(import_path, rel_path)
-                        if target_file and target_file != source_file:
-                            link_key = (source_file, target_file, 'import')
-                            if link_key not in link_set and target_file in node_set:
-                                links.append({
-                                    "source": source_file,
-                                    "target": target_file,
-                                    "type": "import"
-                                })
-                                link_set.add(link_key)
-            
-            # API calls detection
-            api_patterns = [
-                r'fetch\s*\([^)]*[\'"]([^\'"]+)[\'"]',
-                r'axios\.(?:get|post|put|delete)\s*\([^)]*[\'"]([^\'"]+)[\'"]',
-                r'@app\.route\s*\([\'"]([^\'"]+)[\'"]',
-                r'@app\.(?:get|post|put|delete)\s*\([\'"]([^\'"]+)[\'"]',
-            ]
-            for pattern in api_patterns:
-                matches = re.finditer(pattern, content, re.MULTILINE)
-                for match in matches:
-                    api_path = match.group(1)
-                    # Create a virtual API node or link to related files
-                    # For now, we'll skip API edges as they're more complex
-                    pass
+            # API calls -> files defining a matching route
+            for path, method in references["api_calls"]:
+                for target_file in routes.resolve(path, method):
+                    add_link(rel_path, target_file, 'api_call', endpoint=path)
         
-        return {
+        self._graph_cache = {
             "nodes": nodes,
             "links": links
         }
+        return self._graph_cache
     
     def _resolve_python_import(self, module_name: str, source_file: str) -> Optional[str]:
-        """Resolve Python import to actual file path"""
-        # Remove relative imports (starting with .)
-        if module_name.startswith('.'):
-            return None
-        
-        # Try to find the module file
-        parts = module_name.split('.')
-        base_name = parts[0]
-        
-        # Search in the same directory and parent directories
-        source_path = Path(self.root_path) / source_file
-        search_dirs = [
-            source_path.parent,
-            self.root_path,
-            self.root_path / base_name,
-        ]
-        
-        # Try different file extensions
-        for search_dir in search_dirs:
-            if not search_dir.exists():
-                continue
-            
-            # Try __init__.py or .py file
-            for ext in ['/__init__.py', '.py']:
-                candidate = search_dir / f"{base_name}{ext}"
-                if candidate.exists():
-                    rel_path = str(candidate.relative_to(self.root_path))
-                    if rel_path in [str(f.relative_to(self.root_path)) for f in self.indexed_files]:
-                        return rel_path
-        
-        return None
+        """Resolve Python import (absolute or relative) to an indexed file path"""
+        return self.module_resolver.resolve_python(module_name, source_file)
     
     def _resolve_js_import(self, import_path: str, source_file: str) -> Optional[str]:
-        """Resolve JavaScript/TypeScript import to actual file path"""
-        # Skip node_modules and external packages
-        if import_path.startswith('node_modules') or not import_path.startswith('.'):
-            return None
-        
-        source_path = Path(self.root_path) / source_file
-        source_dir = source_path.parent
-        
-        # Remove leading ./ or ../
-        clean_path = import_path.lstrip('./')
-        
-        # Try different extensions
-        extensions = ['', '.js', '.jsx', '.ts', '.tsx', '/index.js', '/index.ts']
-        
-        for ext in extensions:
-            candidate = source_dir / f"{clean_path}{ext}"
-            if candidate.exists():
-                rel_path = str(candidate.relative_to(self.root_path))
-                if rel_path in [str(f.relative_to(self.root_path)) for f in self.indexed_files]:
-                    return rel_path
-        
-        # Try with ../ for parent directory
-        if import_path.startswith('../'):
-            parent_dir = source_dir.parent
-            clean_path = import_path.replace('../', '')
-            for ext in extensions:
-                candidate = parent_dir / f"{clean_path}{ext}"
-                if candidate.exists():
-                    rel_path = str(candidate.relative_to(self.root_path))
-                    if rel_path in [str(f.relative_to(self.root_path)) for f in self.indexed_files]:
-                        return rel_path
-        
-        return None
-
+        """Resolve JavaScript/TypeScript import to an indexed file path"""
+        return self.module_resolver.resolve_js(import_path, source_file)
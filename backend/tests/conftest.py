@@ -0,0 +1,7 @@
+"""Shared pytest setup: the backend directory is the import root (app.*, search_engine)"""
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,63 @@
+"""BM25Index scores and rankings against rank_bm25.BM25Okapi"""
+import random
+
+import numpy as np
+import pytest
+
+from app.bm25_index import BM25Index
+
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+VOCABULARY = ["search", "index", "graph", "route", "parse", "file", "token", "score", "query", "node"]
+
+
+def _random_corpus(rng, docs=30):
+    # Skewed term choice, so common terms get negative IDF and exercise the epsilon floor
+    return [[rng.choice(VOCABULARY[:rng.randint(2, len(VOCABULARY))]) for _ in range(rng.randint(1, 12))]
+            for _ in range(docs)]
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_get_scores_matches_bm25okapi(seed):
+    rng = random.Random(seed)
+    corpus = _random_corpus(rng)
+    query = rng.sample(VOCABULARY, 3) + ["missing"]
+    expected = rank_bm25.BM25Okapi(corpus).get_scores(query)
+    np.testing.assert_allclose(BM25Index(corpus).get_scores(query), expected, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_top_k_matches_bm25okapi_ranking(seed):
+    rng = random.Random(seed)
+    corpus = _random_corpus(rng)
+    query = rng.sample(VOCABULARY, 2)
+    expected = rank_bm25.BM25Okapi(corpus).get_scores(query)
+
+    top = BM25Index(corpus).top_k(query, 5)
+    assert len(top) <= 5
+    for idx, score in top:
+        assert score == pytest.approx(expected[idx])
+        assert score > 0
+    # Every document left out scores no higher than the last one returned
+    if top:
+        returned = {idx for idx, _ in top}
+        cutoff = top[-1][1]
+        assert all(expected[i] <= cutoff + 1e-9 for i in range(len(corpus)) if i not in returned)
+    assert [score for _, score in top] == sorted((score for _, score in top), reverse=True)
+
+
+def test_empty_and_unknown_queries():
+    index = BM25Index([["a", "b"], ["b", "c"]])
+    assert index.top_k(["zzz"], 3) == []
+    assert not index.get_scores(["zzz"]).any()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_get_scores_many_matches_get_scores(seed):
+    rng = random.Random(seed)
+    index = BM25Index(_random_corpus(rng))
+    queries = [rng.sample(VOCABULARY, rng.randint(1, 4)) for _ in range(6)] + [["missing"], []]
+    scores = index.get_scores_many(queries)
+    assert scores.shape == (len(queries), index.corpus_size)
+    for row, query in enumerate(queries):
+        np.testing.assert_allclose(scores[row], index.get_scores(query), rtol=1e-12, atol=1e-12)
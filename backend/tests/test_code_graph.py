@@ -0,0 +1,234 @@
+"""CodeGraph: construction, persistence and the graph queries"""
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+
+from app.code_graph import CHAIN_PATTERN_MAX_LENGTH, EDGE_TYPES, CodeGraph, parse_chain_pattern
+from app.code_graph_builder import CodeGraphBuilder
+
+FLOW_ITEMS = [
+    {"file_path": "frontend/index.html", "name": "search-btn", "type": "button", "language": "html",
+     "event_listeners": [{"event": "click", "handler": "runSearch(event)"}]},
+    {"file_path": "frontend/src/main.js", "name": "runSearch", "type": "function", "language": "javascript",
+     "api_calls": [{"endpoint": "/api/search", "method": "POST"}], "relations": ["renderResults"]},
+    {"file_path": "frontend/src/main.js", "name": "renderResults", "type": "function", "language": "javascript"},
+    {"file_path": "backend/app/routes.py", "name": "/search", "type": "route", "language": "python",
+     "routes": [{"path": "/search", "method": "POST"}]},
+    {"file_path": "backend/app/routes.py", "name": "search", "type": "function", "language": "python",
+     "routes": [{"path": "/search", "method": "POST"}], "relations": ["search_service.search_code"]},
+    {"file_path": "backend/app/search_service.py", "name": "search_code", "type": "function",
+     "language": "python"},
+    {"file_path": "backend/cli.py", "name": "main", "type": "function", "language": "python",
+     "imports": ["app.search_service.search_code"]},
+    {"file_path": "README.md", "name": "readme", "type": "text", "language": "markdown"},
+]
+
+
+def _edges(graph):
+    return {(source, target, graph.edge_type(edge))
+            for edge, source, target in graph.edges_between()}
+
+
+def _random_graph(seed, nodes=40, edges=90):
+    """CodeGraph over random edges (sorted by source, as build() emits them)"""
+    rng = random.Random(seed)
+    pairs = sorted((rng.randrange(nodes), rng.randrange(nodes), rng.randrange(len(EDGE_TYPES)))
+                   for _ in range(edges))
+    pairs = [p for p in pairs if p[0] != p[1]]
+    indptr = np.zeros(nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount([p[0] for p in pairs], minlength=nodes), out=indptr[1:])
+    return CodeGraph(
+        indptr=indptr,
+        targets=np.array([p[1] for p in pairs], dtype=np.int32),
+        edge_types=np.array([p[2] for p in pairs], dtype=np.int8),
+        edge_meta=np.full(len(pairs), -1, dtype=np.int32),
+        node_types=np.array([rng.randrange(3) for _ in range(nodes)], dtype=np.int16),
+        type_names=["function", "route", "button"],
+        meta_table=[],
+        node_files=np.zeros(nodes, dtype=np.int32),
+        file_names=["x.py"]
+    ), pairs
+
+
+def _bfs_distances(pairs, nodes, source, directed, allowed=None):
+    adjacency = {n: [] for n in range(nodes)}
+    for s, t, e in pairs:
+        if allowed is None or e in allowed:
+            adjacency[s].append(t)
+            if not directed:
+                adjacency[t].append(s)
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        for neighbor in adjacency[node]:
+            if neighbor not in distances:
+                distances[neighbor] = distances[node] + 1
+                queue.append(neighbor)
+    return distances
+
+
+@pytest.fixture(scope="module")
+def flow_graph():
+    return CodeGraph.build(FLOW_ITEMS)
+
+
+def test_build_links_the_flow(flow_graph):
+    assert _edges(flow_graph) == {
+        (0, 1, "handles_event"),
+        (1, 2, "calls_function"),
+        (1, 3, "calls_endpoint"),
+        (1, 4, "calls_endpoint"),
+        (3, 4, "handles_route"),
+        (4, 5, "calls_function"),
+        (6, 5, "imports"),
+    }
+    assert flow_graph.edge_metadata(next(iter(flow_graph.out_edges(0)))) == \
+        {"event": "click", "handler": "runSearch(event)"}
+
+
+def test_save_and_load_round_trip(flow_graph, tmp_path):
+    flow_graph.save(tmp_path)
+    assert CodeGraph.exists(tmp_path)
+    loaded = CodeGraph.load(tmp_path)
+    assert _edges(loaded) == _edges(flow_graph)
+    assert [loaded.node_type(n) for n in range(loaded.node_count)] == [item["type"] for item in FLOW_ITEMS]
+
+
+def test_neighborhood(flow_graph):
+    assert flow_graph.neighborhood([0], depth=0) == [0]
+    assert flow_graph.neighborhood([0], depth=1) == [0, 1]
+    assert flow_graph.neighborhood([0], depth=2) == [0, 1, 3, 4, 2]  # outgoing edges in build order
+    assert flow_graph.neighborhood([5], depth=1) == [5, 4, 6]  # incoming edges too
+    assert flow_graph.neighborhood([5], depth=3, directed=True) == [5]
+    assert flow_graph.neighborhood([1], depth=1, edge_types=["calls_function"]) == [1, 2]
+    assert flow_graph.neighborhood([0], depth=5, max_nodes=3) == [0, 1, 3]
+    assert flow_graph.neighborhood([7], depth=5) == [7]
+    assert flow_graph.neighborhood([99, -1], depth=1) == []
+    with pytest.raises(ValueError):
+        flow_graph.neighborhood([0], edge_types=["no_such_edge"])
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("directed", [False, True])
+def test_neighborhood_matches_bfs(seed, directed):
+    graph, pairs = _random_graph(seed)
+    for depth in (1, 2, 3):
+        expected = {n for n, d in _bfs_distances(pairs, graph.node_count, 0, directed).items() if d <= depth}
+        found = graph.neighborhood([0], depth=depth, directed=directed)
+        assert len(found) == len(set(found))
+        assert set(found) == expected
+
+
+def test_shortest_path(flow_graph):
+    path = flow_graph.shortest_path(0, 5)
+    assert [node for node, _ in path] == [0, 1, 4, 5]
+    assert path[0] == (0, None)
+    assert [flow_graph.edge_type(edge) for _, edge in path[1:]] == ["handles_event", "calls_endpoint", "calls_function"]
+    assert flow_graph.shortest_path(2, 2) == [(2, None)]
+    assert flow_graph.shortest_path(0, 7) is None
+    assert flow_graph.shortest_path(0, 5, max_depth=2) is None
+    assert flow_graph.shortest_path(5, 0, directed=True) is None
+    assert [node for node, _ in flow_graph.shortest_path(5, 0)] == [5, 4, 1, 0]
+    assert flow_graph.shortest_path(0, 5, edge_types=["handles_event", "calls_function"]) is None
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("directed", [False, True])
+def test_shortest_path_matches_bfs(seed, directed):
+    graph, pairs = _random_graph(seed)
+    allowed = {0, 1, 3} if seed % 2 else None
+    edge_types = None if allowed is None else [EDGE_TYPES[e] for e in sorted(allowed)]
+    for source in range(0, graph.node_count, 7):
+        distances = _bfs_distances(pairs, graph.node_count, source, directed, allowed)
+        for target in range(graph.node_count):
+            path = graph.shortest_path(source, target, edge_types=edge_types, directed=directed)
+            if target not in distances:
+                assert path is None
+                continue
+            assert len(path) - 1 == distances[target]
+            assert path[0] == (source, None) and path[-1][0] == target
+            for (previous, _), (node, edge) in zip(path, path[1:]):
+                ends = (int(graph.edge_sources()[edge]), int(graph.targets[edge]))
+                assert ends == (previous, node) or (not directed and ends == (node, previous))
+                assert allowed is None or graph.edge_types[edge] in allowed
+
+
+def test_match_chains(flow_graph):
+    chains, has_more, truncated = flow_graph.match_chains("button -> handles_event -> * -> calls_endpoint -> *")
+    assert [[node for node, _ in chain] for chain in chains] == [[0, 1, 3], [0, 1, 4]]
+    assert not has_more and not truncated
+    assert flow_graph.flow_chains() == [[0, 1, 3, 4]]
+
+    page, has_more, _ = flow_graph.match_chains("* -> * -> *", offset=0, limit=2)
+    rest, rest_more, _ = flow_graph.match_chains("* -> * -> *", offset=2, limit=50)
+    everything, _, _ = flow_graph.match_chains("* -> * -> *", limit=50)
+    assert has_more and not rest_more
+    assert page + rest == everything
+
+    chains, _, _ = flow_graph.match_chains("function -> calls_function -> function", nodes=[1, 2, 4])
+    assert [[node for node, _ in chain] for chain in chains] == [[1, 2]]
+    assert flow_graph.match_chains("function|route")[0][0] == [(1, None)]
+    assert flow_graph.match_chains("widget -> * -> *") == ([], False, False)
+
+
+def test_match_chains_never_revisit_a_node():
+    graph, _ = _random_graph(3, nodes=8, edges=40)
+    chains, _, _ = graph.match_chains("* -> * -> * -> * -> * -> * -> *", limit=500)
+    assert chains
+    for chain in chains:
+        nodes = [node for node, _ in chain]
+        assert len(nodes) == len(set(nodes))
+
+
+def test_match_chains_stops_at_the_expansion_budget():
+    graph, _ = _random_graph(4, nodes=12, edges=120)
+    pattern = " -> ".join(["*"] * 22) + " -> widget"
+    chains, has_more, truncated = graph.match_chains(pattern, max_expansions=1000)
+    assert chains == [] and not has_more and truncated
+
+    everything, _, truncated = graph.match_chains("* -> * -> *", limit=1000)
+    assert not truncated
+    page, _, truncated = graph.match_chains("* -> * -> *", limit=1000, max_expansions=5)
+    assert truncated and page == everything[:len(page)]
+
+
+def test_parse_chain_pattern():
+    assert parse_chain_pattern("button|input -> handles_event → * > calls_endpoint > route") == \
+        [["button", "input"], "handles_event", None, "calls_endpoint", ["route"]]
+    with pytest.raises(ValueError):
+        parse_chain_pattern("button -> handles_event")
+    with pytest.raises(ValueError):
+        parse_chain_pattern("button -> clicks -> function")
+    with pytest.raises(ValueError):
+        parse_chain_pattern(" -> ".join(["*"] * (CHAIN_PATTERN_MAX_LENGTH // 4 + 1)))
+
+
+def _aggregate_ids(graph, **kwargs):
+    return [node["id"] for node in CodeGraphBuilder().build_aggregate_graph(graph, **kwargs)["nodes"]]
+
+
+def test_aggregate_directory_level_rolls_up_one_level(flow_graph):
+    data = CodeGraphBuilder().build_aggregate_graph(flow_graph, level="directory", max_files=2)
+    nodes = {node["id"]: node for node in data["nodes"]}
+    assert list(nodes) == ["dir::frontend", "dir::backend", "file::README.md"]
+    assert nodes["dir::backend"]["symbol_count"] == 4
+    assert nodes["dir::backend"]["expand"] == {"level": "directory", "dir": "backend"}  # 3 files > max_files
+    assert nodes["dir::frontend"]["expand"] == {"level": "file", "dir": "frontend"}
+    assert nodes["file::README.md"]["expand"] == {"level": "symbol", "file": "README.md"}
+    assert {(edge["source"], edge["target"]) for edge in data["edges"]} == \
+        {("dir::frontend", "dir::backend")}  # edges inside a directory are not drawn
+
+    assert _aggregate_ids(flow_graph, level="directory", directory="backend") == \
+        ["dir::backend/app", "file::backend/cli.py"]
+
+
+def test_aggregate_directory_expand_matches_by_prefix(flow_graph):
+    assert _aggregate_ids(flow_graph, level="file", directory="backend/app/") == \
+        ["file::backend/app/routes.py", "file::backend/app/search_service.py"]
+    assert _aggregate_ids(flow_graph, level="file", directory="app") == []  # not a substring match
+    assert _aggregate_ids(flow_graph, level="file", path_filter="app/") == \
+        ["file::backend/app/routes.py", "file::backend/app/search_service.py"]
+    assert len(_aggregate_ids(flow_graph, level="file", directory=".")) == 6
@@ -0,0 +1,66 @@
+"""ContentStore: line slices and texts round-trip against str.split('\\n')"""
+import pickle
+import random
+
+import pytest
+
+from app.content_store import ContentStore
+
+TEXTS = {
+    "empty.py": "",
+    "one_line.py": "x = 1",
+    "trailing_newline.py": "a = 1\nb = 2\n",
+    "blank_lines.py": "\n\nfoo()\n\n",
+    "non_ascii.py": "# café ☕ — naïve\nשלום = 'עולם'\nemoji = '🚀'\n",
+    "crlf.py": "a = 1\r\nb = 2\r\n",
+}
+
+
+@pytest.fixture
+def store():
+    store = ContentStore()
+    for rel_path, text in TEXTS.items():
+        store.add(rel_path, text)
+    return store
+
+
+@pytest.mark.parametrize("rel_path", TEXTS)
+def test_text_and_lines_round_trip(store, rel_path):
+    text = TEXTS[rel_path]
+    lines = text.split("\n")
+    assert store.text(rel_path) == text
+    assert store.line_count(rel_path) == len(lines)
+    assert store.lines(rel_path) == lines
+    for start in range(-1, len(lines) + 2):
+        for end in range(max(start, 0), len(lines) + 3):
+            assert store.lines(rel_path, start, end) == lines[max(start, 0):end]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_random_slices(seed):
+    rng = random.Random(seed)
+    alphabet = "ab é\n\n€"
+    text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+    store = ContentStore()
+    store.add("f", text)
+    lines = text.split("\n")
+    for _ in range(20):
+        start, end = sorted(rng.randint(0, len(lines) + 1) for _ in range(2))
+        assert store.lines("f", start, end) == lines[start:end]
+
+
+def test_copy_from_shares_entries(store):
+    other = ContentStore()
+    other.copy_from(store, "non_ascii.py")
+    assert "non_ascii.py" in other and "empty.py" not in other
+    assert len(other) == 1 and list(other.keys()) == ["non_ascii.py"]
+    assert other.lines("non_ascii.py", 1, 2) == ["שלום = 'עולם'"]
+    assert other._blobs["non_ascii.py"] is store._blobs["non_ascii.py"]
+
+
+def test_add_replaces_and_pickles(store):
+    store.add("one_line.py", "y = 2\nz = 3")
+    assert store.lines("one_line.py") == ["y = 2", "z = 3"]
+    loaded = pickle.loads(pickle.dumps(store))
+    for rel_path in store.keys():
+        assert loaded.text(rel_path) == store.text(rel_path)
@@ -0,0 +1,91 @@
+"""EmbeddingCache: reuse across scans and the age / size bounds"""
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+
+from app.embedding_cache import EmbeddingCache
+
+DAY = 86400
+MODEL = "test-model"
+
+
+class _Model:
+    """Deterministic stand-in for a SentenceTransformer: one row per text, counting encoded texts"""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        self.encoded += len(texts)
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+def _age_entries(cache, texts, days):
+    """Pretend the entries of texts were last used days ago"""
+    stamp = int(time.time() - days * DAY)
+    with closing(sqlite3.connect(cache.db_path)) as conn, conn:
+        conn.executemany("UPDATE embeddings SET last_used = ? WHERE text_hash = ?",
+                         [(stamp, cache.text_hash(t)) for t in texts])
+
+
+def test_second_scan_hits_the_cache(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    model = _Model()
+    texts = ["def a(): pass", "def b(): pass", "def a(): pass"]
+    first, stats = cache.encode(model, MODEL, texts)
+    assert stats["misses"] == 3 and model.encoded == 2  # duplicate encoded once
+    second, stats = cache.encode(model, MODEL, texts)
+    assert stats == {"hits": 3, "misses": 0, "hit_rate": 1.0}
+    assert model.encoded == 2
+    np.testing.assert_array_equal(first, second)
+    assert cache.get_many("other-model", [cache.text_hash(texts[0])]) == {}
+
+
+def test_prune_drops_entries_unused_by_recent_scans(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_age_days=30, max_entries=0)
+    model = _Model()
+    cache.encode(model, MODEL, ["old code", "kept code", "new code"])
+    _age_entries(cache, ["old code", "kept code"], days=45)
+
+    cache.encode(model, MODEL, ["kept code"])  # a scan that still sees "kept code" renews it
+    assert cache.prune() == 1
+    assert len(cache) == 2
+    assert set(cache.get_many(MODEL, [cache.text_hash(t) for t in ["old code", "kept code", "new code"]])) == \
+        {cache.text_hash("kept code"), cache.text_hash("new code")}
+
+
+def test_prune_keeps_most_recently_used_entries(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_age_days=0, max_entries=2)
+    texts = [f"snippet {i}" for i in range(5)]
+    cache.encode(_Model(), MODEL, texts)
+    for days, text in enumerate(reversed(texts)):
+        _age_entries(cache, [text], days=days)  # snippet 4 newest, snippet 0 oldest
+    assert cache.prune() == 3
+    assert set(cache.get_many(MODEL, [cache.text_hash(t) for t in texts])) == \
+        {cache.text_hash("snippet 4"), cache.text_hash("snippet 3")}
+
+
+def test_unbounded_cache_is_not_pruned(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_age_days=0, max_entries=0)
+    cache.encode(_Model(), MODEL, ["a", "b"])
+    _age_entries(cache, ["a", "b"], days=1000)
+    assert cache.prune() == 0
+    assert len(cache) == 2
+
+
+def test_cache_from_before_pruning_is_migrated(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    vector = np.ones(3, dtype=np.float32)
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("CREATE TABLE embeddings (model TEXT NOT NULL, text_hash TEXT NOT NULL, dim INTEGER NOT NULL,"
+                     " vector BLOB NOT NULL, PRIMARY KEY (model, text_hash))")
+        conn.execute("INSERT INTO embeddings VALUES (?, ?, ?, ?)",
+                     (MODEL, EmbeddingCache.text_hash("legacy"), 3, vector.tobytes()))
+
+    cache = EmbeddingCache(path, max_age_days=1)
+    assert cache.prune() == 0  # legacy entries count as used at migration time
+    found = cache.get_many(MODEL, [cache.text_hash("legacy")])
+    np.testing.assert_array_equal(found[cache.text_hash("legacy")], vector)
+    assert cache.prune(now=time.time() + 2 * DAY) == 1
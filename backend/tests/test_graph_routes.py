@@ -0,0 +1,70 @@
+"""/graph query parameters against a small code graph"""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("openai")
+
+from flask import Flask
+
+from app import routes
+from app.code_graph import CodeGraph
+from app.code_graph_builder import CodeGraphBuilder
+
+ITEMS = [
+    {"file_path": "frontend/src/main.js", "name": "runSearch", "type": "function", "relations": ["renderResults"]},
+    {"file_path": "frontend/src/main.js", "name": "renderResults", "type": "function"},
+    {"file_path": "backend/app/routes.py", "name": "search", "type": "function"},
+]
+
+
+def _client(monkeypatch, items):
+    generation = SimpleNamespace(metadata=items)
+    code_graph = CodeGraph.build(items)
+    service = SimpleNamespace(generation=generation, is_indexed=lambda: True,
+                              code_graph_of=lambda g: code_graph)
+    monkeypatch.setattr(routes, "search_service", service)
+    monkeypatch.setattr(routes, "graph_builder", CodeGraphBuilder())
+    app = Flask(__name__)
+    app.register_blueprint(routes.routes_bp)
+    return app.test_client()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    return _client(monkeypatch, ITEMS)
+
+
+def test_graph_depth_is_validated(client):
+    response = client.get("/graph?node=runSearch&depth=two")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+    response = client.get(f"/graph?node=runSearch&depth={10 ** 9}")
+    assert response.status_code == 200
+    assert {node["name"] for node in response.get_json()["nodes"]} == {"runSearch", "renderResults"}
+
+
+def test_graph_directory_expand(client):
+    data = client.get("/graph?level=directory").get_json()
+    expand = {node["id"]: node["expand"] for node in data["nodes"]}
+    assert expand == {"dir::frontend": {"level": "file", "dir": "frontend"},
+                      "dir::backend": {"level": "file", "dir": "backend"}}
+
+    data = client.get("/graph?level=file&dir=frontend").get_json()
+    assert [node["id"] for node in data["nodes"]] == ["file::frontend/src/main.js"]
+
+
+def test_graph_file_expand_matches_the_exact_path(monkeypatch):
+    items = [
+        {"file_path": "app/routes.py", "name": "index", "type": "function"},
+        {"file_path": "myapp/routes.py", "name": "home", "type": "function"},
+        {"file_path": "backend/app/routes.py", "name": "search", "type": "function"},
+    ]
+    client = _client(monkeypatch, items)
+
+    data = client.get("/graph?level=file").get_json()
+    expand = next(node["expand"] for node in data["nodes"] if node["id"] == "file::app/routes.py")
+    data = client.get("/graph", query_string=expand).get_json()
+    assert [node["name"] for node in data["nodes"]] == ["index"]
@@ -0,0 +1,121 @@
+"""HybridPipelineAdapter: loading a SearchService generation without re-encoding or re-tokenizing"""
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("openai")
+
+from app import hybrid_search_pipeline
+from app.bm25_index import BM25Index
+from app.hybrid_pipeline_adapter import HybridPipelineAdapter
+from app.hybrid_search_pipeline import HybridSearchPipeline
+from app.index_generation import IndexGeneration
+from app.search_service import SearchService
+
+ITEMS = [
+    {"file_path": "backend/app/routes.py", "name": "search", "type": "function", "language": "python",
+     "code": "def search(query): return service.search(query)", "start_line": 1, "end_line": 2},
+    {"file_path": "frontend/src/api.js", "name": "runSearch", "type": "function", "language": "javascript",
+     "code": "function runSearch(q) { return fetch('/api/search') }", "start_line": 3, "end_line": 5},
+    {"file_path": "backend/config.py", "name": "Config", "type": "class", "language": "python",
+     "code": "class Config: DEBUG = False", "start_line": 1, "end_line": 1},
+]
+
+
+class _CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = _CountingModel()
+    monkeypatch.setattr(hybrid_search_pipeline, "get_embedding_model", lambda *args, **kwargs: model)
+    return model
+
+
+@pytest.fixture
+def indexed_service(tmp_path):
+    service = SearchService(str(tmp_path), str(tmp_path / "index.pkl"))
+    embeddings = np.eye(len(ITEMS), 4, dtype=np.float32)
+    bm25 = BM25Index([service._tokenize_for_bm25(item["code"]) for item in ITEMS])
+    service.generation = IndexGeneration(metadata=list(ITEMS), embeddings=embeddings, bm25=bm25)
+    return service
+
+
+@pytest.fixture
+def index_calls(monkeypatch):
+    """Record HybridSearchPipeline.index calls"""
+    calls = []
+
+    def index(self, documents, metadata, save_path=None, embeddings=None, bm25=None):
+        calls.append({"pipeline": self, "documents": documents, "metadata": metadata,
+                      "embeddings": embeddings, "bm25": bm25})
+        self.lexical_engine.index(documents, metadata, bm25=bm25)
+
+    monkeypatch.setattr(HybridSearchPipeline, "index", index)
+    return calls
+
+
+def test_initialize_reuses_embeddings_and_bm25(indexed_service, model, index_calls):
+    adapter = HybridPipelineAdapter(indexed_service)
+    adapter.initialize()
+
+    assert len(index_calls) == 1
+    call = index_calls[0]
+    assert call["pipeline"] is adapter.pipeline
+    assert call["embeddings"] is indexed_service.embedding_matrix
+    assert call["bm25"] is indexed_service.bm25
+    assert [m["name"] for m in call["metadata"]] == ["search", "runSearch", "Config"]
+    assert model.calls == 0
+    assert adapter.pipeline.lexical_engine.search("runSearch fetch")[0][0]["name"] == "runSearch"
+
+
+def test_refresh_swaps_in_a_new_pipeline(indexed_service, model, index_calls):
+    adapter = HybridPipelineAdapter(indexed_service)
+    adapter.initialize()
+    old_pipeline = adapter.pipeline
+    old_docs = list(old_pipeline.lexical_engine.docs)
+
+    items = ITEMS[:1]
+    indexed_service.generation = IndexGeneration(
+        metadata=items, embeddings=np.eye(1, 4, dtype=np.float32),
+        bm25=BM25Index([indexed_service._tokenize_for_bm25(items[0]["code"])])
+    )
+    adapter.refresh()
+
+    assert adapter.pipeline is not old_pipeline
+    assert old_pipeline.lexical_engine.docs == old_docs  # a search holding it is unaffected
+    assert index_calls[-1]["bm25"] is indexed_service.generation.bm25
+    assert len(adapter.pipeline.lexical_engine.docs) == 1
+    assert model.calls == 0
+
+
+def test_mismatched_generation_pieces_are_not_reused(indexed_service, model, index_calls):
+    indexed_service.generation = indexed_service.generation.replace(embeddings=np.eye(5, 4, dtype=np.float32))
+    HybridPipelineAdapter(indexed_service).initialize()
+    assert index_calls[0]["embeddings"] is None
+    assert index_calls[0]["bm25"] is indexed_service.bm25
+
+
+def test_semantic_engine_shares_the_mapped_matrix(indexed_service, model, monkeypatch, tmp_path):
+    path = tmp_path / "embeddings.npy"
+    np.save(path, np.eye(len(ITEMS), 4, dtype=np.float32))
+    mapped = np.load(path, mmap_mode="r")
+    indexed_service.generation = indexed_service.generation.replace(embeddings=mapped)
+    monkeypatch.setattr(hybrid_search_pipeline, "encode_query",
+                        lambda query, *args: np.array([0.0, 2.0, 0.0, 0.0], dtype=np.float32))
+
+    adapter = HybridPipelineAdapter(indexed_service)
+    adapter.initialize()
+
+    engine = adapter.pipeline.semantic_engine
+    assert np.shares_memory(engine.embeddings, mapped)
+    hits = engine.search("run search", top_k=2)
+    assert [metadata["name"] for metadata, _ in hits] == ["runSearch", "search"]
+    assert hits[0][1] == pytest.approx(1.0)
+    assert model.calls == 0
@@ -0,0 +1,57 @@
+"""Hybrid pipeline: LexicalSearchEngine persistence and HybridRanker fusion"""
+import pytest
+
+from app.bm25_index import BM25Index
+from app.hybrid_search_pipeline import HybridRanker, LexicalSearchEngine
+
+DOCS = [
+    "def parse_file(path): return tree_sitter.parse(path)",
+    "class SearchService: bm25 index over parsed files",
+    "fetch('/api/v1/search').then(render_results)",
+    "def build_graph(files): edges between importing files",
+]
+META = [{"id": i} for i in range(len(DOCS))]
+
+
+def _results(engine, query):
+    return [(meta["id"], pytest.approx(score)) for meta, score in engine.search(query, top_k=4)]
+
+
+@pytest.mark.parametrize("prebuilt", [False, True])
+def test_save_and_load_round_trip(tmp_path, prebuilt):
+    engine = LexicalSearchEngine()
+    bm25 = BM25Index([engine._tokenize(doc) for doc in DOCS]) if prebuilt else None
+    engine.index(DOCS, META, bm25=bm25)
+    engine.save_index(tmp_path / "bm25_index.pkl")
+
+    loaded = LexicalSearchEngine()
+    loaded.load_index(tmp_path / "bm25_index.pkl")
+
+    assert len(loaded.bm25) == len(DOCS)
+    for query in ("parse file", "bm25 index files", "search"):
+        assert _results(loaded, query) == _results(engine, query)
+        assert loaded.search(query)
+
+
+def test_ranker_accepts_context_weight_and_keeps_it_for_every_intent():
+    ranker = HybridRanker(alpha=0.6, beta=0.3, gamma=0.1)
+    for intent in ("general", "functionality", "location", "configuration", "ui-interaction"):
+        assert ranker.get_adaptive_weights(intent) == (0.6, 0.3, 0.1)
+    assert HybridRanker().get_adaptive_weights("ui-interaction") == (0.7, 0.3, 0.0)
+
+
+def test_combine_results_fuses_normalized_scores():
+    ranker = HybridRanker(alpha=0.6, beta=0.3, gamma=0.1)
+    a, b, c = ({"file_path": "x.py", "name": n, "start_line": i} for i, n in enumerate("abc"))
+    results = ranker.combine_results(
+        lexical_results=[(a, 12.0), (b, 3.0)],
+        semantic_results=[(b, 0.9), (a, 0.5)],
+        context_results=[(c, 0.8)],
+        top_k=3
+    )
+    by_name = {r["name"]: r for r in results}
+    assert by_name["a"]["score"] == pytest.approx(0.3)            # lexical best, semantic worst
+    assert by_name["b"]["score"] == pytest.approx(0.6)            # semantic best, lexical worst
+    assert by_name["c"]["score"] == pytest.approx(0.1)            # found through graph context only
+    assert [r["name"] for r in results] == ["b", "a", "c"]
+    assert ranker.combine_results([(a, 1.0)], [], top_k=0) == []
@@ -0,0 +1,72 @@
+"""ModuleResolver: Python and JS/TS import resolution over indexed paths"""
+import pickle
+
+import pytest
+
+from app.module_resolver import ModuleResolver
+
+PATHS = [
+    "cli.py",
+    "backend/main.py",
+    "backend/config.py",
+    "backend/search_engine.py",
+    "backend/app/__init__.py",
+    "backend/app/routes.py",
+    "backend/app/search_service.py",
+    "backend/app/utils.py",
+    "packages/core/__init__.py",
+    "packages/core/json.py",
+    "tools/scripts/utils.py",
+    "frontend/src/lib/api.ts",
+    "frontend/src/pages/Index.tsx",
+    "frontend/src/components/index.ts",
+]
+
+
+@pytest.fixture
+def resolver():
+    return ModuleResolver(PATHS)
+
+
+@pytest.mark.parametrize("module, source, expected", [
+    ("app.routes", "backend/main.py", "backend/app/routes.py"),
+    ("app.search_service", "backend/app/routes.py", "backend/app/search_service.py"),
+    ("config", "backend/app/routes.py", "backend/config.py"),
+    ("search_engine", "backend/app/search_service.py", "backend/search_engine.py"),
+    ("app", "backend/main.py", "backend/app/__init__.py"),
+    ("backend.app.routes", "cli.py", "backend/app/routes.py"),
+    ("core.json", "packages/core/__init__.py", "packages/core/json.py"),
+    (".routes", "backend/app/search_service.py", "backend/app/routes.py"),
+    (".", "backend/app/routes.py", "backend/app/__init__.py"),
+    ("utils", "tools/scripts/run.py", "tools/scripts/utils.py"),
+])
+def test_resolves_modules_under_import_roots(resolver, module, source, expected):
+    assert resolver.resolve_python(module, source) == expected
+
+
+@pytest.mark.parametrize("module, source", [
+    ("json", "backend/app/routes.py"),            # stdlib, despite packages/core/json.py
+    ("utils", "backend/main.py"),                 # only backend/app/utils.py and tools/scripts/utils.py exist
+    ("config", "cli.py"),                         # backend/config.py is not on the root's path
+    ("app.missing", "backend/main.py"),           # no fallback to the app package
+    ("flask", "backend/app/routes.py"),
+    (".missing", "backend/app/routes.py"),
+    ("...too_far", "backend/app/routes.py"),
+])
+def test_unresolved_modules_are_none(resolver, module, source):
+    assert resolver.resolve_python(module, source) is None
+
+
+def test_js_imports(resolver):
+    assert resolver.resolve_js("@/lib/api", "frontend/src/pages/Index.tsx") == "frontend/src/lib/api.ts"
+    assert resolver.resolve_js("../components", "frontend/src/pages/Index.tsx") == "frontend/src/components/index.ts"
+    assert resolver.resolve_js("react", "frontend/src/pages/Index.tsx") is None
+
+
+def test_pickled_resolver_from_the_suffix_table_version(resolver):
+    old = ModuleResolver.__new__(ModuleResolver)
+    old.__dict__.update({"_paths": dict(resolver._paths), "_modules": {"json": "packages/core/json.py"}})
+    restored = pickle.loads(pickle.dumps(old))
+    assert not hasattr(restored, "_modules")
+    assert restored.resolve_python("json", "backend/app/routes.py") is None
+    assert restored.resolve_python("config", "backend/app/routes.py") == "backend/config.py"
@@ -0,0 +1,49 @@
+"""iter_parsed_files: spawned worker pool and the serial fallback give the same results"""
+import concurrent.futures
+
+import pytest
+
+from app import parallel_parser
+from app.parallel_parser import iter_parsed_files
+
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = []
+    for i in range(8):
+        path = tmp_path / f"mod_{i}.py"
+        path.write_text(f"def func_{i}(x):\n    return x + {i}\n\n\nclass Klass{i}:\n    pass\n")
+        paths.append(path)
+    return paths
+
+
+def _names(results):
+    return [(path.name, sorted(item["name"] for item in items or [])) for path, items in results]
+
+
+def test_pool_uses_spawn_context(sources, monkeypatch):
+    contexts = []
+    real_pool = concurrent.futures.ProcessPoolExecutor
+
+    def recording_pool(*args, **kwargs):
+        contexts.append(kwargs.get("mp_context"))
+        return real_pool(*args, **kwargs)
+
+    monkeypatch.setattr(parallel_parser, "ProcessPoolExecutor", recording_pool)
+    parallel = list(iter_parsed_files(sources, workers=2, chunk_size=2))
+    serial = list(iter_parsed_files(sources, workers=1))
+
+    assert [ctx.get_start_method() for ctx in contexts] == ["spawn"]
+    assert [path for path, _ in parallel] == sources
+    assert _names(parallel) == _names(serial)
+    assert all(items for _, items in parallel)
+
+
+def test_falls_back_to_serial_when_pool_unavailable(sources, monkeypatch):
+    def broken_pool(*args, **kwargs):
+        raise OSError("no process pool here")
+
+    monkeypatch.setattr(parallel_parser, "ProcessPoolExecutor", broken_pool)
+    results = list(iter_parsed_files(sources, workers=4, chunk_size=2))
+    assert [path for path, _ in results] == sources
+    assert _names(results) == _names(list(iter_parsed_files(sources, workers=1)))
@@ -0,0 +1,150 @@
+"""QueryEmbeddingCache: LRU eviction, TTL expiry, batched encoding and the /health stats"""
+import numpy as np
+import pytest
+from flask import Flask
+
+from app import embedding_model
+from app import routes
+from app.query_embedding_cache import QueryEmbeddingCache
+
+MODEL = "test-model"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Encoder:
+    """Deterministic stand-in for the model, recording every text it encodes"""
+
+    def __init__(self):
+        self.encoded = []
+        self.calls = 0
+
+    @staticmethod
+    def vector(text):
+        return [len(text), sum(map(ord, text)) % 97, 1.0]
+
+    def encode(self, text):
+        self.calls += 1
+        self.encoded.append(text)
+        return np.array(self.vector(text), dtype=np.float64)
+
+    def encode_many(self, texts):
+        self.calls += 1
+        self.encoded.extend(texts)
+        return np.array([self.vector(t) for t in texts], dtype=np.float64)
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+@pytest.fixture
+def encoder():
+    return _Encoder()
+
+
+def test_repeated_query_is_encoded_once(clock, encoder):
+    cache = QueryEmbeddingCache(clock=clock)
+    first = cache.get_or_encode(MODEL, "find  user ", encoder.encode)
+    second = cache.get_or_encode(MODEL, " find user", encoder.encode)
+    assert encoder.encoded == ["find user"]
+    assert second is first
+    assert first.dtype == np.float32 and not first.flags.writeable
+    assert first.tolist() == encoder.vector("find user")
+    # The model is part of the key
+    cache.get_or_encode("other-model", "find user", encoder.encode)
+    assert encoder.encoded == ["find user", "find user"]
+
+
+def test_least_recently_used_entry_is_evicted(clock, encoder):
+    cache = QueryEmbeddingCache(max_entries=2, clock=clock)
+    for query in ("a", "b", "a", "c"):  # touching "a" leaves "b" the oldest
+        cache.get_or_encode(MODEL, query, encoder.encode)
+    assert encoder.encoded == ["a", "b", "c"]
+    cache.get_or_encode(MODEL, "a", encoder.encode)
+    cache.get_or_encode(MODEL, "b", encoder.encode)
+    assert encoder.encoded == ["a", "b", "c", "b"]
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["entries"] == 2
+
+    cache.configure(max_entries=1)
+    assert cache.stats()["entries"] == 1
+    cache.configure(max_entries=0)
+    cache.get_or_encode(MODEL, "d", encoder.encode)
+    cache.get_or_encode(MODEL, "d", encoder.encode)
+    assert encoder.encoded[-2:] == ["d", "d"]
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_expire_after_the_ttl(clock, encoder):
+    cache = QueryEmbeddingCache(ttl_seconds=60, clock=clock)
+    cache.get_or_encode(MODEL, "q", encoder.encode)
+    clock.now += 59.9
+    cache.get_or_encode(MODEL, "q", encoder.encode)
+    assert encoder.encoded == ["q"]
+    clock.now += 0.1  # 60s after the encode; a hit does not refresh the age
+    cache.get_or_encode(MODEL, "q", encoder.encode)
+    assert encoder.encoded == ["q", "q"]
+    cache.get_or_encode_many(MODEL, ["q"], encoder.encode_many)
+    clock.now += 60
+    cache.get_or_encode_many(MODEL, ["q"], encoder.encode_many)
+    assert encoder.encoded == ["q", "q", "q"]
+
+    cache.configure(ttl_seconds=0)  # 0: entries never expire
+    clock.now += 10 ** 6
+    cache.get_or_encode(MODEL, "q", encoder.encode)
+    assert encoder.encoded == ["q", "q", "q"]
+
+
+def test_get_or_encode_many_encodes_each_missing_query_once(clock, encoder):
+    cache = QueryEmbeddingCache(clock=clock)
+    cache.get_or_encode(MODEL, "cached", encoder.encode)
+    encoder.calls = 0
+    queries = ["b", "cached", " b ", "a", "b", "cached"]
+    vectors = cache.get_or_encode_many(MODEL, queries, encoder.encode_many)
+
+    assert encoder.calls == 1
+    assert encoder.encoded[1:] == ["b", "a"]
+    assert [v.tolist() for v in vectors] == [encoder.vector(q.strip()) for q in queries]
+    assert vectors[0] is vectors[2] is vectors[4]
+    assert all(v.dtype == np.float32 and not v.flags.writeable for v in vectors)
+
+    # Everything is cached now: no encode at all
+    again = cache.get_or_encode_many(MODEL, queries, encoder.encode_many)
+    assert encoder.calls == 1
+    assert all(x is y for x, y in zip(again, vectors))
+    assert cache.get_or_encode(MODEL, "a", encoder.encode) is vectors[3]
+
+
+def test_stats_count_hits_and_misses(clock, encoder):
+    cache = QueryEmbeddingCache(max_entries=8, ttl_seconds=30, clock=clock)
+    assert cache.stats()["hit_rate"] == 0.0
+    for query in ("a", "a", "b", "a"):
+        cache.get_or_encode(MODEL, query, encoder.encode)
+    assert cache.stats() == {
+        "entries": 2, "max_entries": 8, "ttl_seconds": 30,
+        "hits": 2, "misses": 2, "evictions": 0, "hit_rate": 0.5
+    }
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_health_reports_the_query_cache_stats(monkeypatch, clock, encoder):
+    cache = QueryEmbeddingCache(max_entries=4, ttl_seconds=10, clock=clock)
+    for query in ("a", "b", "a"):
+        cache.get_or_encode(MODEL, query, encoder.encode)
+    monkeypatch.setattr(embedding_model, "query_cache", cache)
+    monkeypatch.setattr(routes, "search_service", None)
+    app = Flask(__name__)
+    app.register_blueprint(routes.routes_bp)
+
+    body = app.test_client().get("/health").get_json()
+    assert body["query_cache"] == cache.stats()
+    assert body["query_cache"]["hits"] == 1 and body["query_cache"]["misses"] == 2
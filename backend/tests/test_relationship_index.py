@@ -0,0 +1,201 @@
+"""RelationshipIndex.find against a linear scan over every item"""
+import pytest
+
+from app.relationship_index import (
+    RelationshipIndex, _name_tokens, contains, detect_context, identifiers, normalize_endpoint, words
+)
+from app.route_table import route_methods, segments_match, split_path
+
+
+def _api_call(file_path, name, endpoint, method="GET", **extra):
+    return {"file_path": file_path, "name": name, "type": "api_call", "language": "javascript",
+            "api_calls": [{"endpoint": endpoint, "method": method}], **extra}
+
+
+def _route(file_path, path, methods=("GET",), **extra):
+    return {"file_path": file_path, "name": path, "type": "route", "language": "python",
+            "routes": [{"path": path, "methods": list(methods)}], **extra}
+
+
+def _function(file_path, name, relations=(), imports=(), language="python", **extra):
+    return {"file_path": file_path, "name": name, "type": "function", "language": language,
+            "relations": list(relations), "imports": list(imports), **extra}
+
+
+ITEMS = [
+    _function("backend/app/search_service.py", "search", ["self.engine.search", "build_snippet"],
+              ["search_engine.SearchEngine"]),
+    _function("backend/app/search_service.py", "build_snippet", ["text.split"]),
+    _function("backend/app/research_notes.py", "research_notes", ["open"]),
+    _function("backend/search_engine.py", "SearchEngine", ["BM25Index", "tokenize"]),
+    _function("backend/app/utils.py", "tokenize", ["re.findall"]),
+    _function("backend/app/graph_service.py", "find_related", ["index.find", "build_snippet"],
+              ["app.relationship_index"]),
+    _route("backend/app/routes.py", "/search", methods=("GET", "POST"), relations=["search_service.search"]),
+    _route("backend/app/routes.py", "/users/<int:user_id>"),
+    _route("backend/app/routes.py", "/users/<int:user_id>", methods=("DELETE",)),
+    _route("backend/app/routes.py", "/files/<path:rest>"),
+    _route("backend/app/routes.py", "/api/v1/graph"),
+    _function("backend/app/routes.py", "search_code", ["search_service.search"]),
+    _function("backend/app/routes.py", "users", []),
+    _api_call("frontend/src/lib/api.ts", "searchCode", "/api/search", "POST"),
+    _api_call("frontend/src/lib/api.ts", "loadUser", "/api/users/${id}"),
+    _api_call("frontend/src/lib/api.ts", "deleteUser", "/api/users/42", "DELETE"),
+    _api_call("frontend/src/lib/api.ts", "loadGraph", "${API_BASE}/graph${query}"),
+    _api_call("frontend/src/lib/api.ts", "fetchFile", "/files/src/app.py"),
+    _api_call("frontend/src/lib/api.ts", "loadMe", "/users/me"),
+    {"file_path": "frontend/src/main.js", "name": "handleSearchClick", "type": "function",
+     "language": "javascript", "relations": ["searchCode"],
+     "event_listeners": [{"event": "click", "handler": "handleSearchClick"}]},
+    {"file_path": "frontend/src/main.js", "name": "onResultsPanel", "type": "function",
+     "language": "javascript", "event_listeners": [{"event": "scroll", "handler": "onResultsPanelScroll"}]},
+    {"file_path": "frontend/index.html", "name": "search-button", "type": "button", "language": "html",
+     "attributes": {"id": "search-click", "class": ["results-panel", "btn"]}},
+    {"file_path": "frontend/index.html", "name": "results", "type": "element", "language": "html",
+     "attributes": {"id": "", "class": ["results-panel"]}},
+    _function("backend/app/routes.py", "", ["search"]),
+]
+
+
+def _linear_find(items, base_item):
+    """
+    The per-item loop of the old GraphService.find_related, with the index's matching rules
+    (token containment, route segments, method preference) applied to every item in turn
+    """
+    base_name = base_item.get("name", "")
+    base_type = base_item.get("type", "")
+    base_key = (base_item.get("file_path", ""), base_name)
+    base_context = detect_context(base_item)
+    name_words = _name_tokens(base_name)
+    base_relations = [identifiers(rel) for rel in base_item.get("relations", [])]
+
+    base_endpoint, base_method = "", None
+    if base_type == "api_call" and base_context == "frontend":
+        for api_call in base_item.get("api_calls", []):
+            if api_call.get("endpoint", ""):
+                base_endpoint, base_method = api_call["endpoint"], api_call.get("method")
+                break
+
+    # Routes matching the call, narrowed to those accepting its method when there are any
+    route_hits = []
+    if base_endpoint:
+        call_segments = split_path(base_endpoint)
+        for item_id, item in enumerate(items):
+            if detect_context(item) != "backend":
+                continue
+            for route in item.get("routes", []):
+                if route.get("path") and segments_match(call_segments, split_path(route["path"])):
+                    route_hits.append((item_id, route_methods(route)))
+        if base_method:
+            preferred = [hit for hit in route_hits if base_method.upper() in hit[1]]
+            route_hits = preferred or route_hits
+    route_ids = {item_id for item_id, _ in route_hits}
+
+    route_methods_of_base = ()
+    if base_type == "route" and base_context == "backend" and base_name:
+        for route in base_item.get("routes", []):
+            if route.get("path") == base_name:
+                route_methods_of_base = route_methods(route)
+                break
+
+    related = []
+    for item_id, item in enumerate(items):
+        if (item.get("file_path"), item.get("name", "")) == base_key:
+            continue
+        context = detect_context(item)
+
+        if any(contains(identifiers(rel), name_words) for rel in item.get("relations", [])):
+            related.append((item_id, {"relation_type": "calls_function", "relation_strength": "strong",
+                                      "direction": "outgoing"}))
+        item_name_words = _name_tokens(item.get("name", ""))
+        if any(contains(rel, item_name_words) for rel in base_relations):
+            related.append((item_id, {"relation_type": "called_by_function", "relation_strength": "strong",
+                                      "direction": "incoming"}))
+
+        if base_endpoint:
+            if item_id in route_ids:
+                related.append((item_id, {"relation_type": "handles_endpoint", "relation_strength": "strong",
+                                          "direction": "backend", "endpoint_match": base_endpoint,
+                                          "context": "backend"}))
+            if context == "backend" and contains(words(normalize_endpoint(item.get("name", ""))),
+                                                 words(normalize_endpoint(base_endpoint))):
+                related.append((item_id, {"relation_type": "endpoint_handler", "relation_strength": "medium",
+                                          "direction": "backend", "context": "backend"}))
+
+        if base_type == "route" and base_context == "backend" and base_name and context == "frontend":
+            route_segments = split_path(base_name)
+            calls = [(api_call["endpoint"], (api_call.get("method") or "GET").upper())
+                     for api_call in item.get("api_calls", [])
+                     if api_call.get("endpoint") and segments_match(split_path(api_call["endpoint"]), route_segments)]
+            if calls:
+                endpoint = next((e for e, m in calls if m in route_methods_of_base), calls[0][0])
+                related.append((item_id, {"relation_type": "calls_route", "relation_strength": "strong",
+                                          "direction": "frontend", "endpoint_match": endpoint,
+                                          "context": "frontend"}))
+
+        if base_type in ["button", "element", "input"] and base_item.get("language", "") == "html":
+            attributes = base_item.get("attributes", {})
+            id_words = words(attributes.get("id", ""))
+            class_words = [cw for cw in (words(cls) for cls in attributes.get("class", [])) if cw]
+            for listener in item.get("event_listeners", []):
+                handler = words(listener.get("handler", ""))
+                if contains(handler, id_words):
+                    strength = "strong"
+                elif any(contains(handler, cw) for cw in class_words):
+                    strength = "medium"
+                else:
+                    continue
+                related.append((item_id, {"relation_type": "handles_event", "relation_strength": strength,
+                                          "direction": "js_handler"}))
+                break
+
+        if any(contains(identifiers(imp), name_words) for imp in item.get("imports", [])):
+            related.append((item_id, {"relation_type": "imports", "relation_strength": "weak",
+                                      "direction": "depends_on"}))
+    return related
+
+
+@pytest.fixture(scope="module")
+def index():
+    return RelationshipIndex(ITEMS)
+
+
+@pytest.mark.parametrize("base_id", range(len(ITEMS)), ids=lambda i: ITEMS[i]["name"] or "<unnamed>")
+def test_find_matches_linear_scan(index, base_id):
+    assert index.find(ITEMS[base_id]) == _linear_find(ITEMS, ITEMS[base_id])
+
+
+def test_fixture_covers_every_relation_type(index):
+    found = {relation["relation_type"] for item in ITEMS for _, relation in index.find(item)}
+    assert found == {"calls_function", "called_by_function", "handles_endpoint", "endpoint_handler",
+                     "calls_route", "handles_event", "imports"}
+
+
+def test_records_build_the_same_index():
+    from_records = RelationshipIndex(ITEMS, records=iter(ITEMS))
+    from_items = RelationshipIndex(ITEMS)
+    for item in ITEMS:
+        assert from_records.find(item) == from_items.find(item)
+
+
+def test_call_tokens_do_not_match_inside_words(index):
+    search = ITEMS[0]
+    names = {ITEMS[item_id]["name"] for item_id, _ in index.find(search)}
+    assert "research_notes" not in names
+    assert "SearchEngine" not in names  # imports search_engine, a different identifier
+
+
+def _tables(index):
+    word_indexes = [value for value in vars(index).values() if hasattr(value, "_by_window")]
+    return [({k: set(v) for k, v in wi._by_window.items()}, {k: set(v) for k, v in wi._by_text.items()})
+            for wi in word_indexes]
+
+
+def test_find_leaves_the_index_unchanged():
+    index = RelationshipIndex(ITEMS)
+    before = _tables(index)
+    button = next(item for item in ITEMS if item["type"] == "button")
+    first = index.find(button)
+    assert _tables(index) == before
+    assert index.find(button) == first
+    assert _tables(index) == before
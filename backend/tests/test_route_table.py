@@ -0,0 +1,68 @@
+"""RouteTable: matching frontend calls to backend routes (and back)"""
+import pytest
+
+from app.route_table import CATCH_ALL, PARAM, RouteTable, segments_match, split_path
+
+
+@pytest.fixture
+def table():
+    table = RouteTable()
+    table.add("/search", "search", ["POST"])
+    table.add("/users/<int:id>", "user")
+    table.add("/users/me", "me")
+    table.add("/files/<path:rest>", "files")
+    table.add("/api/v1/graph", "graph")
+    return table
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/api/users/<int:id>", ("users", PARAM)),
+    ("http://localhost:8000/api/search?q=x", ("search",)),
+    ("/api/v1/search", ("search",)),
+    ("${API_BASE}/search", ("search",)),
+    ("${base}/users/${id}", ("users", PARAM)),
+    ("/graph${query}", ("graph",)),
+    ("/files/<path:rest>", ("files", CATCH_ALL)),
+])
+def test_split_path(path, expected):
+    assert split_path(path) == expected
+
+
+def test_template_base_is_stripped_not_a_parameter(table):
+    assert table.resolve("${base}/users/${id}") == ["user"]
+    assert table.resolve("${API_BASE}/search", "POST") == ["search"]
+    assert table.resolve("${API_BASE}/graph") == ["graph"]
+
+
+def test_call_parameter_only_matches_route_parameters(table):
+    assert table.resolve("/users/${id}") == ["user"]
+    assert table.resolve("/${section}/me") == []
+    assert table.resolve("/users/me") == ["user", "me"]
+    assert table.resolve("/files/${name}") == ["files"]
+
+
+def test_catch_all_takes_the_rest(table):
+    assert table.resolve("/files/a/b/c.txt") == ["files"]
+    assert table.resolve("/files") == []
+
+
+def test_method_preference(table):
+    table.add("/search", "search_get", ["GET"])
+    assert table.resolve("/search", "GET") == ["search_get"]
+    assert table.resolve("/search", "DELETE") == ["search", "search_get"]
+
+
+def test_route_query_against_calls():
+    callers = RouteTable()
+    callers.add("/users/42", "static_call")
+    callers.add("/users/${id}", "template_call")
+    callers.add("${API_BASE}/users/me", "me_call")
+    assert callers.resolve("/users/<id>", query_is_route=True) == ["static_call", "template_call", "me_call"]
+    assert callers.resolve("/users/me", query_is_route=True) == ["me_call"]
+
+
+def test_segments_match_is_directional():
+    assert segments_match(split_path("/users/42"), split_path("/users/<id>"))
+    assert segments_match(split_path("/users/${id}"), split_path("/users/<id>"))
+    assert not segments_match(split_path("/users/${id}"), split_path("/users/me"))
+    assert segments_match(split_path("/files/a/b"), split_path("/files/<path:p>"))
@@ -0,0 +1,131 @@
+"""ScanJobManager: job lifecycle, progress and cancellation"""
+import threading
+
+import pytest
+
+from app.scan_jobs import (
+    CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, ScanCancelled, ScanJobManager, ScanProgress
+)
+
+TIMEOUT = 5
+
+
+@pytest.fixture
+def manager():
+    manager = ScanJobManager(workers=1, max_finished=3)
+    yield manager
+    manager.shutdown(wait=True)
+
+
+def _blocking_scan(started: threading.Event, release: threading.Event, steps=None):
+    """Scan that signals started, waits for release, then walks steps checking for cancellation"""
+    def scan(progress: ScanProgress):
+        progress.set_stage("walking")
+        started.set()
+        release.wait(TIMEOUT)
+        for _ in range(steps or 0):
+            progress.check_cancelled()
+            progress.advance("files_walked")
+        progress.set_stage("writing")
+        return {"files": progress.counts["files_walked"]}
+    return scan
+
+
+def test_job_succeeds_with_result_and_progress(manager):
+    job = manager.submit("scan", lambda progress: progress.advance("files_walked", 3) or {"ok": True}, {"root": "x"})
+    assert job.wait(TIMEOUT)
+    assert job.status == SUCCEEDED
+    assert job.result == {"ok": True}
+    info = job.to_dict()
+    assert info["progress"]["files_walked"] == 3
+    assert info["progress"]["stage"] == "done"
+    assert info["params"] == {"root": "x"}
+    assert manager.get(job.id) is job
+
+
+def test_failed_job_records_error(manager):
+    def scan(progress):
+        raise RuntimeError("disk full")
+
+    job = manager.submit("scan", scan)
+    assert job.wait(TIMEOUT)
+    assert job.status == FAILED
+    assert job.error == "disk full"
+
+
+def test_cancel_running_job_stops_at_next_check(manager):
+    started, release = threading.Event(), threading.Event()
+    job = manager.submit("scan", _blocking_scan(started, release, steps=100))
+    assert started.wait(TIMEOUT)
+    assert job.status == RUNNING
+
+    assert manager.cancel(job.id) is job
+    release.set()
+    assert job.wait(TIMEOUT)
+    assert job.status == CANCELLED
+    assert job.result is None
+    assert job.progress.snapshot()["files_walked"] == 0
+    assert job.to_dict()["progress"]["stage"] == CANCELLED
+
+
+def test_cancel_queued_job_never_runs(manager):
+    started, release = threading.Event(), threading.Event()
+    running = manager.submit("scan", _blocking_scan(started, release))
+    ran = threading.Event()
+    queued = manager.submit("scan", lambda progress: ran.set())
+    assert started.wait(TIMEOUT)
+    assert queued.status == QUEUED
+
+    manager.cancel(queued.id)
+    release.set()
+    assert running.wait(TIMEOUT) and queued.wait(TIMEOUT)
+    assert running.status == SUCCEEDED
+    assert queued.status == CANCELLED
+    assert not ran.is_set()
+
+
+def test_cancel_finished_or_unknown_job(manager):
+    job = manager.submit("scan", lambda progress: {})
+    assert job.wait(TIMEOUT)
+    assert manager.cancel(job.id) is job
+    assert job.status == SUCCEEDED
+    assert manager.cancel("no-such-job") is None
+
+
+def test_cancellation_is_not_swallowed_by_exception_handlers():
+    progress = ScanProgress()
+    progress.cancel()
+    with pytest.raises(ScanCancelled):
+        try:
+            progress.set_stage("parsing")
+        except Exception:  # the per-file handlers of the indexing code
+            pass
+
+
+def test_finished_jobs_are_pruned(manager):
+    jobs = [manager.submit("scan", lambda progress: {}) for _ in range(6)]
+    for job in jobs:
+        assert job.wait(TIMEOUT)
+    manager.submit("scan", lambda progress: {}).wait(TIMEOUT)
+    kept = manager.list()
+    assert len([job for job in kept if job.finished]) <= manager.max_finished + 1
+    assert jobs[0] not in kept
+
+
+def test_cancelled_index_codebase_keeps_previous_index(tmp_path):
+    from search_engine import SearchEngine
+
+    for i in range(5):
+        (tmp_path / f"mod_{i}.py").write_text(f"def func_{i}():\n    return {i}\n")
+    engine = SearchEngine(str(tmp_path))
+    engine.index_codebase()
+    bm25, files = engine.bm25, list(engine.indexed_files)
+
+    (tmp_path / "mod_new.py").write_text("def func_new():\n    return 0\n")
+    progress = ScanProgress()
+    progress.cancel()
+    with pytest.raises(ScanCancelled):
+        engine.index_codebase(progress=progress)
+    assert engine.bm25 is bm25
+    assert engine.indexed_files == files
+    assert "mod_new.py" not in engine.file_manifest
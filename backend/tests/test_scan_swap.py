@@ -0,0 +1,90 @@
+"""/scan builds the next generation, vector index and hybrid pipeline aside and swaps them in together"""
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("openai")
+
+from app import routes
+from app.scan_jobs import ScanProgress
+from app.search_service import SearchService
+
+
+def _codebase(root: Path, name: str) -> Path:
+    root.mkdir()
+    (root / f"{name}.py").write_text(f"def {name}():\n    return 1\n")
+    return root
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = SearchService(str(_codebase(tmp_path / "old", "old_func")), str(tmp_path / "index.pkl"))
+    service.semantic_service = SimpleNamespace(embedding_model=None)  # BM25 only: no model to load
+    service.index_codebase()
+    return service
+
+
+def test_build_generation_leaves_the_served_root(service, tmp_path):
+    old_generation = service.generation
+    new_root = _codebase(tmp_path / "new", "new_func")
+
+    changes, generation = service.build_generation(root_path=new_root)
+    assert changes["added"] == 1
+    assert generation.root_path == new_root.resolve()
+    assert service.generation is old_generation
+    assert service.root_path == (tmp_path / "old").resolve()
+
+    service.publish_generation(generation)
+    assert service.root_path == new_root.resolve()
+    assert "new_func.py" in service.engine.file_manifest
+
+
+class _VectorService:
+    def __init__(self, search_service):
+        self.search_service = search_service
+        self.seen = []
+        self.published = None
+        self.last_cache_stats = {}
+
+    def build_vector_index(self, root_path=None, progress=None, publish=True):
+        assert not publish
+        self.seen.append(self.search_service.generation)
+        return None, [{"file_path": "new_func.py"}], None, Path(root_path)
+
+    def publish_vector_index(self, built, progress=None):
+        self.published = (built, self.search_service.generation)
+
+
+class _Adapter:
+    def __init__(self, search_service):
+        self.search_service = search_service
+        self.seen = []
+        self.pipeline = None
+
+    def prepare_refresh(self, generation):
+        self.seen.append(self.search_service.generation)
+        return ("pipeline", generation)
+
+    def refresh(self, pipeline=None):
+        self.pipeline = pipeline
+
+
+def test_run_scan_swaps_everything_together(service, tmp_path, monkeypatch):
+    old_generation = service.generation
+    vectors, adapter = _VectorService(service), _Adapter(service)
+    monkeypatch.setattr(routes, "search_service", service)
+    monkeypatch.setattr(routes, "semantic_service", vectors)
+    monkeypatch.setattr(routes, "hybrid_pipeline_adapter", adapter)
+    new_root = _codebase(tmp_path / "new", "new_func")
+
+    result = routes._run_scan(str(new_root), True, ScanProgress())
+
+    # The old generation kept serving while the vector index and pipeline were built
+    assert vectors.seen == [old_generation] and adapter.seen == [old_generation]
+    assert service.generation is not old_generation
+    assert service.root_path == new_root.resolve()
+    assert vectors.published[1] is service.generation
+    assert adapter.pipeline == ("pipeline", service.generation)
+    assert result["semantic_snippets"] == 1
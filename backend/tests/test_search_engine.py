@@ -0,0 +1,190 @@
+"""SearchEngine: incremental indexing and loading engines pickled by older versions"""
+import io
+import os
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.bm25_index import BM25Index
+from search_engine import SearchEngine, load_engine
+
+FILES = {
+    "app.py": "from flask import Flask\n\ndef search_files(query):\n    return query\n",
+    "util.py": "def tokenize(text):\n    return text.split()\n",
+    "graph.py": "def build_graph(nodes):\n    return dict(nodes)\n",
+}
+
+
+def _baseline_engine_pickle(root: Path) -> bytes:
+    """An engine as the pre-BM25Index versions pickled it: BM25Okapi, line lists, token lists"""
+    rank_bm25 = pytest.importorskip("rank_bm25")
+    engine = SearchEngine.__new__(SearchEngine)
+    corpus = [SearchEngine._tokenize(SearchEngine, text) for text in FILES.values()]
+    engine.__dict__.update({
+        "root_path": root,
+        "indexed_files": [root / name for name in FILES],
+        "file_contents": {name: text.split("\n") for name, text in FILES.items()},
+        "tokenized_corpus": corpus,
+        "bm25": rank_bm25.BM25Okapi(corpus),
+    })
+    return pickle.dumps(engine)
+
+
+def test_legacy_pickle_loads_without_rank_bm25(tmp_path, monkeypatch):
+    payload = _baseline_engine_pickle(tmp_path)
+    monkeypatch.setitem(sys.modules, "rank_bm25", None)  # dependency uninstalled
+
+    with pytest.raises(ImportError):
+        pickle.loads(payload)
+
+    engine = load_engine(io.BytesIO(payload))
+    assert isinstance(engine.bm25, BM25Index)
+    assert len(engine.bm25) == len(FILES)
+    assert engine.contents.text("util.py") == FILES["util.py"]
+    assert engine.search("tokenize", max_results=1)[0]["file_path"] == "util.py"
+
+
+def test_references_ignore_routes_and_calls_inside_strings():
+    source = (
+        "from flask import Blueprint\n"
+        "\n"
+        "@routes_bp.route('/search', methods=['POST'])\n"
+        "def search():\n"
+        "    pass\n"
+        "\n"
+        "    @app.get('/nested')\n"
+        "    def nested():\n"
+        "        pass\n"
+        "\n"
+        "DOCS = [\n"
+        "    \"@app.route('/api/search', methods=['POST'])\\ndef search_api(): ...\",\n"
+        "    \"fetch('/api/search', {method: 'POST'})\",\n"
+        "]\n"
+    )
+    references = SearchEngine._extract_references("routes.py", source)
+    assert references["routes"] == [("/search", None), ("/nested", "GET")]
+    assert references["api_calls"] == []
+    assert references["imports"] == ["flask"]
+
+
+def test_references_js_calls():
+    source = "import { api } from './api';\nconst r = await fetch(`${API_BASE}/search`, { method: 'POST' });\n"
+    references = SearchEngine._extract_references("src/lib/client.ts", source)
+    assert references["imports"] == ["./api"]
+    assert references["api_calls"] == [("/search", None)]
+
+
+def _write(root: Path, files):
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def _scores(engine, query):
+    return {r["file_path"]: pytest.approx(r["score"]) for r in engine.search(query)}
+
+
+def test_walk_skips_ignored_dirs_and_extensions(tmp_path):
+    _write(tmp_path, {**FILES, "node_modules/lib.js": "x", "logo.png": "x", "web/main.ts": "let x = 1\n"})
+    engine = SearchEngine(str(tmp_path))
+    found = [p.relative_to(tmp_path).as_posix() for p in engine._iter_source_files()]
+    assert sorted(found) == sorted([*FILES, "web/main.ts"])
+
+
+def test_incremental_index_codebase(tmp_path):
+    _write(tmp_path, FILES)
+    engine = SearchEngine(str(tmp_path))
+    assert engine.index_codebase() == {"added": 3, "updated": 0, "removed": 0, "unchanged": 0}
+
+    bm25 = engine.bm25
+    assert engine.index_codebase() == {"added": 0, "updated": 0, "removed": 0, "unchanged": 3}
+    assert engine.bm25 is bm25  # nothing changed: postings reused
+
+    _write(tmp_path, {"util.py": "def tokenize(text, sep):\n    return text.split(sep)\n",
+                      "extra.py": "def search_extra(query):\n    return query\n"})
+    (tmp_path / "graph.py").unlink()
+    assert engine.index_codebase() == {"added": 1, "updated": 1, "removed": 1, "unchanged": 1}
+
+    rebuilt = SearchEngine(str(tmp_path))
+    rebuilt.index_codebase(incremental=False)
+    assert sorted(engine.contents.keys()) == sorted(rebuilt.contents.keys())
+    assert engine.contents.text("util.py") == rebuilt.contents.text("util.py")
+    for query in ("tokenize sep", "search query", "build graph"):
+        assert _scores(engine, query) == _scores(rebuilt, query)
+    assert "graph.py" not in _scores(engine, "build graph")
+
+
+def test_touched_but_unchanged_file_is_reused(tmp_path):
+    _write(tmp_path, FILES)
+    engine = SearchEngine(str(tmp_path))
+    engine.index_codebase()
+    path = tmp_path / "app.py"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert engine.index_codebase() == {"added": 0, "updated": 0, "removed": 0, "unchanged": 3}
+    assert engine.file_manifest["app.py"]["mtime"] == path.stat().st_mtime_ns
+
+
+def test_line_list_pickle_is_upgraded_to_content_store(tmp_path):
+    files = {**FILES, "notes.py": "# café ☕\nmessage = 'שלום'\n"}
+    _write(tmp_path, files)
+    engine = SearchEngine(str(tmp_path))
+    engine.index_codebase()
+    expected = {query: engine.search(query) for query in ("search query", "tokenize", "message")}
+
+    # As pickled before ContentStore: line lists plus a line map per file
+    state = engine.__getstate__()
+    contents = state.pop("contents")
+    state["file_contents"] = {rel_path: contents.lines(rel_path) for rel_path in contents.keys()}
+    state["file_line_map"] = {rel_path: {1: lines[0]} for rel_path, lines in state["file_contents"].items()}
+    old = SearchEngine.__new__(SearchEngine)
+    old.__dict__.update(state)
+
+    loaded = load_engine(io.BytesIO(pickle.dumps(old)))
+    assert "file_contents" not in loaded.__dict__ and "file_line_map" not in loaded.__dict__
+    for rel_path, text in files.items():
+        assert loaded.contents.text(rel_path) == text
+    assert {query: loaded.search(query) for query in expected} == expected
+
+
+def _naive_best_line(engine, rel_path, query_tokens):
+    """_find_best_line as it was: re-tokenize every line, keep the first strictly better one"""
+    best_idx, best_score = 0, 0
+    for idx, line in enumerate(engine.contents.lines(rel_path)):
+        score = len(set(query_tokens) & set(engine._tokenize(line)))
+        if score > best_score:
+            best_idx, best_score = idx, score
+    return best_idx
+
+
+def test_find_best_line_matches_the_naive_scan(tmp_path):
+    files = {
+        "ties.py": "import os\n\ndef load(path):\n    return open(path)\n\ndef save(path, data):\n"
+                   "    open(path, 'w').write(data)\n# Load and SAVE the path data\n",
+        "unicode.py": "# café\nnom = 'café crème'\n\nCAFÉ = nom\n",
+    }
+    _write(tmp_path, files)
+    engine = SearchEngine(str(tmp_path))
+    engine.index_codebase()
+    queries = [
+        "path",                 # several lines tie: the first wins
+        "open path",            # lines 4 and 7 tie
+        "save path data",       # line 6 and the comment tie at 3
+        "load save path data",  # the comment alone matches 4
+        "path path open",       # repeated tokens count once
+        "missing",              # no match: line 0
+        "",
+        "café crème",
+        "cafe nom",
+    ]
+    for rel_path in files:
+        for query in queries:
+            tokens = engine._tokenize(query)
+            assert engine._find_best_line(rel_path, tokens) == _naive_best_line(engine, rel_path, tokens), \
+                (rel_path, query)
+    assert engine._find_best_line("ties.py", ["path"]) == 2
+    assert engine._find_best_line("ties.py", ["load", "save", "path", "data"]) == 7
+    assert engine._find_best_line("unknown.py", ["path"]) == 0
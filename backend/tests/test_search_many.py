@@ -0,0 +1,131 @@
+"""SearchService.search_many and POST /search/batch against per-query search()"""
+from types import SimpleNamespace
+import zlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("openai")
+
+from flask import Flask
+
+from app import routes, search_service as search_service_module
+from app.bm25_index import BM25Index
+from app.index_generation import IndexGeneration
+from app.search_service import SearchService
+
+WORDS = ["search", "index", "graph", "route", "parse", "file", "token", "score", "query", "node", "cache"]
+DIM = 8
+
+
+def _vector(text):
+    """Deterministic stand-in for a model embedding"""
+    rng = np.random.default_rng(zlib.crc32(text.encode()))
+    return rng.standard_normal(DIM).astype(np.float32)
+
+
+class _Encoder:
+    """encode_query / encode_queries replacement that counts calls and can fail on request"""
+
+    def __init__(self):
+        self.calls = []
+        self.fail_on = set()
+
+    def encode_query(self, query, model_name=None):
+        self.calls.append([query])
+        return _vector(query)
+
+    def encode_queries(self, queries, model_name=None):
+        self.calls.append(list(queries))
+        if self.fail_on & set(queries):
+            raise RuntimeError("encode failed")
+        return np.stack([_vector(query) for query in queries])
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    encoder = _Encoder()
+    monkeypatch.setattr(search_service_module, "encode_query", encoder.encode_query)
+    monkeypatch.setattr(search_service_module, "encode_queries", encoder.encode_queries)
+    return encoder
+
+
+@pytest.fixture
+def service(tmp_path):
+    rng = np.random.default_rng(7)
+    items = []
+    for item_id in range(40):
+        code = " ".join(rng.choice(WORDS, size=rng.integers(2, 10)))
+        items.append({"file_path": f"src/m{item_id % 5}.py", "name": f"f{item_id}", "type": "function",
+                      "code": code, "start_line": item_id, "end_line": item_id + 1})
+    service = SearchService(str(tmp_path), str(tmp_path / "index.pkl"))
+    embeddings = service._normalize_embeddings(np.stack([_vector(item["code"]) for item in items]))
+    bm25 = BM25Index([service._tokenize_for_bm25(item["code"]) for item in items])
+    service.generation = IndexGeneration(metadata=items, embeddings=embeddings, bm25=bm25)
+    service.is_semantic_indexed = True
+    service.semantic_service = SimpleNamespace(embedding_model=object(), embedding_model_id="stub")
+    return service
+
+
+QUERIES = ["search index", "graph route parse file", "token", "query node cache score search",
+           "unknownword", "!!!", "search index"]
+
+
+def test_search_many_matches_search(service, encoder):
+    expected = [service.search(query, max_results=5) for query in QUERIES]
+    assert service.search_many(QUERIES, max_results=5) == expected
+    expected = [service.search(query, max_results=5, semantic_weight=0.3, lexical_weight=0.7, adaptive=False)
+                for query in QUERIES]
+    assert service.search_many(QUERIES, max_results=5, semantic_weight=0.3, lexical_weight=0.7,
+                               adaptive=False) == expected
+
+
+def test_search_many_encodes_served_queries_once(service, encoder):
+    service.search_many(["search index", "token"], max_results=0)
+    # Empty results are still served by the batch path: no per-query search() afterwards
+    assert encoder.calls == [["search index", "token"]]
+
+
+def test_search_many_falls_back_only_for_a_failed_chunk(service, encoder, monkeypatch):
+    monkeypatch.setattr(SearchService, "SEARCH_BATCH_MAX_QUERIES", 2)
+    encoder.fail_on = {"token"}
+    queries = ["search index", "token", "graph route", "parse file", "query node"]
+    expected = [service.search(query, max_results=3) for query in queries]
+    encoder.calls.clear()
+
+    assert service.search_many(queries, max_results=3) == expected
+    # Chunks after the failed one are still batched; only its two queries go one by one
+    assert encoder.calls == [["search index", "token"], ["graph route", "parse file"], ["query node"],
+                             ["search index"], ["token"]]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    service = SimpleNamespace(is_indexed=lambda: True,
+                              search_many=lambda queries, **kwargs: [[] for _ in queries])
+    monkeypatch.setattr(routes, "search_service", service)
+    app = Flask(__name__)
+    app.register_blueprint(routes.routes_bp)
+    return app.test_client()
+
+
+def test_search_batch_route(client):
+    response = client.post("/search/batch", json={"queries": ["a", " b "]})
+    assert response.status_code == 200
+    assert [entry["query"] for entry in response.get_json()["results"]] == ["a", "b"]
+
+
+@pytest.mark.parametrize("queries", ["search index", {"q": "search"}, [], None, ["ok", 3]])
+def test_search_batch_rejects_bad_queries(client, queries):
+    response = client.post("/search/batch", json={"queries": queries})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_search_batch_caps_the_number_of_queries(client):
+    limit = routes.SEARCH_BATCH_MAX_QUERIES
+    assert client.post("/search/batch", json={"queries": ["q"] * limit}).status_code == 200
+    response = client.post("/search/batch", json={"queries": ["q"] * (limit + 1)})
+    assert response.status_code == 400
+    assert str(limit) in response.get_json()["error"]
@@ -0,0 +1,117 @@
+"""Semantic index generations: write, publish, load and garbage collection"""
+import os
+import time
+
+import numpy as np
+import pytest
+
+from app import semantic_index_store as store
+from app.bm25_index import BM25Index
+from app.index_generation import IndexGeneration
+
+
+def _items(tag, n=3):
+    return [{"file_path": f"{tag}/mod_{i}.py", "name": f"{tag}_func_{i}", "type": "function"} for i in range(n)]
+
+
+def _write_generation(index_dir, tag, n=3):
+    items = _items(tag, n)
+    embeddings = np.eye(n, 4, dtype=np.float32)
+    tmp_dir = store.new_generation_dir(index_dir)
+    store.write_semantic_index(tmp_dir, items, embeddings, BM25Index([item["name"].split("_") for item in items]))
+    return tmp_dir, items
+
+
+def _generations(index_dir):
+    return sorted(p.name for p in index_dir.iterdir() if p.is_dir())
+
+
+def test_publish_switches_current(tmp_path):
+    tmp_dir, items = _write_generation(tmp_path, "first")
+    assert tmp_dir.name.startswith(store.TMP_PREFIX + store.GENERATION_PREFIX)
+    assert not store.has_semantic_index(tmp_path)  # written but not published
+
+    published = store.publish_generation(tmp_path, tmp_dir)
+    assert not tmp_dir.exists()
+    assert published.name == tmp_dir.name[len(store.TMP_PREFIX):]
+    assert (tmp_path / store.CURRENT_FILE).read_text() == published.name
+    assert store.current_generation_dir(tmp_path) == published
+
+    metadata, embeddings, bm25 = store.load_semantic_index(tmp_path)
+    assert list(metadata) == items
+    assert embeddings.shape == (3, 4)
+    assert len(bm25) == 3
+
+
+def test_loaded_generation_survives_the_next_publish(tmp_path):
+    store.publish_generation(tmp_path, _write_generation(tmp_path, "first")[0])
+    metadata, embeddings, _ = store.load_semantic_index(tmp_path)
+    generation = IndexGeneration(metadata=metadata, embeddings=embeddings,
+                                 directory=str(store.current_generation_dir(tmp_path)))
+
+    store.publish_generation(tmp_path, _write_generation(tmp_path, "second")[0])
+    store.publish_generation(tmp_path, _write_generation(tmp_path, "third")[0])  # collects "first"
+    assert not os.path.exists(generation.directory) or os.name == "nt"
+
+    # The old snapshot still reads its mapped files; new loads see the new generation
+    assert list(generation.metadata) == _items("first")
+    assert float(generation.embeddings[0, 0]) == 1.0
+    assert list(store.load_semantic_index(tmp_path)[0]) == _items("third")
+
+
+def test_collect_garbage_keeps_current_and_previous(tmp_path):
+    published = [store.publish_generation(tmp_path, _write_generation(tmp_path, f"g{i}")[0]) for i in range(4)]
+    assert _generations(tmp_path) == [p.name for p in published[-2:]]
+
+    store.collect_garbage(tmp_path, keep_previous=0)
+    assert _generations(tmp_path) == [published[-1].name]
+    assert store.has_semantic_index(tmp_path)
+
+
+def test_collect_garbage_removes_only_stale_temp_dirs(tmp_path):
+    store.publish_generation(tmp_path, _write_generation(tmp_path, "first")[0])
+    in_progress, _ = _write_generation(tmp_path, "running")
+    crashed, _ = _write_generation(tmp_path, "crashed")
+    old = time.time() - store.STALE_TMP_SECONDS - 60
+    os.utime(crashed, (old, old))
+
+    store.collect_garbage(tmp_path)
+    assert in_progress.exists()
+    assert not crashed.exists()
+
+
+def test_discard_generation(tmp_path):
+    tmp_dir, _ = _write_generation(tmp_path, "cancelled")
+    store.discard_generation(tmp_dir)
+    assert not tmp_dir.exists()
+    assert not store.has_semantic_index(tmp_path)
+
+
+def test_legacy_layout_without_current(tmp_path):
+    items = _items("legacy")
+    store.write_semantic_index(tmp_path, items, np.eye(3, 4, dtype=np.float32),
+                               BM25Index([item["name"].split("_") for item in items]))
+    assert store.current_generation_dir(tmp_path) == tmp_path
+    assert store.has_semantic_index(tmp_path)
+    assert list(store.load_semantic_index(tmp_path)[0]) == items
+    store.collect_garbage(tmp_path)  # nothing to collect in the legacy layout
+    assert (tmp_path / store.MANIFEST_FILE).exists()
+
+
+def test_inconsistent_generation_is_rejected(tmp_path):
+    tmp_dir, _ = _write_generation(tmp_path, "broken")
+    np.save(tmp_dir / store.EMBEDDINGS_FILE, np.zeros((2, 4), dtype=np.float32))
+    store.publish_generation(tmp_path, tmp_dir)
+    with pytest.raises(ValueError):
+        store.load_semantic_index(tmp_path)
+
+
+def test_generation_replace_drops_derived_lookups():
+    generation = IndexGeneration(engine="engine", metadata=["a"], relationship_index="rel", code_graph="graph")
+    same_components = generation.replace(engine="new engine")
+    assert (same_components.relationship_index, same_components.code_graph) == ("rel", "graph")
+    assert generation.engine == "engine"
+
+    new_components = generation.replace(metadata=["b"])
+    assert new_components.relationship_index is None and new_components.code_graph is None
+    assert generation.metadata == ["a"] and generation.relationship_index == "rel"
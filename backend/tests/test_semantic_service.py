@@ -0,0 +1,123 @@
+"""SemanticSearchService: embedding model load failures are retried, not cached forever; index publishing"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("openai")
+
+from app import semantic_service
+from app.semantic_service import SemanticSearchService
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    return SemanticSearchService(vector_index_file=str(tmp_path / "vector.index"))
+
+
+def test_failed_model_load_is_retried_after_backoff(service, monkeypatch):
+    clock = _Clock()
+    calls = []
+    model = object()
+
+    def loader(model_id):
+        calls.append(model_id)
+        if len(calls) == 1:
+            raise OSError("model download failed")
+        return model
+
+    monkeypatch.setattr(semantic_service, "time", clock)
+    monkeypatch.setattr(semantic_service, "get_embedding_model", loader)
+
+    assert service.embedding_model is None
+    clock.now += SemanticSearchService.MODEL_RETRY_SECONDS / 2
+    assert service.embedding_model is None
+    assert len(calls) == 1
+
+    clock.now += SemanticSearchService.MODEL_RETRY_SECONDS
+    assert service.embedding_model is model
+    assert service._embedding_model_error is None
+    assert len(calls) == 2
+
+
+def test_build_vector_index_retries_failed_model(service, monkeypatch, tmp_path):
+    calls = []
+
+    def loader(model_id):
+        calls.append(model_id)
+        raise OSError("model download failed")
+
+    monkeypatch.setattr(semantic_service, "get_embedding_model", loader)
+    assert service.embedding_model is None
+    with pytest.raises(RuntimeError):
+        service.build_vector_index(tmp_path)
+    assert len(calls) == 2
+
+
+def test_unpublished_vector_index_leaves_the_current_one(service, tmp_path):
+    items = [{"file_path": str(tmp_path / "src" / "a.py"), "name": f"f{i}", "start_line": i} for i in range(3)]
+    embeddings = np.eye(3, 4, dtype=np.float32)
+    built = service.build_vector_index_from(items, embeddings, root_path=tmp_path / "src", publish=False)
+    index_file = Path(service.vector_index_file)
+
+    assert service.faiss_index is None and service.file_map == [] and service.root_path is None
+    assert not index_file.exists()
+    service.publish_vector_index(built)
+    assert service.faiss_index.ntotal == 3
+    assert [entry["file_path"] for entry in service.file_map] == ["a.py"] * 3
+    assert service.root_path == tmp_path / "src"
+    assert index_file.exists() and not Path(built[2]).exists()
+
+    discarded = service.build_vector_index_from(items[:1], embeddings[:1], publish=False)
+    service.discard_vector_index(discarded)
+    assert not Path(discarded[2]).exists()
+    assert service.faiss_index.ntotal == 3
+
+
+def _fused(results):
+    return [(r["file_path"], r["start_line"], round(r["score"], 6), r["semantic_score"], r["bm25_score"])
+            for r in results]
+
+
+def test_fuse_ranked_weights_and_normalizes_reciprocal_ranks(service, tmp_path):
+    service.root_path = tmp_path
+    a = {"file_path": "a.py", "function_name": "a", "start_line": 1, "snippet": "def a(): ..."}
+    b = {"file_path": "b.py", "function_name": "b", "start_line": 5}
+    vector_hits = [(0.9, a), (0.8, b), (0.7, dict(b))]  # b's second hit is the same component
+    lexical_hits = [
+        {"file_path": str(tmp_path / "a.py"), "start_line": 1, "score": 10.0},  # absolute path, same component
+        {"file_path": "c.py", "name": "c", "start_line": None, "end_line": 4, "code": "def c(): ...", "score": 5.0},
+        {"file_path": "a.py", "start_line": 1, "score": 1.0},  # counted once, at its best rank
+    ]
+    k = SemanticSearchService.RRF_K
+    scale = k + 1  # rank 1 in both passes scores 1.0
+    results = service._fuse_ranked(vector_hits, lexical_hits, top_k=10)
+
+    assert _fused(results) == [
+        ("a.py", 1, 1.0, 0.9, 1.0),
+        ("b.py", 5, round(0.6 * scale / (k + 2), 6), 0.8, 0.0),
+        ("c.py", 1, round(0.4 * scale / (k + 2), 6), 0.0, 0.5),
+    ]
+    # Found by BM25 only: the result is built from the lexical hit
+    assert results[2]["function_name"] == "c" and results[2]["snippet"] == "def c(): ..."
+    assert results[2]["end_line"] == 4
+    assert service._fuse_ranked(vector_hits, lexical_hits, top_k=1)[0]["file_path"] == "a.py"
+
+
+def test_fuse_ranked_ties_keep_vector_order_first(service):
+    service.SEMANTIC_WEIGHT = service.LEXICAL_WEIGHT = 0.5
+    vector_hits = [(0.5, {"file_path": "v.py", "start_line": 1})]
+    lexical_hits = [{"file_path": "l.py", "start_line": 1, "score": 2.0}]
+    results = service._fuse_ranked(vector_hits, lexical_hits, top_k=2)
+    assert [(r["file_path"], r["score"]) for r in results] == [("v.py", 0.5), ("l.py", 0.5)]
+    assert service._fuse_ranked([], [], top_k=5) == []
@@ -0,0 +1,44 @@
+"""top_k_indices / top_k_items against a full stable sort"""
+import random
+
+import numpy as np
+import pytest
+
+from app.top_k import top_k_indices, top_k_items
+
+
+def _sorted_indices(scores, k):
+    return sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_top_k_indices_matches_stable_sort(seed):
+    rng = random.Random(seed)
+    n = rng.randint(1, 60)
+    scores = [float(rng.randint(0, 4)) for _ in range(n)]  # few distinct values: many ties
+    for k in (0, 1, rng.randint(1, n), n - 1, n, n + 5):
+        assert top_k_indices(np.array(scores), k).tolist() == _sorted_indices(scores, k)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_top_k_items_matches_stable_sort(seed):
+    rng = random.Random(seed)
+    n = rng.randint(1, 60)
+    items = [(f"doc{i}", float(rng.randint(0, 4))) for i in range(n)]
+    for k in (0, 1, rng.randint(1, n), n, n + 5):
+        expected = sorted(items, key=lambda item: -item[1])[:k]
+        assert top_k_items(iter(items), k, key=lambda item: item[1]) == expected
+
+
+def test_all_equal_scores_keep_input_order():
+    scores = np.full(10, 0.5)
+    assert top_k_indices(scores, 4).tolist() == [0, 1, 2, 3]
+    assert top_k_indices(scores, 10).tolist() == list(range(10))
+    items = [(i, 0.5) for i in range(10)]
+    assert top_k_items(items, 4, key=lambda item: item[1]) == items[:4]
+
+
+def test_empty_and_negative_k():
+    assert top_k_indices(np.array([]), 3).tolist() == []
+    assert top_k_indices(np.array([1.0, 2.0]), -1).tolist() == []
+    assert top_k_items([], 3, key=lambda item: item) == []
@@ -0,0 +1,117 @@
+"""vector_index: every index type, IVF fallbacks, search knobs, memory-mapped reads"""
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+pytest.importorskip("openai")
+
+from app import semantic_service, vector_index
+from app.semantic_service import SemanticSearchService
+
+DIM = 32
+
+
+def _vectors(count, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+
+
+def _top1(index, queries):
+    _, ids = index.search(np.ascontiguousarray(queries, dtype=np.float32), 1)
+    return ids[:, 0]
+
+
+@pytest.mark.parametrize("index_type", vector_index.INDEX_TYPES)
+def test_stored_vectors_find_themselves(index_type):
+    vectors = _vectors(400)
+    index = vector_index.build_index(vectors, index_type)
+    vector_index.configure_search(index, nprobe=1000, ef_search=128)  # exhaustive probing
+    assert index.ntotal == len(vectors)
+    assert vector_index.is_cosine(index) == (index_type != "flat_l2")
+
+    queries = vectors if index_type == "flat_l2" else vector_index.normalize_rows(vectors)
+    found = _top1(index, queries)
+    if index_type == "ivf_pq":
+        # Product-quantized codes are lossy: nearly every vector still comes back first
+        assert np.mean(found == np.arange(len(vectors))) > 0.9
+    else:
+        assert found.tolist() == list(range(len(vectors)))
+
+
+def test_ivf_types_fall_back_when_there_are_too_few_vectors():
+    def ivf_cells(index):
+        try:
+            return faiss.extract_index_ivf(index).nlist
+        except RuntimeError:
+            return None
+
+    few = vector_index.build_index(_vectors(50), "ivf_flat")
+    assert isinstance(few, faiss.IndexFlatIP)
+    pq_fallback = vector_index.build_index(_vectors(200), "ivf_pq")
+    assert ivf_cells(pq_fallback) == 200 // vector_index.MIN_POINTS_PER_CELL
+    assert isinstance(faiss.downcast_index(pq_fallback), faiss.IndexIVFFlat)
+    assert isinstance(faiss.downcast_index(vector_index.build_index(_vectors(400), "ivf_pq")), faiss.IndexIVFPQ)
+    assert ivf_cells(vector_index.build_index(_vectors(400), "ivf_flat", nlist=4)) == 4
+    with pytest.raises(ValueError):
+        vector_index.build_index(_vectors(10), "annoy")
+
+
+def test_configure_search():
+    ivf = vector_index.build_index(_vectors(400), "ivf_flat", nlist=8)
+    vector_index.configure_search(ivf, nprobe=100)
+    assert faiss.extract_index_ivf(ivf).nprobe == 8  # clamped to the number of cells
+    hnsw = vector_index.build_index(_vectors(100), "hnsw")
+    vector_index.configure_search(hnsw, nprobe=4, ef_search=77)
+    assert hnsw.hnsw.efSearch == 77
+    flat = vector_index.build_index(_vectors(10), "flat_ip")
+    vector_index.configure_search(flat, nprobe=4, ef_search=77)  # ignored
+
+
+@pytest.mark.parametrize("index_type", ["flat_ip", "ivf_flat"])
+def test_read_index_memory_mapped(tmp_path, index_type):
+    vectors = vector_index.normalize_rows(_vectors(400))
+    index = vector_index.build_index(vectors, index_type)
+    path = tmp_path / "vector.index"
+    faiss.write_index(index, str(path))
+    for mmap in (True, False):
+        loaded = vector_index.read_index(path, mmap=mmap)
+        vector_index.configure_search(loaded, nprobe=1000)
+        assert loaded.ntotal == 400
+        assert _top1(loaded, vectors[:20]).tolist() == list(range(20))
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(semantic_service, "get_embedding_model", lambda model_id: object())
+    return SemanticSearchService(vector_index_file=str(tmp_path / "vector.index"))
+
+
+def _file_map(count):
+    return [{"file_path": f"f{i}.py", "function_name": f"f{i}", "start_line": 1} for i in range(count)]
+
+
+def test_semantic_search_skips_unfilled_slots(service, monkeypatch):
+    vectors = _vectors(400)
+    service.faiss_index = vector_index.build_index(vectors, "ivf_flat", nlist=8)
+    vector_index.configure_search(service.faiss_index, nprobe=1)
+    service.file_map = _file_map(len(vectors))
+    monkeypatch.setattr(semantic_service, "encode_query", lambda query, model_id: vectors[7])
+
+    results = service.semantic_search("q", top_k=len(vectors), use_hybrid=False)
+    # One cell probed: far fewer hits than asked for, and no -1 slot turned into file_map[-1]
+    assert 0 < len(results) < len(vectors)
+    assert results[0]["file_path"] == "f7.py"
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-5)
+    assert len({r["file_path"] for r in results}) == len(results)
+
+
+def test_semantic_search_l2_scores_relative_to_the_query_hits(service, monkeypatch):
+    vectors = np.zeros((3, DIM), dtype=np.float32)
+    vectors[1, 0], vectors[2, 0] = 1.0, 3.0  # squared distances 0, 1, 9 from the query
+    service.faiss_index = vector_index.build_index(vectors, "flat_l2")
+    service.file_map = _file_map(3)
+    monkeypatch.setattr(semantic_service, "encode_query", lambda query, model_id: np.zeros(DIM, dtype=np.float32))
+
+    results = service.semantic_search("q", top_k=3, use_hybrid=False)
+    assert [r["file_path"] for r in results] == ["f0.py", "f1.py", "f2.py"]
+    assert [r["score"] for r in results] == pytest.approx([1.0, 1 - 1 / 9, 0.0])
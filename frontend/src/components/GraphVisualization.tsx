@@ -11,6 +11,8 @@ interface GraphNode {
   file_path?: string;
   context?: string;
   metadata?: Record<string, any>;
+  expand?: Record<string, any>;
+  symbol_count?: number;
 }
 
 interface GraphLink {
@@ -24,8 +26,13 @@ interface GraphVisualizationProps {
   className?: string;
   nodes?: GraphNode[];
   edges?: GraphLink[];
+  /** Called for aggregate (file/directory) nodes instead of opening their code */
+  onExpandNode?: (node: GraphNode) => void;
 }
 
+// Code previews are fetched automatically only for graphs up to this size
+const AUTO_LOAD_CODE_MAX_NODES = 50;
+
 // Helper function to determine node type from file path and context
 function getNodeType(
   filePath: string | undefined, 
@@ -87,7 +94,7 @@ const nodeColors = {
   },
 };
 
-export function GraphVisualization({ className, nodes, edges }: GraphVisualizationProps) {
+export function GraphVisualization({ className, nodes, edges, onExpandNode }: GraphVisualizationProps) {
   const containerRef = useRef<HTMLDivElement>(null);
   const svgRef = useRef<SVGSVGElement>(null);
   const [expandedNode, setExpandedNode] = useState<string | null>(null);
@@ -98,6 +105,7 @@ export function GraphVisualization({ className, nodes, edges }: GraphVisualizati
   // Use provided nodes/edges or fallback to empty arrays
   const graphNodes: GraphNode[] = nodes || [];
   const graphLinks: GraphLink[] = edges || [];
+  const nodesById = new Map(graphNodes.map((node) => [node.id, node]));
 
   // Load code content for nodes when needed
   const loadNodeCode = async (node: GraphNode) => {
@@ -146,17 +154,22 @@ export function GraphVisualization({ className, nodes, edges }: GraphVisualizati
     return () => window.removeEventListener("resize", updatePositions);
   }, [graphNodes]);
 
-  // Load code for visible nodes
+  // Load code for visible nodes (not for aggregates or big graphs: one request per node)
   useEffect(() => {
+    if (graphNodes.length > AUTO_LOAD_CODE_MAX_NODES) return;
     graphNodes.forEach(node => {
-      if (node.file_path && !nodeCodes[node.id] && !node.code) {
+      if (node.file_path && !node.expand && !nodeCodes[node.id] && !node.code) {
         loadNodeCode(node);
       }
     });
   }, [graphNodes]);
 
-  const handleNodeClick = (nodeId: string) => {
-    setExpandedNode(expandedNode === nodeId ? null : nodeId);
+  const handleNodeClick = (node: GraphNode) => {
+    if (node.expand && onExpandNode) {
+      onExpandNode(node);
+      return;
+    }
+    setExpandedNode(expandedNode === node.id ? null : node.id);
   };
 
   const getCodePreview = (code: string, expanded: boolean) => {
@@ -175,8 +188,8 @@ export function GraphVisualization({ className, nodes, edges }: GraphVisualizati
       >
         <defs>
           {graphLinks.map((link, i) => {
-            const sourceNode = graphNodes.find(n => n.id === link.source);
-            const targetNode = graphNodes.find(n => n.id === link.target);
+            const sourceNode = nodesById.get(link.source);
+            const targetNode = nodesById.get(link.target);
             if (!sourceNode || !targetNode) return null;
             const sourceContext = sourceNode.context || (sourceNode.metadata?.context as string);
             const targetContext = targetNode.context || (targetNode.metadata?.context as string);
@@ -227,13 +240,15 @@ export function GraphVisualization({ className, nodes, edges }: GraphVisualizati
         const colors = nodeColors[nodeType];
         
         // Get code content - prefer loaded code, then node.code, then placeholder
-        const codeContent = nodeCodes[node.id] || node.code || (node.file_path ? "Loading code..." : "No code available");
+        const codeContent = node.expand
+          ? `${node.symbol_count ?? 0} symbols`
+          : nodeCodes[node.id] || node.code || (node.file_path ? "Loading code..." : "No code available");
         const isLoading = loadingCodes.has(node.id) && !nodeCodes[node.id];
 
         return (
           <div
             key={node.id}
-            onClick={() => handleNodeClick(node.id)}
+            onClick={() => handleNodeClick(node)}
             className={cn(
               "absolute cursor-pointer transition-all duration-500 ease-out",
               "rounded-xl border backdrop-blur-md",
@@ -27,6 +27,9 @@ export interface GraphNode {
   context?: string;
   code?: string;
   metadata?: Record<string, any>;
+  /** Aggregate (file/directory) nodes: query that expands them one level down */
+  expand?: GraphQuery;
+  symbol_count?: number;
 }
 
 export interface GraphEdge {
@@ -34,11 +37,35 @@ export interface GraphEdge {
   target: string;
   type?: string;
   label?: string;
+  /** Aggregate edges: number of symbol-level edges they stand for */
+  weight?: number;
 }
 
 export interface GraphData {
   nodes: GraphNode[];
   edges: GraphEdge[];
+  level?: GraphLevel;
+}
+
+export type GraphLevel = "directory" | "file" | "symbol";
+
+export interface GraphQuery {
+  level?: GraphLevel;
+  file?: string;
+  /** Aggregate levels: only files under this directory */
+  dir?: string;
+  node?: string;
+  depth?: number;
+  types?: string;
+}
+
+function graphQueryString(query: GraphQuery, extra: Record<string, string> = {}): string {
+  const params = new URLSearchParams(extra);
+  Object.entries(query).forEach(([key, value]) => {
+    if (value !== undefined && value !== "") params.set(key, String(value));
+  });
+  const text = params.toString();
+  return text ? `?${text}` : '';
 }
 
 /**
@@ -81,10 +108,10 @@ export async function getFlowGraph(query: string): Promise<GraphData> {
 }
 
 /**
- * Get general graph data
+ * Get general graph data (file/directory aggregates by default, see GraphQuery)
  */
-export async function getGraph(): Promise<GraphData> {
-  const response = await fetch(`${API_BASE}/graph`);
+export async function getGraph(query: GraphQuery = {}): Promise<GraphData> {
+  const response = await fetch(`${API_BASE}/graph${graphQueryString(query)}`);
   
   if (!response.ok) {
     const errorData = await response.json().catch(() => ({}));
@@ -95,27 +122,131 @@ export async function getGraph(): Promise<GraphData> {
   return data;
 }
 
+/**
+ * Stream graph data as NDJSON, calling onChunk as nodes and edges arrive
+ * so large graphs can be rendered progressively. Resolves with the complete graph.
+ */
+export async function streamGraph(
+  query: GraphQuery,
+  onChunk: (data: GraphData) => void,
+  signal?: AbortSignal
+): Promise<GraphData> {
+  const response = await fetch(`${API_BASE}/graph${graphQueryString(query, { format: 'ndjson' })}`, { signal });
+
+  if (!response.ok || !response.body) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.error || errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+  }
+
+  const graph: GraphData = { nodes: [], edges: [] };
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  const handleLine = (line: string) => {
+    if (!line.trim()) return;
+    const message = JSON.parse(line);
+    if (message.kind === 'meta') {
+      graph.level = message.level;
+    } else if (message.kind === 'nodes') {
+      graph.nodes = graph.nodes.concat(message.nodes);
+    } else if (message.kind === 'edges') {
+      graph.edges = graph.edges.concat(message.edges);
+    } else if (message.kind === 'error') {
+      throw new Error(message.error);
+    } else {
+      return;
+    }
+    onChunk({ ...graph });
+  };
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop() || '';
+    lines.forEach(handleLine);
+  }
+  handleLine(buffer + decoder.decode());
+  return graph;
+}
+
+export interface ScanProgress {
+  stage: string;
+  files_walked: number;
+  files_parsed: number;
+  components: number;
+  embedded: number;
+  bytes_written: number;
+  totals: Record<string, number>;
+}
+
+export interface ScanJob {
+  job_id: string;
+  kind: string;
+  status: "queued" | "running" | "succeeded" | "failed" | "cancelled";
+  progress: ScanProgress;
+  result?: { count: number; message: string } | null;
+  error?: string | null;
+  elapsed_seconds: number;
+}
+
+const SCAN_POLL_INTERVAL_MS = 1000;
+
+async function scanRequest(url: string, init?: RequestInit): Promise<ScanJob> {
+  const response = await fetch(url, init);
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.error || errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+  }
+  return response.json();
+}
+
 /**
  * Scan/index the codebase
+ * Runs as a background job on the server; polls its progress until it finishes.
  */
-export async function scanCodebase(rootPath: string): Promise<{ count: number; message: string }> {
-  const response = await fetch(`${API_BASE}/scan`, {
+export async function scanCodebase(
+  rootPath: string,
+  onProgress?: (job: ScanJob) => void
+): Promise<{ count: number; message: string }> {
+  let job = await scanRequest(`${API_BASE}/scan`, {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
     },
     body: JSON.stringify({
       root_path: rootPath,
+      background: true,
     }),
   });
 
-  if (!response.ok) {
-    const errorData = await response.json().catch(() => ({}));
-    throw new Error(errorData.error || errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+  while (job.status === "queued" || job.status === "running") {
+    onProgress?.(job);
+    await new Promise((resolve) => setTimeout(resolve, SCAN_POLL_INTERVAL_MS));
+    job = await getScanJob(job.job_id);
   }
+  onProgress?.(job);
 
-  const data = await response.json();
-  return data;
+  if (job.status !== "succeeded" || !job.result) {
+    throw new Error(job.error || `Scan ${job.status}`);
+  }
+  return job.result;
+}
+
+/**
+ * Get a scan job's status and progress
+ */
+export async function getScanJob(jobId: string): Promise<ScanJob> {
+  return scanRequest(`${API_BASE}/scan/${encodeURIComponent(jobId)}`);
+}
+
+/**
+ * Cancel a scan job; the index already being served stays in place
+ */
+export async function cancelScanJob(jobId: string): Promise<ScanJob> {
+  return scanRequest(`${API_BASE}/scan/${encodeURIComponent(jobId)}/cancel`, { method: 'POST' });
 }
 
 /**
@@ -1,9 +1,9 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { Link, useSearchParams } from "react-router-dom";
 import { ArrowLeft, Maximize2, ZoomIn, ZoomOut, RotateCcw, Loader2 } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { GraphVisualization } from "@/components/GraphVisualization";
-import { getFlowGraph, getGraph, GraphData } from "@/lib/api";
+import { getFlowGraph, streamGraph, GraphData, GraphNode, GraphQuery } from "@/lib/api";
 
 export default function Graph() {
   const [searchParams] = useSearchParams();
@@ -11,25 +11,47 @@ export default function Graph() {
   const [graphData, setGraphData] = useState<GraphData | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  // Level-of-detail drill-down: overview first, each expanded node pushes its query
+  const [views, setViews] = useState<GraphQuery[]>([{}]);
+  const currentView = views[views.length - 1];
+  const abortRef = useRef<AbortController | null>(null);
 
   useEffect(() => {
     loadGraph();
-  }, [query]);
+    return () => abortRef.current?.abort();
+  }, [query, currentView]);
 
   async function loadGraph() {
+    abortRef.current?.abort();
+    const controller = new AbortController();
+    abortRef.current = controller;
     setLoading(true);
     setError(null);
     try {
-      const data = query ? await getFlowGraph(query) : await getGraph();
-      setGraphData(data);
+      if (query) {
+        setGraphData(await getFlowGraph(query));
+      } else {
+        // Stream the graph so big views render as chunks arrive
+        setGraphData(null);
+        const data = await streamGraph(currentView, (partial) => {
+          setGraphData(partial);
+          setLoading(false);
+        }, controller.signal);
+        setGraphData(data);
+      }
     } catch (err) {
+      if (controller.signal.aborted) return;
       setError(err instanceof Error ? err.message : "Failed to load graph");
       console.error("Graph loading error:", err);
     } finally {
-      setLoading(false);
+      if (!controller.signal.aborted) setLoading(false);
     }
   }
 
+  function expandNode(node: GraphNode) {
+    if (node.expand) setViews((previous) => [...previous, node.expand!]);
+  }
+
   return (
     <div className="min-h-screen bg-background">
       {/* Background effects */}
@@ -47,6 +69,11 @@ export default function Graph() {
                 <span className="hidden sm:inline">Back</span>
               </Link>
             </Button>
+            {!query && views.length > 1 && (
+              <Button variant="outline" size="sm" onClick={() => setViews((previous) => previous.slice(0, -1))}>
+                Up a level
+              </Button>
+            )}
             <div>
               <h1 className="text-xl font-semibold text-foreground">Component Graph</h1>
               <p className="text-sm text-muted-foreground hidden sm:block">
@@ -92,6 +119,7 @@ export default function Graph() {
               className="absolute inset-0" 
               nodes={graphData.nodes}
               edges={graphData.edges}
+              onExpandNode={expandNode}
             />
           )}
 